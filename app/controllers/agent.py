@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, Query, UploadFile, File
+from fastapi import APIRouter, Depends, Query, UploadFile, File, Header
 from typing import List, Optional
 from uuid import UUID
 
 from app.services.agent import AgentService
 from app.schemas.agent import (
-    AgentCreate, AgentUpdate, AgentOutList, AgentOutDetail, AgentOutInternal
+    AgentCreate, AgentUpdate, AgentPatch, AgentOutList, AgentOutDetail, AgentOutInternal
 )
 from app.schemas.http_response import HttpResponse
+from app.schemas.batch import BatchGetRequest, BatchGetOut
 from app.schemas.http_response_advice import ok, created, updated, deleted
+from app.schemas.trusted import trusted
+from app.core.utils.mongo import parse_fields
+from app.core.manifest_store import detail_not_modified, detail_response
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor, validate_contractor_access
 
 router = APIRouter(prefix="/agents", tags=["Agents"])
@@ -26,11 +30,33 @@ def get_all(
     return ok(total=agents["total"], pages=agents["pages"], data=agents["items"])
 
 
+@router.post("/batch-get", response_model=HttpResponse[BatchGetOut[AgentOutDetail]], dependencies=[Depends(require_permissions(["*", "hafj0kaclm"]))])
+def batch_get(payload: BatchGetRequest):
+    """Detalhe de vários agentes em uma chamada; ids não encontrados voltam em `missing`."""
+    result = AgentService.get_many(payload.ids)
+    return ok(total=len(result["items"]), data=result)
+
+
 @router.get("/{id}", response_model=AgentOutDetail, dependencies=[Depends(require_permissions(["*", "hafj0kaclm"]))])
-def get_by_id(id: str):
-    agent: AgentOutInternal = AgentService.get_by_id(id)
+def get_by_id(
+    id: str,
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: name,enabled)"),
+    if_none_match: Optional[str] = Header(None),
+    ):
+    selected = parse_fields(AgentOutDetail, fields)
 
-    return AgentOutDetail(**agent.dict())
+    # projeção de _id + versão: 304 sem rodar a agregação do detalhe
+    state = AgentService.version_state(id)
+    response = detail_not_modified(state, if_none_match)
+    if response:
+        return response
+
+    if selected:
+        return detail_response(AgentService.get_fields(id, selected), state)
+
+    agent: AgentOutInternal = AgentService.get_by_id(id)
+    # dados já vêm do banco: monta sem revalidar e serializa direto (sem a validação do response_model)
+    return detail_response(trusted(AgentOutDetail, dict(agent)), state, agent.doc_version or 0)
 
 
 @router.post("", response_model=HttpResponse[AgentOutDetail], dependencies=[Depends(require_permissions(["*", "hafj0qu4kb"]))])
@@ -42,19 +68,40 @@ def create(payload: AgentCreate, contractor_id: Optional[UUID] = Query(None), cu
 
 
 @router.put("/{id}", response_model=HttpResponse[AgentOutDetail], dependencies=[Depends(require_permissions(["*", "hafj0vsur6"]))])
-def update(id: str, payload: AgentUpdate, current_user: dict = Depends(get_current_user)):
-    agent: AgentOutInternal = AgentService.get_by_id(id)
+def update(
+    id: str,
+    payload: AgentUpdate,
+    current_user: dict = Depends(get_current_user),
+    if_match: Optional[str] = Header(None),
+):
+    agent: AgentOutInternal = AgentService.get_by_id(id, primary=True)
 
     # Validating whether the logged-in user can access the contractor's data
     validate_contractor_access(current_user, agent.contractor_id)
     
-    data: AgentOutDetail = AgentService.update(id, payload)
+    data: AgentOutDetail = AgentService.update(id, payload, if_match)
+    return updated(data=data)
+
+
+@router.patch("/{id}", response_model=HttpResponse[AgentOutDetail], dependencies=[Depends(require_permissions(["*", "hafj0vsur6"]))])
+def patch(
+    id: str,
+    payload: AgentPatch,
+    current_user: dict = Depends(get_current_user),
+    if_match: Optional[str] = Header(None),
+):
+    agent: AgentOutInternal = AgentService.get_by_id(id, primary=True)
+
+    # Validating whether the logged-in user can access the contractor's data
+    validate_contractor_access(current_user, agent.contractor_id)
+
+    data: AgentOutDetail = AgentService.patch(id, payload, if_match)
     return updated(data=data)
 
 
 @router.delete("/{id}", response_model=HttpResponse[None], dependencies=[Depends(require_permissions(["*", "hafj0zvbsy"]))])
 def delete(id: str, current_user: dict = Depends(get_current_user)):
-    agent: AgentOutInternal = AgentService.get_by_id(id)
+    agent: AgentOutInternal = AgentService.get_by_id(id, primary=True)
 
     # Validating whether the logged-in user can access the contractor's data
     validate_contractor_access(current_user, agent.contractor_id)
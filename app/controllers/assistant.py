@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Header
 from typing import List, Optional
 from uuid import UUID
 
 from app.services.assistant import AssistantService
+from app.services.assistant_runtime import AssistantRuntimeService
 from app.schemas.assistant import (
     AssistantCreate, 
     AssistantUpdate, 
+    AssistantPatch, 
     AssistantOutList, 
     AssistantOutDetail, 
     AssistantOutInternal
 )
 from app.schemas.http_response import HttpResponse
+from app.schemas.batch import BatchGetRequest, BatchGetOut
 from app.schemas.http_response_advice import ok, created, updated, deleted
+from app.schemas.trusted import trusted
+from app.core.utils.mongo import parse_fields
+from app.core.manifest_store import etag_matches, not_modified, versioned_response, detail_not_modified, detail_response
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor, validate_contractor_access
 
 router = APIRouter(prefix="/assistants", tags=["Assistants"])
@@ -30,11 +36,54 @@ def get_all(
     return ok(total=assistants["total"], pages=assistants["pages"], data=assistants["items"])
 
 
+@router.post("/batch-get", response_model=HttpResponse[BatchGetOut[AssistantOutDetail]], dependencies=[Depends(require_permissions(["*", "hafj2g174r"]))])
+def batch_get(payload: BatchGetRequest):
+    """Detalhe de vários assistentes em uma chamada; ids não encontrados voltam em `missing`."""
+    result = AssistantService.get_many(payload.ids)
+    return ok(total=len(result["items"]), data=result)
+
+
+@router.get("/{id}/runtime-bundle", response_model=HttpResponse[dict], dependencies=[Depends(require_permissions(["*", "hafj2g174r"]))])
+def runtime_bundle(
+    id: str,
+    current_user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Grafo completo de execução do assistente (agentes, OCPs, credenciais de modelo e
+    tipos de tool) em uma chamada, com ETag para revalidação.
+    """
+    data, etag = AssistantRuntimeService.get(id)
+
+    # Validating whether the logged-in user can access the contractor's data
+    validate_contractor_access(current_user, data.get("contractor_id"))
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return versioned_response(data, etag, accept_encoding)
+
+
 @router.get("/{id}", response_model=AssistantOutDetail, dependencies=[Depends(require_permissions(["*", "hafj2g174r"]))])
-def get_by_id(id: str):
-    assistant: AssistantOutInternal = AssistantService.get_by_id(id)
+def get_by_id(
+    id: str,
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: name,enabled)"),
+    if_none_match: Optional[str] = Header(None),
+    ):
+    selected = parse_fields(AssistantOutDetail, fields)
 
-    return AssistantOutDetail(**assistant.dict())
+    # projeção de _id + versão: 304 sem rodar a agregação do detalhe
+    state = AssistantService.version_state(id)
+    response = detail_not_modified(state, if_none_match)
+    if response:
+        return response
+
+    if selected:
+        return detail_response(AssistantService.get_fields(id, selected), state)
+
+    assistant: AssistantOutInternal = AssistantService.get_by_id(id)
+    # dados já vêm do banco: monta sem revalidar e serializa direto (sem a validação do response_model)
+    return detail_response(trusted(AssistantOutDetail, dict(assistant)), state, assistant.doc_version or 0)
 
 
 @router.post("", response_model=HttpResponse[AssistantOutDetail], dependencies=[Depends(require_permissions(["*", "hafj2l5jy1"]))])
@@ -46,22 +95,43 @@ def create(payload: AssistantCreate, contractor_id: Optional[UUID] = Query(None)
 
 
 @router.put("/{id}", response_model=HttpResponse[AssistantOutDetail], dependencies=[Depends(require_permissions(["*", "hafj2q9evc"]))])
-def update(id: str, payload: AssistantUpdate, current_user: dict = Depends(get_current_user)):
-    assistant: AssistantOutInternal = AssistantService.obter(id)
+def update(
+    id: str,
+    payload: AssistantUpdate,
+    current_user: dict = Depends(get_current_user),
+    if_match: Optional[str] = Header(None),
+):
+    assistant: AssistantOutInternal = AssistantService.get_by_id(id, primary=True)
 
     # Validating whether the logged-in user can access the contractor's data
-    validate_contractor_access(current_user, agente.contractor_id)
+    validate_contractor_access(current_user, assistant.contractor_id)
     
-    data: AssistantOutDetail = AssistantService.update(id, payload)
+    data: AssistantOutDetail = AssistantService.update(id, payload, if_match)
+    return updated(data=data)
+
+
+@router.patch("/{id}", response_model=HttpResponse[AssistantOutDetail], dependencies=[Depends(require_permissions(["*", "hafj2q9evc"]))])
+def patch(
+    id: str,
+    payload: AssistantPatch,
+    current_user: dict = Depends(get_current_user),
+    if_match: Optional[str] = Header(None),
+):
+    assistant: AssistantOutInternal = AssistantService.get_by_id(id, primary=True)
+
+    # Validating whether the logged-in user can access the contractor's data
+    validate_contractor_access(current_user, assistant.contractor_id)
+
+    data: AssistantOutDetail = AssistantService.patch(id, payload, if_match)
     return updated(data=data)
 
 
 @router.delete("/{id}", response_model=HttpResponse[None], dependencies=[Depends(require_permissions(["*", "hafj2v3e45"]))])
 def delete(id: str, current_user: dict = Depends(get_current_user)):
-    assistant: AssistantOutInternal = AssistantService.obter(id)
+    assistant: AssistantOutInternal = AssistantService.get_by_id(id, primary=True)
 
     # Validating whether the logged-in user can access the contractor's data
-    validate_contractor_access(current_user, agente.contractor_id)
+    validate_contractor_access(current_user, assistant.contractor_id)
 
     AssistantService.delete(id)
     return deleted()
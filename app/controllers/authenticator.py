@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Header
 from typing import List, Optional
 from uuid import UUID
 
@@ -11,6 +11,8 @@ from app.schemas.authenticator import (
 )
 from app.schemas.http_response import HttpResponse
 from app.schemas.http_response_advice import ok, created, updated, deleted
+from app.core.utils.mongo import parse_fields
+from app.core.manifest_store import detail_not_modified, detail_response
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor
 
 router = APIRouter(prefix="/authenticators", tags=["Authenticators"])
@@ -42,12 +44,27 @@ def get_all(
     response_model=AuthenticatorOutDetail,
     dependencies=[Depends(require_permissions(["*", "hcdg6h72dy"]))],
 )
-def get_by_id(id: str):
+def get_by_id(
+    id: str,
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: name,url)"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Retorna os detalhes de um Authenticator pelo ID.
     """
+    selected = parse_fields(AuthenticatorOutDetail, fields)
+
+    # projeção de _id + versão: 304 sem ler o documento
+    state = AuthenticatorService.version_state(id)
+    response = detail_not_modified(state, if_none_match)
+    if response:
+        return response
+
+    if selected:
+        return detail_response(AuthenticatorService.get_fields(id, selected), state)
+
     auth = AuthenticatorService.get_by_id(id)
-    return auth
+    return detail_response(auth, state, auth.doc_version or 0)
 
 
 @router.post(
@@ -73,11 +90,11 @@ def create(
     response_model=HttpResponse[AuthenticatorOutDetail],
     dependencies=[Depends(require_permissions(["*", "hcdg7dippn"]))],
 )
-def update(id: str, payload: AuthenticatorUpdate):
+def update(id: str, payload: AuthenticatorUpdate, if_match: Optional[str] = Header(None)):
     """
     Atualiza um Authenticator existente.
     """
-    data = AuthenticatorService.update(id, payload)
+    data = AuthenticatorService.update(id, payload, if_match)
     return updated(data=data)
 
 
@@ -8,9 +8,10 @@ from app.services.credential import CredentialService
 from app.schemas.credential import (
     CredentialCreate, CredentialUpdate, CredentialOutList, CredentialOutDetail, CredentialOutInternal
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, ForbiddenError
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor, validate_contractor_access
 from app.schemas.http_response import HttpResponse
+from app.schemas.batch import BatchGetRequest, BatchGetOut
 from app.schemas.http_response_advice import ok, created, updated, deleted
 from fastapi.encoders import jsonable_encoder
 
@@ -26,6 +27,24 @@ def get_all(credential_type_id: str, contractor_id: Optional[UUID] = Query(None)
     return ok(total=len(rows), data=jsonable_encoder(payload))
 
 
+@router.post("/credentials/batch-get", response_model=HttpResponse[BatchGetOut[CredentialOutDetail]], dependencies=[Depends(require_permissions(["*", "hafiujfqz0"]))])
+def batch_get(payload: BatchGetRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Detalhe de várias credenciais (de qualquer tipo) em uma chamada.
+    Sem a regra "*", credenciais de outros contratantes voltam em `missing`.
+    """
+    if "*" in current_user.get("rules", []):
+        result = CredentialService.get_many(payload.ids)
+    else:
+        # sem contratante no token não há o que filtrar: nega, como validate_contractor_access
+        contractor_id = current_user.get("cid")
+        if contractor_id is None:
+            raise ForbiddenError("Acesso negado")
+        result = CredentialService.get_many(payload.ids, contractor_id)
+
+    return ok(total=len(result["items"]), data=result)
+
+
 @router.get("/{credential_type_id}/credentials/{id}", response_model=CredentialOutDetail, dependencies=[Depends(require_permissions(["*", "hafiujfqz0"]))])
 def get_by_id(credential_type_id: str, id: str, current_user: dict = Depends(get_current_user)):
     credencial: CredentialOutInternal = CredentialService.get_by_id(id)
@@ -56,7 +75,7 @@ def create(
 
 @router.put("/{credential_type_id}/credentials/{id}", response_model=HttpResponse[CredentialOutDetail], dependencies=[Depends(require_permissions(["*", "hafiv73qtg"]))])
 def update(credential_type_id: str, id: str, payload: CredentialUpdate, current_user: dict = Depends(get_current_user)):
-    credencial: CredentialInternal = CredentialService.get_by_id(id)
+    credencial: CredentialInternal = CredentialService.get_by_id(id, primary=True)
 
     # Validating whether the logged-in user can access the contractor's data
     validate_contractor_access(current_user, credencial.contractor_id)
@@ -70,7 +89,7 @@ def update(credential_type_id: str, id: str, payload: CredentialUpdate, current_
 
 @router.delete("/{credential_type_id}/credentials/{id}", response_model=HttpResponse[None], dependencies=[Depends(require_permissions(["*", "hafivn408n"]))])
 def delete(credential_type_id: str, id: str, current_user: dict = Depends(get_current_user)):
-    credencial: CredentialInternal = CredentialService.get_by_id(id)
+    credencial: CredentialInternal = CredentialService.get_by_id(id, primary=True)
 
     # Validating whether the logged-in user can access the contractor's data
     validate_contractor_access(current_user, credencial.contractor_id)
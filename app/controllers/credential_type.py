@@ -1,5 +1,5 @@
-from typing import List, Literal
-from fastapi import APIRouter, Depends, UploadFile, File
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Header
 
 from app.services.credential_type import CredentialTypeService
 from app.schemas.credential_type import (
@@ -11,6 +11,7 @@ from app.schemas.credential_type import (
 from app.core.security import require_permissions
 from app.schemas.http_response import HttpResponse
 from app.schemas.http_response_advice import ok, created, updated, deleted
+from app.core.manifest_store import detail_not_modified, detail_response
 
 router = APIRouter(prefix="/credentials_types", tags=["Credentials Types"])
 
@@ -22,9 +23,15 @@ def get_all(kind: Literal["ai_models", "tools"] = None):
 
 
 @router.get("/{id}", response_model=CredentialTypeOutDetail, dependencies=[Depends(require_permissions(["*", "hafinyo101"]))])
-def get_by_id(id: str):
-    credential_type: CredentialTypeOutDetail = CredentialTypeService.get_by_id(id)
-    return credential_type
+def get_by_id(id: str, if_none_match: Optional[str] = Header(None)):
+    # projeção de _id + versão: 304 sem ler o documento (nem o cache)
+    state = CredentialTypeService.version_state(id)
+    response = detail_not_modified(state, if_none_match)
+    if response:
+        return response
+
+    credential_type, version = CredentialTypeService.get_detail(id)
+    return detail_response(credential_type, state, version)
 
 
 @router.post("", response_model=HttpResponse[CredentialTypeOutDetail], dependencies=[Depends(require_permissions(["*", "hafioitpkt"]))])
@@ -34,8 +41,8 @@ def create(payload: CredentialTypeCreate):
 
 
 @router.put("/{id}", response_model=HttpResponse[CredentialTypeOutDetail], dependencies=[Depends(require_permissions(["*", "hafip1bfnc"]))])
-def update(id: str, payload: CredentialTypeUpdate):
-    data: CredentialTypeOutDetail = CredentialTypeService.update(id, payload)
+def update(id: str, payload: CredentialTypeUpdate, if_match: Optional[str] = Header(None)):
+    data: CredentialTypeOutDetail = CredentialTypeService.update(id, payload, if_match)
     return updated(data=data)
 
 
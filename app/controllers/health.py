@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from fastapi import status as http_status
+
+from app.dataprovider.mongo.base import mongo_stats
+from app.schemas.http_response import HttpResponse
+from app.schemas.http_response_advice import ok, error
+from app.core.security import require_permissions
+from app.core.resources import registry
+from app.core.lifespan import drain_state, is_ready
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live", response_model=HttpResponse[dict])
+def live():
+    """
+    Liveness: o processo está de pé e respondendo (não consulta dependências).
+    """
+    return ok(data=drain_state.snapshot())
+
+
+@router.get("/ready", response_model=HttpResponse[dict])
+def ready():
+    """
+    Readiness: 200 somente com os pools aquecidos e fora da drenagem de shutdown.
+    """
+    resources = registry.snapshot()
+    if not is_ready():
+        return error(
+            "Serviço drenando" if drain_state.draining else "Serviço ainda não está pronto",
+            status_code=http_status.HTTP_503_SERVICE_UNAVAILABLE,
+            errors={name: r["status"] for name, r in resources.items() if r["status"] != "ready"},
+        )
+    return ok(data={**drain_state.snapshot(), "resources": resources})
+
+
+@router.get(
+    "/mongo",
+    response_model=HttpResponse[dict],
+    dependencies=[Depends(require_permissions(["*"]))],
+)
+def mongo():
+    """
+    Latência por comando (tempo no Mongo) e espera por conexão no pool (tempo na aplicação).
+    """
+    return ok(data=mongo_stats())
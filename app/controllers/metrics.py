@@ -0,0 +1,23 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header
+from fastapi.responses import Response
+
+from app.core import metrics
+from app.core.exceptions.types import ForbiddenError
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Métricas no formato texto do Prometheus (ver app.core.metrics).
+    Assíncrona para ler o threadpool do anyio no event loop, sem ocupar uma thread dele.
+    """
+    expected = f"Bearer {metrics.METRICS_TOKEN}"
+    if not metrics.METRICS_TOKEN or not secrets.compare_digest((authorization or "").encode(), expected.encode()):
+        raise ForbiddenError()
+
+    return Response(content=metrics.render(metrics.threadpool_stats()), media_type=metrics.CONTENT_TYPE)
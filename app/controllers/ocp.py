@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, Query
+import json
+from fastapi import APIRouter, Depends, Query, Header
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from uuid import UUID
 
 from app.services.ocp import OCPService
+from app.services.ocp_refresh import OCPRefreshService
 from app.schemas.ocp import (
-    OCPCreate, OCPUpdate, OCPOutList, OCPOutDetail
+    OCPCreate, OCPUpdate, OCPOutList, OCPOutDetail, OCPBulkCreate
 )
 from app.core.security import require_permissions
 from app.schemas.http_response import HttpResponse
+from app.schemas.batch import BatchGetRequest, BatchGetOut
 from app.schemas.http_response_advice import ok, created, updated, deleted
+from app.core.utils.mongo import parse_fields
+from app.core.manifest_store import detail_not_modified, detail_response
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor
 
 router = APIRouter(prefix="/ocps", tags=["OCPs"])
@@ -28,10 +34,38 @@ def get_all(
     return ok(total=agents["total"], pages=agents["pages"], data=agents["items"])
 
 
+@router.post("/refresh", response_model=HttpResponse[dict], dependencies=[Depends(require_permissions(["*"]))])
+def refresh():
+    """Executa agora a atualização das estruturas de todos os OCPs habilitados."""
+    return ok(data=OCPRefreshService.refresh_all())
+
+
+@router.post("/batch-get", response_model=HttpResponse[BatchGetOut[OCPOutDetail]], dependencies=[Depends(require_permissions(["*", "hc9v7gteo5"]))])
+def batch_get(payload: BatchGetRequest):
+    """Detalhe de vários OCPs em uma chamada; ids não encontrados voltam em `missing`."""
+    result = OCPService.get_many(payload.ids)
+    return ok(total=len(result["items"]), data=result)
+
+
 @router.get("/{id}", response_model=OCPOutDetail, dependencies=[Depends(require_permissions(["*", "hc9v7gteo5"]))])
-def get_by_id(id: str):
+def get_by_id(
+    id: str,
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: name,enabled)"),
+    if_none_match: Optional[str] = Header(None),
+    ):
+    selected = parse_fields(OCPOutDetail, fields)
+
+    # projeção de _id + versão: 304 sem ler o documento
+    state = OCPService.version_state(id)
+    response = detail_not_modified(state, if_none_match)
+    if response:
+        return response
+
+    if selected:
+        return detail_response(OCPService.get_fields(id, selected), state)
+
     ocp: OCPOutDetail = OCPService.get_by_id(id)
-    return ocp
+    return detail_response(ocp, state, ocp.doc_version or 0)
 
 
 @router.post("", response_model=HttpResponse[OCPOutDetail], dependencies=[Depends(require_permissions(["*", "hc9v7texzy"]))])
@@ -46,9 +80,25 @@ def create(
     return created(data=data)
 
 
+@router.post("/bulk", dependencies=[Depends(require_permissions(["*", "hc9v7texzy"]))])
+def bulk_import(
+    payload: OCPBulkCreate,
+    contractor_id: Optional[UUID] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    ):
+    """
+    Importa uma lista de OCPs. A resposta é NDJSON (uma linha por item + resumo final),
+    enviada à medida que as estruturas são buscadas e gravadas.
+    """
+    contractor_id = validate_and_alter_contractor(current_user, contractor_id)
+
+    lines = (json.dumps(line, ensure_ascii=False) + "\n" for line in OCPService.bulk_import(contractor_id, payload.items))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
 @router.put("/{id}", response_model=HttpResponse[OCPOutDetail], dependencies=[Depends(require_permissions(["*", "hc9v84px7e"]))])
-def update(id: str, payload: OCPUpdate):
-    data: OCPOutDetail = OCPService.update(id, payload)
+def update(id: str, payload: OCPUpdate, if_match: Optional[str] = Header(None)):
+    data: OCPOutDetail = OCPService.update(id, payload, if_match)
     return updated(data=data)
 
 
@@ -10,7 +10,7 @@ from app.schemas.ocpm import (
     OCPMOutDetail,
 )
 from app.schemas.http_response import HttpResponse
-from app.schemas.http_response_advice import ok, created, updated, deleted
+from app.schemas.http_response_advice import ok, created, updated, deleted, FastJSONResponse
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor
 
 router = APIRouter(prefix="/ocp-m", tags=["OCP-M"])
@@ -47,7 +47,7 @@ def get_by_id(id: str):
     Retorna os detalhes de um OCP-M pelo ID.
     """
     ocpm = OCPMService.get_by_id(id)
-    return ocpm
+    return FastJSONResponse(content=ocpm)
 
 
 @router.post(
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Path, Body, Depends, Query
+import json
+from fastapi import APIRouter, Path, Body, Depends, Query, Header, Request, Response
+from starlette.concurrency import run_in_threadpool
 from app.services.ocpm_dynamic import OCPMDynamicService
 from app.schemas.http_response import HttpResponse
-from app.schemas.http_response_advice import ok, error
+from app.schemas.http_response_advice import ok, error, FastJSONResponse
+from app.services.ocpm_mcp import OCPMMCPService, PARSE_ERROR
+from app.core.exceptions.types import NotFoundError
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor
+from app.core.manifest_store import etag_matches, not_modified, versioned_response
 from uuid import UUID
 from typing import Optional
 
@@ -17,12 +22,17 @@ router = APIRouter(prefix="/ocp-m/dynamic", tags=["OCP-M Dynamic"])
 def registry(
     contractor_id: Optional[UUID] = Query(None),
     current_user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
     ):
     """Lista todos os OCP-Ms disponíveis para auto-registro."""
     contractor_id = validate_and_alter_contractor(current_user, contractor_id)
     
     try:
-        return ok(data=OCPMDynamicService.registry(contractor_id))
+        data, etag = OCPMDynamicService.registry_document(contractor_id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return versioned_response(data, etag, accept_encoding)
     except Exception as e:
         return error(status_code=400, message=f"Erro ao listar OCP-Ms: {str(e)}")
 
@@ -32,10 +42,13 @@ def registry(
     response_model=HttpResponse[dict],
     dependencies=[Depends(require_permissions(["*", "hcopm_view"]))],
 )
-def get_schema(id: str = Path(...)):
+def get_schema(id: str = Path(...), if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
     """Retorna metadados OpenAPI-like do OCP-M"""
     try:
-        return ok(data=OCPMDynamicService.schema(id))
+        data, etag = OCPMDynamicService.schema_document(id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return versioned_response(data, etag, accept_encoding)
     except Exception as e:
         return error(status_code=400, message=f"Erro ao montar schema OCP-M: {str(e)}")
 
@@ -44,10 +57,13 @@ def get_schema(id: str = Path(...)):
     "/{id}/tools",
     response_model=HttpResponse[dict]
 )
-def list_tools(id: str = Path(...)):
+def list_tools(id: str = Path(...), if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
     """Retorna o formato FastMCP completo"""
     try:
-        return ok(data=OCPMDynamicService.list_tools(id))
+        data, etag = OCPMDynamicService.tools_document(id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return versioned_response(data, etag, accept_encoding)
     except Exception as e:
         return error(status_code=400, message=f"Erro ao montar OCP-M: {str(e)}")
 
@@ -64,3 +80,60 @@ def execute_tool(id: str = Path(...), tool_name: str = Path(...), inputs: dict =
         return ok(data=result)
     except Exception as e:
         return error(status_code=400, message=f"Erro ao executar tool {tool_name}: {str(e)}")
+
+
+# ========= MCP (JSON-RPC sobre streamable HTTP) =========
+
+MCP_SESSION_HEADER = "Mcp-Session-Id"
+
+
+@router.post(
+    "/{id}/mcp",
+    dependencies=[Depends(require_permissions(["*", "hcopm_execute"]))],
+)
+async def mcp(
+    request: Request,
+    id: str = Path(...),
+    mcp_session_id: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Endpoint MCP nativo do OCP-M (initialize, tools/list, tools/call, ping).
+    A sessão criada no initialize volta no header Mcp-Session-Id e deve ser reenviada.
+    """
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        return FastJSONResponse(
+            status_code=400,
+            content={"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "JSON inválido"}},
+        )
+
+    try:
+        result, session_id = await run_in_threadpool(
+            OCPMMCPService.handle, id, payload, mcp_session_id, current_user.get("uid")
+        )
+    except NotFoundError as e:
+        return error(status_code=404, message=str(e.detail))
+
+    headers = {MCP_SESSION_HEADER: session_id} if session_id else None
+    if result is None:
+        return Response(status_code=202, headers=headers)
+    return FastJSONResponse(content=result, headers=headers)
+
+
+@router.get("/{id}/mcp")
+def mcp_stream(id: str = Path(...)):
+    """Stream SSE iniciado pelo servidor não é oferecido (o servidor não envia notificações)."""
+    return Response(status_code=405, headers={"Allow": "POST, DELETE"})
+
+
+@router.delete(
+    "/{id}/mcp",
+    dependencies=[Depends(require_permissions(["*", "hcopm_execute"]))],
+)
+def mcp_terminate(id: str = Path(...), mcp_session_id: Optional[str] = Header(None)):
+    """Encerra a sessão MCP e libera as conexões associadas."""
+    if not mcp_session_id or not OCPMMCPService.terminate(mcp_session_id):
+        return error(status_code=404, message="Sessão MCP não encontrada")
+    return Response(status_code=204)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+
+from app.core.profiler import PROFILE_PERMISSION, get_profile
+from app.core.exceptions.types import NotFoundError
+from app.core.security import require_permissions
+from app.schemas.http_response import HttpResponse
+from app.schemas.http_response_advice import ok
+
+router = APIRouter(prefix="/profiles", tags=["Profiles"])
+
+
+@router.get("/{id}", response_model=HttpResponse[dict], dependencies=[Depends(require_permissions([PROFILE_PERMISSION]))])
+def get_by_id(id: str):
+    """
+    Resumo de um perfil capturado com o header X-Profile (rota, status, duração, Server-Timing).
+    """
+    profile = get_profile(id)
+    if not profile:
+        raise NotFoundError("Perfil não encontrado ou expirado")
+
+    return ok(data={k: v for k, v in profile.items() if k != "folded"})
+
+
+@router.get("/{id}/folded", dependencies=[Depends(require_permissions([PROFILE_PERMISSION]))])
+def download(id: str):
+    """
+    Pilhas amostradas no formato "colapsado" (flamegraph.pl, speedscope).
+    """
+    profile = get_profile(id)
+    if not profile:
+        raise NotFoundError("Perfil não encontrado ou expirado")
+
+    return Response(
+        content=profile["folded"],
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="profile-{id}.folded"'},
+    )
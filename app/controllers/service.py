@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, Body, Path
+from fastapi import APIRouter, Depends, Query, Body, Path, Header
 from typing import List, Optional
 from uuid import UUID
 
@@ -11,6 +11,8 @@ from app.schemas.service import (
 )
 from app.schemas.http_response import HttpResponse
 from app.schemas.http_response_advice import ok, created, updated, deleted, error
+from app.core.utils.mongo import parse_fields
+from app.core.manifest_store import detail_not_modified, detail_response
 from app.core.security import require_permissions, get_current_user, validate_and_alter_contractor
 
 router = APIRouter(prefix="/services", tags=["Services"])
@@ -42,12 +44,27 @@ def get_all(
     response_model=ServiceOutDetail,
     dependencies=[Depends(require_permissions(["*", "hcdg6svc2"]))],
 )
-def get_by_id(id: str):
+def get_by_id(
+    id: str,
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: name,url)"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Retorna os detalhes de um serviço pelo ID.
     """
+    selected = parse_fields(ServiceOutDetail, fields)
+
+    # projeção de _id + versão: 304 sem ler o documento
+    state = ServiceService.version_state(id)
+    response = detail_not_modified(state, if_none_match)
+    if response:
+        return response
+
+    if selected:
+        return detail_response(ServiceService.get_fields(id, selected), state)
+
     service = ServiceService.get_by_id(id)
-    return service
+    return detail_response(service, state, service.doc_version or 0)
 
 
 @router.post(
@@ -73,11 +90,11 @@ def create(
     response_model=HttpResponse[ServiceOutDetail],
     dependencies=[Depends(require_permissions(["*", "hcdg7svc4"]))],
 )
-def update(id: str, payload: ServiceUpdate):
+def update(id: str, payload: ServiceUpdate, if_match: Optional[str] = Header(None)):
     """
     Atualiza um serviço existente.
     """
-    data = ServiceService.update(id, payload)
+    data = ServiceService.update(id, payload, if_match)
     return updated(data=data)
 
 
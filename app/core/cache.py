@@ -25,6 +25,11 @@ _pool = BlockingConnectionPool.from_url(
 _redis = Redis(connection_pool=_pool)
 
 
+def get_redis() -> Redis:
+    """Client Redis compartilhado (mesmo pool do cache)."""
+    return _redis
+
+
 def cache_get_json(key: str, model_cls: Optional[Type[BaseModel]] = None) -> Optional[Any]:
     try:
         raw = _redis.get(key)
@@ -37,7 +42,7 @@ def cache_get_json(key: str, model_cls: Optional[Type[BaseModel]] = None) -> Opt
             return model_cls(**data)
         return data
     except Exception as e:
-        error(f"[CACHE ERROR] Falha ao recuperar {key}: {e}")
+        error("[CACHE ERROR] Falha ao recuperar %s: %s", key, e, event="cache")
         return None
 
 
@@ -49,14 +54,14 @@ def cache_set_json(key: str, value: Any, ttl_seconds: int = 0) -> None:
         else:
             _redis.set(key, payload)
     except Exception as e:
-        error(f"[CACHE ERROR] Falha ao salvar {key}: {e}")
+        error("[CACHE ERROR] Falha ao salvar %s: %s", key, e, event="cache")
 
 
 def cache_delete(key: str) -> None:
     try:
         _redis.delete(key)
     except Exception as e:
-        error(f"[CACHE ERROR] Falha ao deletar {key}: {e}")
+        error("[CACHE ERROR] Falha ao deletar %s: %s", key, e, event="cache")
 
 
 def cache_ping() -> bool:
@@ -65,8 +70,32 @@ def cache_ping() -> bool:
     except Exception:
         return False
 
+def cache_warm(min_connections: int = 1) -> None:
+    """Abre `min_connections` conexões do pool e as devolve prontas para uso."""
+    conns = []
+    try:
+        for _ in range(min(min_connections, _pool.max_connections)):
+            conn = _pool.get_connection("PING")
+            conn.send_command("PING")
+            conn.read_response()
+            conns.append(conn)
+    finally:
+        for conn in conns:
+            _pool.release(conn)
+
+
+def pool_stats() -> dict:
+    """Conexões em uso no pool (a fila do BlockingConnectionPool guarda as livres e as ainda não criadas)."""
+    return {"in_use": _pool.max_connections - _pool.pool.qsize(), "max": _pool.max_connections}
+
+
+def cache_close() -> None:
+    """Fecha todas as conexões do pool (usado no shutdown)."""
+    _pool.disconnect()
+
+
 def cache_delete_prefix(prefix: str):
     keys = _redis.keys(f"{prefix}*")
     if keys:
         _redis.delete(*keys)
-        debug(f"[CACHE DELETE PREFIX] {prefix} ({len(keys)} keys)")
+        debug("[CACHE DELETE PREFIX] %s (%d keys)", prefix, len(keys), event="cache")
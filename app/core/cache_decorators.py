@@ -2,6 +2,7 @@ import functools
 import inspect
 from typing import Callable, Any, List, Optional
 from app.core.cache import cache_get_json, cache_set_json, cache_delete, cache_delete_prefix
+from app.core import entity_version, invalidation, metrics
 from app.core.logger_config import debug, error
 
 
@@ -37,8 +38,10 @@ def cacheable(
             # consulta cache
             cached = cache_get_json(cache_key)
             if cached is not None:
-                debug(f"[CACHE HIT] {cache_key}")
+                metrics.cache_result(prefix, True)
+                debug("[CACHE HIT] %s", cache_key, event="cache")
                 return cached
+            metrics.cache_result(prefix, False)
 
             # executa método real
             result = func(*args, **kwargs)
@@ -52,9 +55,9 @@ def cacheable(
                     value = result
 
                 cache_set_json(cache_key, value, ttl_seconds)
-                debug(f"[CACHE SET] {cache_key} (ttl={ttl_seconds})")
+                debug("[CACHE SET] %s (ttl=%s)", cache_key, ttl_seconds, event="cache")
             except Exception as e:
-                error(f"[Cacheable] Falha ao salvar cache ({cache_key}): {e}")
+                error("[Cacheable] Falha ao salvar cache (%s): %s", cache_key, e, event="cache")
 
             return result
         return wrapper
@@ -83,8 +86,42 @@ def cache_evict(keys: list[str], key_params: list[str] = None, match_prefix: boo
                 else:
                     cache_delete(cache_key)
 
-                debug(f"[CACHE DELETE] {cache_key} (prefix={match_prefix})")
+                debug("[CACHE DELETE] %s (prefix=%s)", cache_key, match_prefix, event="cache")
 
             return result
         return wrapper
     return decorator
+
+
+def version_bump(kind: str, key_param: str = "id"):
+    """Troca a versão da entidade (ver app.core.entity_version) depois da escrita."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+
+            sig = inspect.signature(func)
+            bound = sig.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+
+            entity_version.bump(kind, bound.arguments[key_param])
+            return result
+        return wrapper
+    return decorator
+
+
+def evict_dependents(kind: str, key_param: str = "id"):
+    """Apaga os caches dos documentos que dependem da entidade (ver app.core.invalidation)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+
+            sig = inspect.signature(func)
+            bound = sig.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+
+            invalidation.evict_dependents(kind, bound.arguments[key_param])
+            return result
+        return wrapper
+    return decorator
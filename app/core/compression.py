@@ -0,0 +1,210 @@
+"""
+Compressão das respostas HTTP (zstd, brotli ou gzip, conforme o Accept-Encoding).
+
+- CompressionMiddleware comprime respostas acima de COMPRESSION_MIN_SIZE bytes com
+  content-type textual. Respostas em streaming (mais de uma parte no corpo, ex.: NDJSON do
+  bulk de OCPs) passam sem compressão para não perder o envio incremental; rotas podem
+  ficar de fora por prefixo (COMPRESSION_EXCLUDE_PATHS) ou respondendo com Content-Encoding.
+- `precompressed(etag, encoding, render)` guarda em memória as variantes já comprimidas de
+  documentos versionados (manifestos, bundle de execução): o ETag é o hash do conteúdo,
+  então cada variante é comprimida uma única vez, com nível mais alto.
+
+zstd e brotli são opcionais (pacotes `zstandard` e `brotli`); sem eles, só gzip.
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core import timing
+
+load_dotenv()
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+# ordem = preferência do servidor quando o cliente aceita mais de uma
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+COMPRESSION_EXCLUDE_PATHS = [p.strip() for p in os.getenv("COMPRESSION_EXCLUDE_PATHS", "").split(",") if p.strip()]
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", 256))
+# corpos maiores que isso são comprimidos no threadpool, fora do event loop
+COMPRESSION_THREAD_THRESHOLD = int(os.getenv("COMPRESSION_THREAD_THRESHOLD", 64 * 1024))
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "application/xml")
+
+
+# ========= Codificadores =========
+
+# nível por requisição (rápido) e nível das variantes pré-comprimidas (uma vez por ETag)
+_LEVELS = {"zstd": (3, 19), "br": (4, 11), "gzip": (6, 9)}
+
+
+def _load_encoders() -> Dict[str, Callable[[bytes, int], bytes]]:
+    available: Dict[str, Callable[[bytes, int], bytes]] = {}
+    for name in [e.strip() for e in COMPRESSION_ENCODINGS.split(",") if e.strip()]:
+        if name == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                continue
+            available[name] = lambda body, level: zstandard.ZstdCompressor(level=level).compress(body)
+        elif name == "br":
+            try:
+                import brotli
+            except ImportError:
+                continue
+            available[name] = lambda body, level: brotli.compress(body, quality=level)
+        elif name == "gzip":
+            available[name] = lambda body, level: gzip.compress(body, compresslevel=level, mtime=0)
+    return available
+
+
+ENCODERS = _load_encoders()
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Escolhe a codificação (na ordem de preferência do servidor) aceita pelo cliente."""
+    if not accept_encoding or not ENCODERS:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for name in ENCODERS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > 0:
+            return name
+    return None
+
+
+def compress(encoding: str, body: bytes, static: bool = False) -> bytes:
+    dynamic_level, static_level = _LEVELS[encoding]
+    return ENCODERS[encoding](body, static_level if static else dynamic_level)
+
+
+# ========= Variantes pré-comprimidas =========
+
+class _VariantCache:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str], value: bytes) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_variants = _VariantCache(COMPRESSION_CACHE_SIZE)
+
+
+def precompressed(etag: str, encoding: Optional[str], render: Callable[[], bytes]) -> bytes:
+    """Corpo do documento versionado `etag` na codificação pedida (None = sem compressão)."""
+    key = (etag, encoding or "identity")
+    body = _variants.get(key)
+    if body is not None:
+        return body
+
+    raw = _variants.get((etag, "identity"))
+    if raw is None:
+        raw = render()
+        _variants.put((etag, "identity"), raw)
+    if encoding is None:
+        return raw
+
+    body = compress(encoding, raw, static=True)
+    _variants.put(key, body)
+    return body
+
+
+# ========= Middleware =========
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not COMPRESSION_ENABLED
+            or any(scope["path"].startswith(p) for p in COMPRESSION_EXCLUDE_PATHS)
+        ):
+            return await self.app(scope, receive, send)
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start: Optional[dict] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            # primeira parte do corpo: decide entre comprimir ou repassar
+            pending, start = start, None
+            headers = MutableHeaders(raw=list(pending.get("headers", [])))
+            body = message.get("body", b"")
+
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not _compressible(headers.get("content-type", ""))
+            ):
+                passthrough = True
+                await send(pending)
+                await send(message)
+                return
+
+            with timing.stage("compress"):
+                if len(body) > COMPRESSION_THREAD_THRESHOLD:
+                    body = await run_in_threadpool(compress, encoding, body)
+                else:
+                    body = compress(encoding, body)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send({**pending, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,128 @@
+"""
+Versão por documento no Mongo (campo `doc_version`), para GET condicional e PUT otimista.
+
+Toda escrita nos documentos com detalhe versionado grava `doc_version: 1` no insert e
+`$inc: {doc_version: 1}` nas alterações. O ETag do detalhe sai de uma projeção de
+`_id` + versão — sem rodar a consulta/agregação do detalhe — e, para detalhes que
+resolvem nomes de outras entidades (agente, assistente), também das versões dessas
+entidades no Redis (app.core.entity_version).
+
+Formato: W/"v<versão>" ou W/"v<versão>-<hash das dependências>". O If-Match do PUT é
+comparado só pela versão do próprio documento.
+"""
+import hashlib
+import re
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from bson import ObjectId
+
+from app.core import entity_version
+from app.core.entity_version import Ref
+from app.core.exceptions.types import NotFoundError, PreconditionFailedError
+
+VERSION_FIELD = "doc_version"
+
+_VERSION_TAG = re.compile(r'^(?:W/)?"v(\d+)(?:-[0-9a-f]+)?"$')
+
+
+def stamp(doc: dict) -> dict:
+    """Versão inicial de um documento novo."""
+    doc[VERSION_FIELD] = 1
+    return doc
+
+
+def bump(update: dict) -> dict:
+    """Acrescenta o incremento de versão a um update (`{"$set": ...}`)."""
+    update.setdefault("$inc", {})[VERSION_FIELD] = 1
+    return update
+
+
+def version_of(doc: dict) -> int:
+    # documentos anteriores ao versionamento não têm o campo
+    return int(doc.get(VERSION_FIELD) or 0)
+
+
+def make_etag(version: int, deps: Optional[Sequence[str]] = None) -> str:
+    tag = f"v{version}"
+    if deps:
+        tag += "-" + hashlib.sha256("|".join(deps).encode()).hexdigest()[:12]
+    return f'W/"{tag}"'
+
+
+class VersionState:
+    """Versão do documento e das dependências, lidas antes da consulta do detalhe."""
+
+    def __init__(self, version: Optional[int], deps: Optional[List[str]]):
+        self.version = version
+        self.deps = deps
+
+    def etag(self, version: Optional[int] = None) -> Optional[str]:
+        """
+        ETag para a versão lida na projeção ou, na resposta 200, para a versão do documento
+        efetivamente retornado (que pode ser mais nova que a da projeção).
+        Sem documento ou sem as versões das dependências não há ETag confiável.
+        """
+        version = self.version if version is None else version
+        if version is None or self.deps is None:
+            return None
+        return make_etag(version, self.deps)
+
+
+def state(
+    collection,
+    id: str,
+    refs: Optional[Callable[[dict], Iterable[Ref]]] = None,
+    fields: Sequence[str] = (),
+) -> VersionState:
+    """Projeção de `_id` + versão (+ `fields`, de onde `refs` extrai as dependências)."""
+    if not ObjectId.is_valid(str(id)):
+        return VersionState(None, [])
+
+    doc = collection.find_one({"_id": ObjectId(str(id))}, {VERSION_FIELD: 1, **{f: 1 for f in fields}})
+    if not doc:
+        return VersionState(None, [])
+
+    deps: Optional[List[str]] = []
+    if refs is not None:
+        deps = entity_version.current(entity_version.normalize(refs(doc)))
+    return VersionState(version_of(doc), deps)
+
+
+def _if_match_ok(if_match: str, version: int) -> bool:
+    if if_match.strip() == "*":
+        return True
+    for tag in if_match.split(","):
+        match = _VERSION_TAG.match(tag.strip())
+        if match and int(match.group(1)) == version:
+            return True
+    return False
+
+
+def check(doc: dict, if_match: Optional[str]) -> None:
+    """412 se o If-Match informado não corresponde à versão do documento."""
+    if if_match and not _if_match_ok(if_match, version_of(doc)):
+        raise PreconditionFailedError()
+
+
+def unchanged(doc: dict) -> dict:
+    """Filtro que só casa enquanto o documento estiver na versão lida."""
+    version = version_of(doc)
+    # versão 0 = campo ausente
+    return {VERSION_FIELD: version if version else None}
+
+
+def expect(collection, oid: ObjectId, if_match: Optional[str]) -> dict:
+    """
+    Filtro extra do update otimista: sem If-Match, nenhum; com If-Match, exige que a versão
+    atual seja a informada (412 se não for) e devolve o filtro que garante que ela não mudou
+    até o update ser aplicado.
+    """
+    if not if_match:
+        return {}
+
+    doc = collection.find_one({"_id": oid}, {VERSION_FIELD: 1})
+    if not doc:
+        raise NotFoundError()
+
+    check(doc, if_match)
+    return unchanged(doc)
@@ -0,0 +1,60 @@
+"""
+Versão por entidade no Redis, para caches de documentos compostos.
+
+Cada escrita troca a versão da entidade (`entity_version:<tipo>:<id>`) por um token novo.
+Um documento montado a partir de várias entidades guarda o vetor de versões usado na
+montagem; na leitura, um único MGET diz se alguma delas mudou — sem precisar saber,
+na escrita, quais documentos compostos dependem da entidade alterada.
+"""
+import os
+import secrets
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from app.core.cache import get_redis
+from app.core.logger_config import debug, error
+
+load_dotenv()
+
+# precisa ser maior que o TTL de qualquer cache que dependa das versões
+ENTITY_VERSION_TTL_SECONDS = int(os.getenv("ENTITY_VERSION_TTL_SECONDS", 7 * 86400))
+
+Ref = Tuple[str, str]  # (tipo, id)
+
+_UNKNOWN = "0"
+
+
+def _key(kind: str, id: str) -> str:
+    return f"entity_version:{kind}:{id}"
+
+
+def bump(kind: str, *ids: str) -> None:
+    """Marca as entidades como alteradas (chamado após a escrita no Mongo)."""
+    if not ids:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for id in ids:
+            pipe.set(_key(kind, str(id)), secrets.token_hex(8), ex=ENTITY_VERSION_TTL_SECONDS)
+        pipe.execute()
+        debug("[ENTITY VERSION] %s: %s", kind, ids, event="cache")
+    except Exception as e:
+        error("[ENTITY VERSION] Falha ao versionar %s %s: %s", kind, ids, e)
+
+
+def current(refs: Sequence[Ref]) -> Optional[List[str]]:
+    """Versões atuais das entidades (mesma ordem de `refs`); None se o Redis falhar."""
+    if not refs:
+        return []
+    try:
+        values = get_redis().mget([_key(kind, id) for kind, id in refs])
+        return [v or _UNKNOWN for v in values]
+    except Exception as e:
+        error("[ENTITY VERSION] Falha ao ler versões: %s", e)
+        return None
+
+
+def normalize(refs: Iterable[Ref]) -> List[Ref]:
+    """Remove duplicados e ordena, para o vetor de versões ser determinístico."""
+    return sorted({(kind, str(id)) for kind, id in refs if id})
@@ -26,3 +26,7 @@ class ForbiddenError(DomainError):
 class BusinessDomainError(DomainError):
     def __init__(self, detail: str):
         super().__init__(detail, status.HTTP_400_BAD_REQUEST)
+
+class PreconditionFailedError(DomainError):
+    def __init__(self, detail: str = "O registro foi alterado por outra requisição. Recarregue e tente novamente."):
+        super().__init__(detail, status.HTTP_412_PRECONDITION_FAILED)
@@ -0,0 +1,72 @@
+"""
+Relatório do tempo de import da aplicação (baseado em `python -X importtime`).
+
+Uso:
+    python -m app.core.import_profile             # top 25 por tempo acumulado
+    python -m app.core.import_profile --top 50 --module main
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(.+)$")
+
+
+def profile_imports(module: str = "main") -> List[Tuple[str, int, int, int]]:
+    """
+    Importa `module` em um processo novo e retorna (nome, self_us, cumulativo_us, profundidade)
+    para cada módulo importado.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        rows.append((name.strip(), int(self_us), int(cumulative_us), len(indent) // 2))
+
+    if result.returncode != 0 and not rows:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "falha no import")
+
+    return rows
+
+
+def report(module: str = "main", top: int = 25) -> str:
+    rows = profile_imports(module)
+    total_us = sum(r[1] for r in rows)
+
+    # pacotes de primeiro nível (agrupa submódulos: boto3.*, sqlalchemy.* ...)
+    packages = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+
+    lines = [f"Import de '{module}': {total_us / 1000:.1f}ms em {len(rows)} módulos", ""]
+
+    lines.append(f"Top {top} pacotes (soma do tempo próprio):")
+    for root, us in sorted(packages.items(), key=lambda x: x[1], reverse=True)[:top]:
+        lines.append(f"  {us / 1000:9.1f}ms  {root}")
+
+    lines.append("")
+    lines.append(f"Top {top} módulos (tempo acumulado):")
+    for name, _, cumulative_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"  {cumulative_us / 1000:9.1f}ms  {name}")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório de tempo de import.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    print(report(args.module, args.top))
@@ -0,0 +1,115 @@
+"""
+Invalidação dirigida pelo índice reverso de referências (app.dataprovider.mongo.models.reference).
+
+Quando uma entidade muda, apaga só os caches dos documentos compostos que dependem
+dela (direta ou indiretamente), em vez de limpar um prefixo inteiro:
+- OCP-M que usa um service        -> manifesto, schema e tools daquele OCP-M
+- assistente que usa o agente/OCP -> bundle de execução daquele assistente
+
+`evict_entity` cobre também os caches da própria entidade; é o caminho usado pelo
+watcher de change streams (app.services.change_stream) para escritas feitas fora desta API.
+"""
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+from app.dataprovider.mongo.models import reference
+from app.dataprovider.mongo.models.reference import Ref
+from app.core.cache import cache_delete, cache_delete_prefix, get_redis
+from app.core import entity_version
+from app.core.logger_config import debug, error
+from app.services.assistant_runtime import bundle_key
+
+load_dotenv()
+
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+
+
+def _ocpm_keys(id: str) -> List[str]:
+    return [f"ocpm_manifest:id={id}", f"ocpm_manifest:schema:id={id}", f"ocpm_manifest:tools:id={id}"]
+
+
+def _assistant_keys(id: str) -> List[str]:
+    return [bundle_key(id)]
+
+
+# tipo do dependente -> chaves de cache montadas a partir dele
+_KEYS_BY_KIND = {
+    "ocp-m": _ocpm_keys,
+    "assistant": _assistant_keys,
+}
+
+
+def keys_for(refs: Iterable[Ref]) -> List[str]:
+    keys = []
+    for kind, id in refs:
+        build = _KEYS_BY_KIND.get(kind)
+        if build:
+            keys.extend(build(id))
+    return keys
+
+
+def evict_dependents(kind: str, id: str) -> None:
+    """Apaga os caches de tudo que depende de `kind:id`."""
+    try:
+        refs = reference.transitive_dependents(kind, str(id))
+    except Exception as e:
+        error("[INVALIDATION] Falha ao consultar dependentes de %s:%s: %s", kind, id, e)
+        return
+
+    keys = keys_for(refs)
+    for key in keys:
+        cache_delete(key)
+
+    if keys:
+        debug("[INVALIDATION] %s:%s -> %d chave(s) de %d dependente(s)", kind, id, len(keys), len(refs), event="cache")
+
+
+# ========= Caches da própria entidade =========
+
+# tipo -> (chaves exatas, prefixos) dos caches montados a partir da entidade
+_ENTITY_KEYS: Dict[str, Callable[[str], Tuple[List[str], List[str]]]] = {
+    # tag_type não está disponível em um delete: limpa todas as listagens
+    "tag": lambda id: ([f"tags:id={id}"], ["tags:all"]),
+    "credential_type": lambda id: ([f"credentials_types:id={id}"], ["credentials_types:all"]),
+    "ocp-m": lambda id: (_ocpm_keys(id), ["ocpm_manifest:registry"]),
+}
+
+# entidades que participam de vetores de versão (app.core.entity_version)
+_VERSIONED = {"assistant", "agent", "ocp", "credential", "credential_type", "tag"}
+
+
+def evict_entity(kind: str, id: str) -> None:
+    """Apaga os caches da entidade e dos seus dependentes, e troca a versão dela."""
+    keys, prefixes = _ENTITY_KEYS.get(kind, lambda _: ([], []))(id)
+    for key in keys:
+        cache_delete(key)
+    for prefix in prefixes:
+        try:
+            cache_delete_prefix(prefix)
+        except Exception as e:
+            error("[INVALIDATION] Falha ao limpar prefixo %s: %s", prefix, e)
+
+    if kind in _VERSIONED:
+        entity_version.bump(kind, id)
+
+    evict_dependents(kind, id)
+
+
+def evict_all() -> None:
+    """Limpa todos os caches derivados de entidades (ex.: histórico do change stream perdido)."""
+    for prefix in ("tags", "credentials_types", "ocpm_manifest", "runtime_bundle"):
+        try:
+            cache_delete_prefix(prefix)
+        except Exception as e:
+            error("[INVALIDATION] Falha ao limpar prefixo %s: %s", prefix, e)
+
+
+def publish(kind: str, id: str, op: str) -> None:
+    """Publica o evento no canal INVALIDATION_CHANNEL, para quem mantém caches em memória."""
+    try:
+        get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"kind": kind, "id": id, "op": op}))
+    except Exception as e:
+        error("[INVALIDATION] Falha ao publicar %s:%s: %s", kind, id, e)
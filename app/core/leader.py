@@ -0,0 +1,59 @@
+"""
+Eleição de líder via Redis (SET NX PX + renovação atômica por token).
+
+Usado por tarefas em background que devem rodar em um único worker do cluster.
+Se o líder morrer, a chave expira após `ttl_seconds` e outro worker assume.
+"""
+import secrets
+import socket
+import os
+
+from app.core.cache import get_redis
+from app.core.logger_config import debug, error
+
+# Renova/solta a chave somente se ela ainda pertence a este worker
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    def __init__(self, name: str, ttl_seconds: int):
+        self.key = f"leader:{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(8)}"
+
+    def acquire(self) -> bool:
+        """Torna-se líder se ninguém for, ou renova a liderança se já for."""
+        try:
+            redis = get_redis()
+            if redis.set(self.key, self.token, nx=True, px=self.ttl_ms):
+                debug("[LEADER] %s adquirido por %s", self.key, self.token)
+                return True
+            return bool(redis.eval(_RENEW, 1, self.key, self.token, self.ttl_ms))
+        except Exception as e:
+            error("[LEADER] Falha ao disputar %s: %s", self.key, e)
+            return False
+
+    def renew(self) -> bool:
+        try:
+            return bool(get_redis().eval(_RENEW, 1, self.key, self.token, self.ttl_ms))
+        except Exception as e:
+            error("[LEADER] Falha ao renovar %s: %s", self.key, e)
+            return False
+
+    def release(self) -> None:
+        try:
+            get_redis().eval(_RELEASE, 1, self.key, self.token)
+        except Exception as e:
+            error("[LEADER] Falha ao liberar %s: %s", self.key, e)
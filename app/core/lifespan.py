@@ -0,0 +1,152 @@
+import asyncio
+import os
+import signal
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+
+from app.core.logger_config import info, error, shutdown as shutdown_logging
+from app.core.resources import registry
+
+load_dotenv()
+
+# blocking   -> aguarda o aquecimento dos pools antes de aceitar conexões
+# background -> aceita conexões imediatamente e aquece os pools em paralelo
+# off        -> pools abertos sob demanda na primeira requisição
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+# cria os índices faltantes do registro na subida (nunca remove); os únicos sustentam os
+# DuplicateKeyError -> DuplicateKeyDomainError dos services
+MONGO_SYNC_INDEXES_ON_STARTUP = os.getenv("MONGO_SYNC_INDEXES_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+
+# Tempo entre o SIGTERM e o início do shutdown do servidor: a readiness já responde 503
+# e o balanceador tem tempo de parar de enviar tráfego para esta instância.
+SHUTDOWN_DRAIN_DELAY_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_DELAY_SECONDS", 5))
+# Tempo máximo aguardando as requisições em andamento antes de fechar os pools.
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", 25))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 5))
+
+
+# ========= Estado de drenagem =========
+
+class DrainState:
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+
+    def snapshot(self) -> dict:
+        return {"draining": self.draining, "in_flight": self.in_flight}
+
+
+drain_state = DrainState()
+
+
+class InFlightMiddleware:
+    """Conta as requisições HTTP em andamento para o shutdown aguardar a drenagem."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        drain_state.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            drain_state.in_flight -= 1
+
+
+def _install_sigterm_handler(loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Encadeia o handler de SIGTERM do servidor (uvicorn): primeiro marca a instância
+    como drenando (readiness 503), e só após SHUTDOWN_DRAIN_DELAY_SECONDS repassa
+    o sinal para o servidor parar de aceitar conexões.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+
+    def _handler(signum, frame):
+        if drain_state.draining:
+            # segundo SIGTERM: encerra sem esperar
+            previous(signum, frame)
+            return
+        drain_state.draining = True
+        info("[SHUTDOWN] SIGTERM recebido; drenando por %.0fs", SHUTDOWN_DRAIN_DELAY_SECONDS)
+        loop.call_soon_threadsafe(loop.call_later, SHUTDOWN_DRAIN_DELAY_SECONDS, previous, signum, frame)
+
+    try:
+        signal.signal(signal.SIGTERM, _handler)
+    except ValueError:
+        # fora da main thread (ex.: alguns test clients) não é possível instalar handlers
+        pass
+
+
+async def _wait_in_flight() -> None:
+    deadline = time.monotonic() + SHUTDOWN_DRAIN_TIMEOUT_SECONDS
+    while drain_state.in_flight > 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    if drain_state.in_flight > 0:
+        error("[SHUTDOWN] %d requisições ainda em andamento ao fechar os pools", drain_state.in_flight)
+
+
+async def _warm_until_ready() -> None:
+    """Aquece os recursos e tenta novamente os que falharam até todos ficarem prontos."""
+    await registry.warm_all()
+    while not registry.is_ready() and not drain_state.draining:
+        await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        await registry.warm_all()
+
+
+def is_ready() -> bool:
+    if drain_state.draining:
+        return False
+    # sem aquecimento os pools abrem sob demanda; a instância já pode receber tráfego
+    return STARTUP_WARMUP == "off" or registry.is_ready()
+
+
+# ========= Lifespan =========
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _install_sigterm_handler(asyncio.get_running_loop())
+
+    if MONGO_SYNC_INDEXES_ON_STARTUP:
+        from app.dataprovider.mongo.indexes import sync_indexes
+        await asyncio.to_thread(sync_indexes, True, False)
+
+    warm_task = None
+    if STARTUP_WARMUP == "blocking":
+        await registry.warm_all()
+        if not registry.is_ready():
+            warm_task = asyncio.create_task(_warm_until_ready())
+    elif STARTUP_WARMUP == "background":
+        warm_task = asyncio.create_task(_warm_until_ready())
+
+    refresh_task = None
+    from app.services.ocp_refresh import OCP_REFRESH_INTERVAL_SECONDS, run_scheduler
+    if OCP_REFRESH_INTERVAL_SECONDS > 0:
+        refresh_task = asyncio.create_task(run_scheduler())
+
+    watcher_task = None
+    from app.services.change_stream import CHANGE_STREAM_ENABLED, run_watcher
+    if CHANGE_STREAM_ENABLED:
+        watcher_task = asyncio.create_task(run_watcher())
+
+    yield
+
+    drain_state.draining = True
+    if warm_task and not warm_task.done():
+        warm_task.cancel()
+    if refresh_task:
+        refresh_task.cancel()
+    if watcher_task:
+        watcher_task.cancel()
+
+    await _wait_in_flight()
+    await registry.close_all()
+    info("[SHUTDOWN] Pools fechados")
+    shutdown_logging()
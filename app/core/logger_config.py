@@ -1,22 +1,212 @@
+"""
+Logs da aplicação: `info`, `debug` e `error` enfileiram o registro e uma thread de escrita
+formata e grava no stdout, sem bloquear a thread da requisição.
+
+- Formatação preguiçosa: `debug("[CACHE HIT] %s", key)` só monta a mensagem na thread
+  de escrita, e nada é feito se o nível estiver desligado para o módulo.
+- Campos estruturados: `error("Falha", key=key)` vira campo no JSON.
+- Nível por módulo: LOG_LEVELS="app.core.cache=ERROR,app.services.change_stream=DEBUG"
+  (o logger é o `__name__` de quem chamou).
+- Eventos frequentes (`event="cache"`, `event="sql"`): amostragem (LOG_SAMPLE) e limite
+  por segundo (LOG_EVENT_MAX_PER_SECOND); o número de descartados sai no próximo registro.
+- Fila cheia: o registro é descartado e contado, nunca espera.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
 import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
 from dotenv import load_dotenv
-from datetime import datetime
 
 # --- Carregar variáveis ---
 load_dotenv()
 DEBUG = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "ERROR").upper()
+# nível por módulo (prefixo do __name__), ex.: "app.core.cache=ERROR,app.services=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# fração registrada por evento, ex.: "cache=0.1,sql=0.01" (padrão 1 = todos)
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")
+LOG_EVENT_MAX_PER_SECOND = int(os.getenv("LOG_EVENT_MAX_PER_SECOND", 100))
+
+ROOT_LOGGER = "app"
+
+
+def _parse_map(raw: str) -> Dict[str, str]:
+    result = {}
+    for part in raw.split(","):
+        name, sep, value = part.partition("=")
+        if sep and name.strip() and value.strip():
+            result[name.strip()] = value.strip()
+    return result
+
+
+# ========= Formatação (thread de escrita) =========
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        ts = datetime.fromtimestamp(record.created).isoformat()
+        line = f"[{record.levelname} {ts}] {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+# ========= Fila =========
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enfileira o registro sem formatar e sem esperar (fila cheia = descarte)."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # a mensagem é montada pelo formatter, na thread de escrita
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ========= Amostragem e limite por evento =========
+
+class _EventThrottle:
+
+    def __init__(self, rates: Dict[str, float], max_per_second: int):
+        self.rates = rates
+        self.max_per_second = max_per_second
+        self._windows: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, event: str) -> tuple:
+        """(registrar?, descartados desde o último registro do evento)."""
+        rate = self.rates.get(event, 1.0)
+        sampled_out = rate < 1.0 and random.random() >= rate
+
+        now = int(time.monotonic())
+        with self._lock:
+            window = self._windows.setdefault(event, [now, 0, 0])  # [segundo, registrados, descartados]
+            if window[0] != now:
+                window[0], window[1] = now, 0
+            if sampled_out or (self.max_per_second and window[1] >= self.max_per_second):
+                window[2] += 1
+                return False, 0
+            window[1] += 1
+            dropped, window[2] = window[2], 0
+            return True, dropped
+
+
+# ========= Configuração =========
+
+def _configure():
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+    for name, level in _parse_map(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _QueueHandler(log_queue)
+    root.handlers = [handler]
+
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    listener = logging.handlers.QueueListener(log_queue, writer)
+    listener.start()
+    return handler, listener
+
+
+_handler, _listener = _configure()
+_throttle = _EventThrottle(
+    {name: float(rate) for name, rate in _parse_map(LOG_SAMPLE).items()}, LOG_EVENT_MAX_PER_SECOND
+)
+_loggers: Dict[str, logging.Logger] = {}
+
+
+def _logger(module: str) -> logging.Logger:
+    logger = _loggers.get(module)
+    if logger is None:
+        # módulos fora de app.* (ex.: main) ficam sob o logger raiz da aplicação
+        name = module if module == ROOT_LOGGER or module.startswith(ROOT_LOGGER + ".") else f"{ROOT_LOGGER}.{module}"
+        logger = _loggers.setdefault(module, logging.getLogger(name))
+    return logger
+
+
+def _log(level: int, msg: str, args: tuple, fields: Dict[str, Any]) -> None:
+    logger = _logger(sys._getframe(2).f_globals.get("__name__", ROOT_LOGGER))
+    if not logger.isEnabledFor(level):
+        return
+
+    event = fields.get("event")
+    if event is not None:
+        allowed, dropped = _throttle.allow(event)
+        if not allowed:
+            return
+        if dropped:
+            fields["suppressed"] = dropped
+
+    exc_info = fields.pop("exc_info", None)
+    logger.log(level, msg, *args, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+
+def info(msg: str, *args, **fields):
+    """Registra mensagem de info (argumentos formatados só na escrita, estilo %)."""
+    _log(logging.INFO, msg, args, fields)
+
+
+def debug(msg: str, *args, **fields):
+    """Registra mensagem de debug (argumentos formatados só na escrita, estilo %)."""
+    _log(logging.DEBUG, msg, args, fields)
+
+
+def error(msg: str, *args, **fields):
+    """Registra mensagem de erro (argumentos formatados só na escrita, estilo %)."""
+    _log(logging.ERROR, msg, args, fields)
+
+
+def dropped_count() -> int:
+    """Registros descartados por fila cheia desde o início do processo."""
+    return _handler.dropped
+
 
-def info(msg: str):
-    """Imprime mensagem de info se DEBUG estiver ativo."""
-    if DEBUG:
-        print(f"[INFO {datetime.now().isoformat()}] {msg}")
+def shutdown() -> None:
+    """Esvazia a fila e para a thread de escrita."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-def debug(msg: str):
-    """Imprime mensagem de debug se DEBUG estiver ativo."""
-    if DEBUG:
-        print(f"[DEBUG {datetime.now().isoformat()}] {msg}")
 
-def error(msg: str):
-    """Imprime mensagem de error se DEBUG estiver ativo."""
-    if DEBUG:
-        print(f"[ERROR {datetime.now().isoformat()}] {msg}")
\ No newline at end of file
+atexit.register(shutdown)
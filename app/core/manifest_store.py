@@ -0,0 +1,101 @@
+"""
+Armazena documentos gerados (manifestos) no Redis junto com o hash do conteúdo.
+
+O documento é montado uma única vez e reaproveitado até ser invalidado (cache_evict
+nas escritas). O hash vira o ETag da resposta: clientes que fazem polling enviam
+If-None-Match e recebem 304 sem corpo enquanto nada mudar.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.responses import Response
+
+from app.core.cache import cache_get_json, cache_set_json
+from app.core.compression import negotiate, precompressed
+from app.core.doc_version import VersionState
+from app.core.logger_config import debug
+from app.schemas.http_response_advice import ok, FastJSONResponse
+
+load_dotenv()
+
+MANIFEST_TTL_SECONDS = int(os.getenv("MANIFEST_TTL_SECONDS", 3600))
+MANIFEST_MAX_AGE_SECONDS = int(os.getenv("MANIFEST_MAX_AGE_SECONDS", 0))
+
+
+def compute_etag(data: Any) -> str:
+    # mesma normalização do cache_set_json, para o ETag não mudar após ida e volta no Redis
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return f'W/"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def get_versioned(key: str, build: Callable[[], Any], ttl_seconds: int = MANIFEST_TTL_SECONDS) -> Tuple[Any, str]:
+    """Retorna (documento, etag), montando e salvando o documento se não estiver no cache."""
+    cached = cache_get_json(key)
+    if cached is not None:
+        debug("[MANIFEST HIT] %s", key, event="cache")
+        return cached["data"], cached["etag"]
+
+    data = build()
+    etag = compute_etag(data)
+    cache_set_json(key, {"etag": etag, "data": data}, ttl_seconds)
+    debug("[MANIFEST SET] %s %s", key, etag, event="cache")
+    return data, etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca (RFC 9110): ignora o prefixo W/ e aceita lista ou '*'."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def _opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return any(_opaque(tag) == _opaque(etag) for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str, max_age: int = MANIFEST_MAX_AGE_SECONDS) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}, must-revalidate",
+    }
+
+
+def not_modified(etag: str, max_age: int = MANIFEST_MAX_AGE_SECONDS) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, max_age))
+
+
+def detail_not_modified(state: VersionState, if_none_match: Optional[str]) -> Optional[Response]:
+    """304 do detalhe quando o If-None-Match casa com o ETag da projeção de _id + versão."""
+    etag = state.etag()
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified(etag, max_age=0)
+    return None
+
+
+def detail_response(content: Any, state: VersionState, version: Optional[int] = None) -> Response:
+    """
+    Resposta 200 do detalhe com o ETag de `version` (a do documento retornado);
+    sem `version`, vale a versão lida na projeção (ex.: resposta com `?fields=`).
+    """
+    etag = state.etag(version)
+    return FastJSONResponse(content=content, headers=cache_headers(etag, max_age=0) if etag else None)
+
+
+def versioned_response(data: Any, etag: str, accept_encoding: Optional[str]) -> Response:
+    """
+    Resposta `ok(data)` de um documento versionado, renderizada e comprimida uma vez por ETag
+    (ver app.core.compression.precompressed). O `date` do envelope é o da primeira renderização.
+    """
+    encoding = negotiate(accept_encoding)
+    body = precompressed(etag, encoding, lambda: ok(data=data).body)
+
+    headers = {**cache_headers(etag), "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,325 @@
+"""
+Métricas no formato texto do Prometheus (GET /metrics).
+
+Medidas na própria aplicação (contadores e histogramas em memória, por processo):
+- rotas: requisições por método/rota/status e latência (MetricsMiddleware; a rota é o
+  template, ex.: /agents/{id}, para não explodir a cardinalidade)
+- cache: hits e misses do `cacheable` por prefixo
+- upstreams: latência e status das chamadas HTTP de services e authenticators, por host
+- Postgres: latência das queries (listener no engine de app.dataprovider.postgre.session)
+
+Lidas na hora da coleta:
+- Mongo: latência por comando e espera no pool (listeners de app.dataprovider.mongo.monitoring)
+- pools: conexões em uso no Redis, no Postgres e no Mongo
+- threadpool do anyio (rotas síncronas): threads ocupadas e tarefas esperando
+- logs descartados por fila cheia
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from app.dataprovider.mongo.monitoring import Histogram
+from app.core.logger_config import error
+from app.core import timing
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+# GET /metrics exige "Authorization: Bearer <token>"; sem token configurado a rota recusa tudo
+# (as métricas expõem hosts de upstream, rotas e estado dos pools)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ========= Tipos =========
+
+class Counter:
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class HistogramVec:
+    """Um Histogram (buckets em ms) por combinação de labels; exposto em segundos."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._histograms: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float, *label_values: str) -> None:
+        hist = self._histograms.get(label_values)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(label_values, Histogram())
+        hist.observe(value_ms)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return render_histograms(self.name, self.help, self.labels, ((k, h.snapshot()) for k, h in items))
+
+
+def render_histograms(
+    name: str,
+    help: str,
+    labels: Tuple[str, ...],
+    snapshots: Iterable[Tuple[Tuple[str, ...], dict]],
+) -> List[str]:
+    """Converte snapshots de Histogram (buckets cumulativos em ms) para o formato do Prometheus."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for label_values, snap in snapshots:
+        for key, count in snap["buckets"].items():
+            le = "+Inf" if key == "le_inf" else _number(float(key[3:]) / 1000)
+            lines.append(f"{name}_bucket{_labels(labels + ('le',), label_values + (le,))} {count}")
+        lines.append(f"{name}_sum{_labels(labels, label_values)} {_number(snap['sum_ms'] / 1000)}")
+        lines.append(f"{name}_count{_labels(labels, label_values)} {snap['count']}")
+    return lines
+
+
+def render_gauge(
+    name: str,
+    help: str,
+    labels: Tuple[str, ...],
+    values: Dict[Tuple[str, ...], float],
+    type: str = "gauge",
+) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    for label_values, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(labels, label_values)} {_number(value)}")
+    return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# ========= Métricas da aplicação =========
+
+HTTP_REQUESTS = Counter("http_requests_total", "Requisições HTTP por método, rota e status.", ("method", "route", "status"))
+HTTP_LATENCY = HistogramVec("http_request_duration_seconds", "Latência das requisições HTTP por método e rota.", ("method", "route"))
+
+CACHE_REQUESTS = Counter("cache_requests_total", "Consultas ao cache do cacheable por prefixo e resultado.", ("prefix", "result"))
+
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total", "Chamadas HTTP a upstreams por tipo, host e status.", ("kind", "host", "status")
+)
+UPSTREAM_LATENCY = HistogramVec(
+    "upstream_request_duration_seconds", "Latência das chamadas HTTP a upstreams por tipo e host.", ("kind", "host")
+)
+
+POSTGRES_QUERY_LATENCY = HistogramVec("postgres_query_duration_seconds", "Latência das queries no Postgres.")
+
+_METRICS = (HTTP_REQUESTS, HTTP_LATENCY, CACHE_REQUESTS, UPSTREAM_REQUESTS, UPSTREAM_LATENCY, POSTGRES_QUERY_LATENCY)
+
+
+def cache_result(prefix: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(prefix, "hit" if hit else "miss")
+
+
+class _UpstreamCall:
+    status: Optional[int] = None
+
+
+@contextmanager
+def upstream(kind: str, url: Optional[str]):
+    """
+    Mede uma chamada a upstream:
+
+        with metrics.upstream("service", url) as call:
+            response = http.request(...)
+            call.status = response.status_code
+
+    Exceções antes da resposta saem com o nome da classe como status (ex.: Timeout,
+    ConnectionError); depois dela (ex.: raise_for_status) vale o status HTTP.
+    """
+    host = urlsplit(url or "").netloc or "unknown"
+    call = _UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        if call.status is None:
+            call.status = type(e).__name__
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        UPSTREAM_LATENCY.observe(elapsed_ms, kind, host)
+        UPSTREAM_REQUESTS.inc(kind, host, str(call.status))
+        timing.record("upstream", elapsed_ms)
+
+
+def instrument_engine(engine) -> None:
+    """Registra a latência de cada query executada pelo engine do SQLAlchemy."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("metrics_started")
+        if started:
+            POSTGRES_QUERY_LATENCY.observe((time.perf_counter() - started.pop()) * 1000)
+
+
+# ========= Coleta =========
+
+def _mongo() -> List[str]:
+    from app.dataprovider.mongo.base import client
+    from app.dataprovider.mongo.monitoring import CommandLatencyListener, PoolWaitListener
+
+    lines: List[str] = []
+    for listener in client.options.event_listeners:
+        if isinstance(listener, CommandLatencyListener):
+            snap = listener.snapshot()
+            lines += render_histograms(
+                "mongo_command_duration_seconds", "Latência dos comandos no Mongo por comando.",
+                ("command",), (((name,), s) for name, s in snap.items()),
+            )
+            lines += render_gauge(
+                "mongo_command_failures_total", "Comandos do Mongo com falha por comando.",
+                ("command",), {(name,): s["failures"] for name, s in snap.items()}, type="counter",
+            )
+        elif isinstance(listener, PoolWaitListener):
+            snap = listener.snapshot()
+            lines += render_histograms(
+                "mongo_pool_wait_seconds", "Espera por conexão no pool do Mongo.", (), [((), snap["wait"])]
+            )
+            lines += render_gauge("mongo_pool_in_use", "Conexões do Mongo em uso.", (), {(): snap["in_use"]})
+            lines += render_gauge("mongo_pool_open", "Conexões do Mongo abertas.", (), {(): snap["open"]})
+    return lines
+
+
+def _redis() -> List[str]:
+    from app.core.cache import pool_stats
+
+    stats = pool_stats()
+    return render_gauge(
+        "redis_pool_connections", "Conexões do pool do Redis por estado.",
+        ("state",), {("in_use",): stats["in_use"], ("max",): stats["max"]},
+    )
+
+
+def _postgres() -> List[str]:
+    from app.dataprovider.postgre.session import pool_stats
+
+    stats = pool_stats()
+    if stats is None:
+        return []
+    return render_gauge(
+        "postgres_pool_connections", "Conexões do pool do Postgres por estado.",
+        ("state",), {(state,): value for state, value in stats.items()},
+    )
+
+
+def _logs() -> List[str]:
+    from app.core.logger_config import dropped_count
+
+    return render_gauge(
+        "log_records_dropped_total", "Registros de log descartados por fila cheia.", (), {(): dropped_count()}, type="counter"
+    )
+
+
+_COLLECTORS: Tuple[Callable[[], List[str]], ...] = (_mongo, _redis, _postgres, _logs)
+
+
+def threadpool_stats() -> Dict[str, int]:
+    """Ocupação do threadpool do anyio (precisa rodar no event loop)."""
+    from anyio.to_thread import current_default_thread_limiter
+
+    limiter = current_default_thread_limiter()
+    return {
+        "busy": limiter.borrowed_tokens,
+        "total": int(limiter.total_tokens),
+        "waiting": limiter.statistics().tasks_waiting,
+    }
+
+
+def render(threadpool: Optional[Dict[str, int]] = None) -> str:
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines += metric.render()
+
+    for collect in _COLLECTORS:
+        try:
+            lines += collect()
+        except Exception as e:
+            error("[METRICS] Falha na coleta %s: %s", collect.__name__, e)
+
+    if threadpool is not None:
+        lines += render_gauge(
+            "threadpool_threads", "Threads do threadpool do anyio por estado.",
+            ("state",), {("busy",): threadpool["busy"], ("total",): threadpool["total"]},
+        )
+        lines += render_gauge(
+            "threadpool_queue_depth", "Tarefas esperando uma thread livre no threadpool.", (), {(): threadpool["waiting"]}
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+# ========= Middleware =========
+
+class MetricsMiddleware:
+    """Conta e mede as requisições HTTP por rota (template do FastAPI)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # o roteador grava a rota encontrada no próprio scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe((time.perf_counter() - started) * 1000, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status))
@@ -1,23 +1,89 @@
-import requests
-from typing import Dict, Optional, Literal, Any
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Literal, Any, Tuple, Union
+
+from dotenv import load_dotenv
+
+from app.core.cache import cache_get_json, cache_set_json
 from app.core.exceptions.types import BadRequestError
+from app.core.logger_config import debug
+
+load_dotenv()
+
+# Dentro desta janela a estrutura em cache é usada sem nem revalidar no upstream
+STRUCTURE_FRESH_SECONDS = int(os.getenv("STRUCTURE_FRESH_SECONDS", 60))
+# Tempo que a estrutura (com ETag/Last-Modified) fica no Redis para GETs condicionais
+STRUCTURE_CACHE_TTL_SECONDS = int(os.getenv("STRUCTURE_CACHE_TTL_SECONDS", 86400))
+STRUCTURE_MAX_BYTES = int(os.getenv("STRUCTURE_MAX_BYTES", 5 * 1024 * 1024))
+STRUCTURE_FETCH_CONCURRENCY = int(os.getenv("STRUCTURE_FETCH_CONCURRENCY", 16))
+STRUCTURE_TIMEOUT_SECONDS = float(os.getenv("STRUCTURE_TIMEOUT_SECONDS", 10))
+
+StructureType = Literal["mcp", "ocp-m", "langserve"]
+
+_http = None
+_http_lock = threading.Lock()
+
+
+def _get_http():
+    """requests.Session compartilhado (pool de conexões keep-alive entre os fetches)."""
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=STRUCTURE_FETCH_CONCURRENCY,
+                    pool_maxsize=STRUCTURE_FETCH_CONCURRENCY,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http = session
+    return _http
+
+
+def close_http() -> None:
+    global _http
+    with _http_lock:
+        if _http is not None:
+            _http.close()
+            _http = None
+
+
+def _cache_key(url: str, headers: Dict[str, str]) -> str:
+    # os headers costumam ter credenciais: entram na chave só como hash
+    raw = json.dumps([url, sorted(headers.items())], separators=(",", ":"))
+    return f"ocp_structure_http:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
 
 
 class StructureFetcher:
     """
     Classe responsável por buscar estruturas como MCP e LangServe a partir de URLs.
+
+    As respostas ficam em cache por (url, hash dos headers). Após STRUCTURE_FRESH_SECONDS
+    a estrutura é revalidada com If-None-Match / If-Modified-Since (304 = reaproveita).
     """
 
     @staticmethod
     def get_structure(
-        structure_type: Literal["mcp", "ocp-m", "langserve"],
+        structure_type: StructureType,
         url: str,
         headers: Optional[Dict[str, str]] = None,
+        fresh_seconds: Optional[int] = None,
     ) -> Dict:
         """
         Busca a estrutura JSON de um servidor MCP ou LangServe.
         Adiciona automaticamente '/tools' à URL se o tipo for MCP.
+        `fresh_seconds=0` força a revalidação no upstream (GET condicional).
         """
+        import requests
 
         # Normaliza headers no formato esperado pelo requests
         merged_headers: Dict[str, str] = {}
@@ -29,16 +95,22 @@ class StructureFetcher:
                 )
             merged_headers.update(headers)
 
+        if fresh_seconds is None:
+            fresh_seconds = STRUCTURE_FRESH_SECONDS
+
         try:
             if structure_type == "mcp":
-                return StructureFetcher._get_mcp_structure(url, merged_headers)
+                return StructureFetcher._get_mcp_structure(url, merged_headers, fresh_seconds)
             elif structure_type == "ocp-m":
-                return StructureFetcher._get_ocpm_structure(url, merged_headers)
+                return StructureFetcher._get_ocpm_structure(url, merged_headers, fresh_seconds)
             elif structure_type == "langserve":
-                return StructureFetcher._get_langserve_structure(url, merged_headers)
+                return StructureFetcher._get_langserve_structure(url, merged_headers, fresh_seconds)
             else:
                 raise BadRequestError(f"Tipo de estrutura inválido: {structure_type}")
 
+        except BadRequestError:
+            raise
+
         except requests.exceptions.Timeout:
             raise BadRequestError(f"Timeout ao tentar acessar {url}")
 
@@ -46,8 +118,9 @@ class StructureFetcher:
             raise BadRequestError(f"Não foi possível conectar a {url}")
 
         except requests.exceptions.HTTPError as e:
-            status = e.response.status_code if e.response else "?"
-            reason = e.response.reason if e.response else ""
+            # Response com status de erro é "falsy": compara com None
+            status = e.response.status_code if e.response is not None else "?"
+            reason = e.response.reason if e.response is not None else ""
             raise BadRequestError(f"Erro HTTP ao acessar {url}: {status} {reason}")
 
         except requests.exceptions.RequestException as e:
@@ -56,10 +129,105 @@ class StructureFetcher:
         except Exception as e:
             raise BadRequestError(f"Erro inesperado ao buscar estrutura: {e}")
 
+    @staticmethod
+    def fetch_many(
+        items: List[Tuple[StructureType, str, Optional[Dict[str, str]]]],
+        fresh_seconds: Optional[int] = None,
+    ) -> List[Union[Dict, BadRequestError]]:
+        """
+        Busca várias estruturas em paralelo; o tempo total é o do upstream mais lento.
+        Retorna na mesma ordem da entrada a estrutura ou o BadRequestError de cada item.
+        """
+        if not items:
+            return []
+
+        def _one(item):
+            try:
+                return StructureFetcher.get_structure(*item, fresh_seconds=fresh_seconds)
+            except BadRequestError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(STRUCTURE_FETCH_CONCURRENCY, len(items))) as executor:
+            return list(executor.map(_one, items))
+
+    @staticmethod
+    async def aget_structure(
+        structure_type: StructureType,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        fresh_seconds: Optional[int] = None,
+    ) -> Dict:
+        """Versão assíncrona de get_structure (executa em thread, sem bloquear o event loop)."""
+        return await asyncio.to_thread(StructureFetcher.get_structure, structure_type, url, headers, fresh_seconds)
+
+    @staticmethod
+    async def afetch_many(
+        items: List[Tuple[StructureType, str, Optional[Dict[str, str]]]],
+        fresh_seconds: Optional[int] = None,
+    ) -> List[Union[Dict, BadRequestError]]:
+        """Versão assíncrona de fetch_many."""
+        return await asyncio.to_thread(StructureFetcher.fetch_many, items, fresh_seconds)
+
     # --- Métodos privados ---
 
     @staticmethod
-    def _get_mcp_structure(url: str, headers: Optional[Dict[str, Any]] = None) -> Dict:
+    def _fetch_json(url: str, headers: Dict[str, str], fresh_seconds: int) -> Any:
+        """
+        GET com cache + requisição condicional + limite de tamanho.
+        O corpo é lido em blocos e a leitura é interrompida ao passar de STRUCTURE_MAX_BYTES.
+        """
+        key = _cache_key(url, headers)
+        cached = cache_get_json(key)
+
+        if cached and time.time() - cached.get("fetched_at", 0) < fresh_seconds:
+            debug("[STRUCTURE HIT] %s", url, event="cache")
+            return cached["data"]
+
+        request_headers = dict(headers)
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+
+        with _get_http().get(url, headers=request_headers, timeout=STRUCTURE_TIMEOUT_SECONDS, stream=True) as response:
+            if response.status_code == 304 and cached:
+                debug("[STRUCTURE 304] %s", url, event="cache")
+                cached["fetched_at"] = time.time()
+                cache_set_json(key, cached, STRUCTURE_CACHE_TTL_SECONDS)
+                return cached["data"]
+
+            response.raise_for_status()
+
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > STRUCTURE_MAX_BYTES:
+                raise BadRequestError(f"Estrutura em {url} excede o limite de {STRUCTURE_MAX_BYTES} bytes")
+
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=65536):
+                body.extend(chunk)
+                if len(body) > STRUCTURE_MAX_BYTES:
+                    raise BadRequestError(f"Estrutura em {url} excede o limite de {STRUCTURE_MAX_BYTES} bytes")
+
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise BadRequestError(f"A resposta de {url} não é um JSON válido.")
+
+            cache_set_json(
+                key,
+                {
+                    "data": data,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                },
+                STRUCTURE_CACHE_TTL_SECONDS,
+            )
+            return data
+
+    @staticmethod
+    def _get_mcp_structure(url: str, headers: Optional[Dict[str, Any]] = None, fresh_seconds: int = 0) -> Dict:
         """
         Obtém a estrutura JSON padrão de um servidor MCP.
         Se a URL não terminar com '/tools', adiciona automaticamente.
@@ -68,9 +236,7 @@ class StructureFetcher:
         if not url.endswith("/tools"):
             url = f"{url}/tools"
 
-        response = requests.get(url, headers=headers or {}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = StructureFetcher._fetch_json(url, headers or {}, fresh_seconds)
 
         if not isinstance(data, (dict, list)):
             raise BadRequestError("A resposta do MCP não está em formato JSON esperado.")
@@ -78,7 +244,7 @@ class StructureFetcher:
         return data
 
     @staticmethod
-    def _get_ocpm_structure(url: str, headers: Optional[Dict[str, Any]] = None) -> Dict:
+    def _get_ocpm_structure(url: str, headers: Optional[Dict[str, Any]] = None, fresh_seconds: int = 0) -> Dict:
         """
         Obtém apenas o conteúdo do campo 'data' de um servidor dinâmico OCP-M.
         Se a URL não terminar com '/tools', adiciona automaticamente.
@@ -87,10 +253,7 @@ class StructureFetcher:
         if not url.endswith("/tools"):
             url = f"{url}/tools"
 
-        response = requests.get(url, headers=headers or {}, timeout=10)
-        response.raise_for_status()
-
-        data = response.json()
+        data = StructureFetcher._fetch_json(url, headers or {}, fresh_seconds)
 
         if not isinstance(data, dict):
             raise BadRequestError("A resposta do MCP não está em formato JSON esperado.")
@@ -102,16 +265,14 @@ class StructureFetcher:
         return data["data"]
 
     @staticmethod
-    def _get_langserve_structure(url: str, headers: Optional[Dict[str, Any]] = None) -> Dict:
+    def _get_langserve_structure(url: str, headers: Optional[Dict[str, Any]] = None, fresh_seconds: int = 0) -> Dict:
         """
         Obtém a estrutura JSON padrão de um servidor LangServe.
         O endpoint raiz '/' já retorna o schema do agente.
         """
         url = url.rstrip("/")
 
-        response = requests.get(url, headers=headers or {}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = StructureFetcher._fetch_json(url, headers or {}, fresh_seconds)
 
         if not isinstance(data, dict):
             raise BadRequestError("A resposta do LangServe não está em formato JSON esperado.")
@@ -0,0 +1,211 @@
+"""
+Perfil por amostragem de uma única requisição, sob demanda.
+
+Usuários com PROFILE_PERMISSION (ou "*") enviam o header `X-Profile: 1`; durante a
+requisição uma thread amostra as pilhas das threads do processo a cada
+PROFILE_INTERVAL_MS e, ao final, o perfil fica no Redis por PROFILE_TTL_SECONDS.
+A resposta traz `X-Profile-Id`; o download é em GET /profiles/{id}/folded (pilhas
+"colapsadas", para flamegraph.pl ou speedscope) e o resumo em GET /profiles/{id}.
+
+As pilhas têm como raiz a origem da thread:
+- loop:<nome>     thread do event loop (partes assíncronas, inclusive de outras requisições)
+- request:<nome>  threads que executaram etapas desta requisição (ver app.core.timing)
+- other:<nome>    demais threads ocupadas no período (outras requisições, jobs)
+Threads paradas em espera (fila, lock, select) não entram.
+
+Só um perfil por vez (PROFILE_MAX_CONCURRENT); pedidos acima disso seguem sem perfil.
+Usa só a stdlib (sys._current_frames), sem dependências extras.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional, Set
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.core import timing
+from app.core.cache import cache_get_json, cache_set_json
+from app.core.logger_config import debug, error
+
+load_dotenv()
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "1").lower() in ("1", "true", "yes")
+PROFILE_PERMISSION = os.getenv("PROFILE_PERMISSION", "*")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_TTL_SECONDS = int(os.getenv("PROFILE_TTL_SECONDS", 3600))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", 1))
+PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", 64))
+
+PROFILE_HEADER = "x-profile"
+
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+_IDLE_FUNCTIONS = {"wait", "_wait_for_tstate_lock", "get", "select", "poll", "accept", "_worker", "sleep"}
+
+_slots = threading.BoundedSemaphore(max(1, PROFILE_MAX_CONCURRENT))
+
+
+# ========= Amostragem =========
+
+class SamplingProfiler:
+
+    def __init__(self, interval_ms: float, loop_thread: int, request_threads: Optional[Set[int]] = None):
+        self.interval = interval_ms / 1000
+        self.loop_thread = loop_thread
+        self.request_threads = request_threads if request_threads is not None else set()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _stack(frame)
+                if stack is None:
+                    continue
+                self.stacks[f"{self._origin(ident)}:{names.get(ident, ident)};{stack}"] += 1
+            self.samples += 1
+
+    def _origin(self, ident: int) -> str:
+        if ident == self.loop_thread:
+            return "loop"
+        if ident in self.request_threads:
+            return "request"
+        return "other"
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def _stack(frame) -> Optional[str]:
+    """Pilha da raiz até o frame atual, ou None se a thread está parada em espera."""
+    top = frame.f_code
+    if top.co_name in _IDLE_FUNCTIONS and os.path.basename(top.co_filename) in _IDLE_FILES:
+        return None
+
+    parts = []
+    while frame is not None and len(parts) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+# ========= Armazenamento =========
+
+def _key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    return cache_get_json(_key(profile_id))
+
+
+def _store(profile_id: str, profiler: SamplingProfiler, scope: dict, duration_ms: float, status: int) -> None:
+    timings = timing.current()
+    cache_set_json(_key(profile_id), {
+        "id": profile_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status,
+        "duration_ms": round(duration_ms, 1),
+        "interval_ms": PROFILE_INTERVAL_MS,
+        "samples": profiler.samples,
+        "server_timing": timings.header() if timings else None,
+        "folded": profiler.folded(),
+    }, PROFILE_TTL_SECONDS)
+    debug("[PROFILE] %s %s %s (%d amostras)", profile_id, scope["method"], scope["path"], profiler.samples)
+
+
+# ========= Autorização =========
+
+def _allowed(authorization: Optional[str]) -> bool:
+    from fastapi import HTTPException
+    from app.core.security import user_from_token
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = user_from_token(token)
+    except HTTPException:
+        return False
+    rules = user.get("rules") or []
+    return "*" in rules or PROFILE_PERMISSION in rules
+
+
+# ========= Middleware =========
+
+class ProfileMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILE_ENABLED:
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        if not headers.get(PROFILE_HEADER):
+            return await self.app(scope, receive, send)
+
+        if not await run_in_threadpool(_allowed, headers.get("authorization")):
+            return await self.app(scope, receive, send)
+
+        if not _slots.acquire(blocking=False):
+            debug("[PROFILE] Ignorado: já há um perfil em andamento", event="profile")
+            return await self.app(scope, receive, send)
+
+        timings = timing.current()
+        profiler = SamplingProfiler(
+            PROFILE_INTERVAL_MS, threading.get_ident(), timings.threads if timings else None
+        )
+        profile_id = uuid.uuid4().hex
+        started = time.perf_counter()
+        status = 500
+        done = False
+
+        async def finish():
+            nonlocal done
+            if done:
+                return
+            done = True
+            await run_in_threadpool(profiler.stop)
+            _slots.release()
+            try:
+                await run_in_threadpool(_store, profile_id, profiler, scope, (time.perf_counter() - started) * 1000, status)
+            except Exception as e:
+                error("[PROFILE] Falha ao salvar o perfil %s: %s", profile_id, e)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # salva antes da última parte: o id já é baixável quando o cliente recebe a resposta
+                await finish()
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await finish()
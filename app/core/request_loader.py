@@ -0,0 +1,134 @@
+"""
+Identity map por requisição para leituras por `_id` no Mongo.
+
+Dentro de uma mesma requisição o mesmo documento costuma ser lido várias vezes (ex.: o
+authenticator em ServiceService.authenticate e de novo em AuthenticatorService.execute;
+o mesmo credential_type validado para cada agente de um assistente). `load` e `load_many`
+guardam o resultado por (collection, _id) em um contextvar criado pelo
+RequestLoaderMiddleware; `load_many` junta os ids ainda não lidos em um único `$in`.
+
+Fora de uma requisição (jobs, scripts) as funções consultam o Mongo diretamente.
+Use apenas para leituras de apoio (validações, execução); leituras que precisam
+enxergar uma escrita feita na mesma requisição continuam chamando a collection.
+
+Com REQUEST_DEBUG_HEADERS=1 a resposta traz X-Mongo-Commands (comandos enviados ao
+Mongo na requisição, via CommandListener), X-Loader-Hits e X-Loader-Misses.
+"""
+import os
+import threading
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REQUEST_DEBUG_HEADERS = os.getenv("REQUEST_DEBUG_HEADERS", "0").lower() in ("1", "true", "yes")
+
+
+class RequestLoader:
+
+    def __init__(self):
+        self._docs: Dict[Tuple[str, ObjectId], Optional[dict]] = {}
+        # o endpoint síncrono roda no threadpool e pode abrir threads próprias
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.commands = 0
+
+    def count_command(self) -> None:
+        with self._lock:
+            self.commands += 1
+
+    def load_many(self, collection, ids: Iterable) -> Dict[ObjectId, Optional[dict]]:
+        oids = _oids(ids)
+        name = collection.name
+
+        with self._lock:
+            pending = [oid for oid in oids if (name, oid) not in self._docs]
+            self.hits += len(oids) - len(pending)
+            self.misses += len(pending)
+
+        if pending:
+            found = {doc["_id"]: doc for doc in collection.find({"_id": {"$in": pending}})}
+            with self._lock:
+                for oid in pending:
+                    self._docs[(name, oid)] = found.get(oid)
+
+        return {oid: self._docs[(name, oid)] for oid in oids}
+
+
+_current: ContextVar[Optional[RequestLoader]] = ContextVar("request_loader", default=None)
+
+
+def _oids(ids: Iterable) -> List[ObjectId]:
+    seen = {}
+    for id in ids:
+        if isinstance(id, ObjectId):
+            seen.setdefault(id, None)
+        elif id and ObjectId.is_valid(str(id)):
+            seen.setdefault(ObjectId(str(id)), None)
+    return list(seen)
+
+
+def current() -> Optional[RequestLoader]:
+    return _current.get()
+
+
+def load_many(collection, ids: Iterable) -> Dict[ObjectId, Optional[dict]]:
+    """Documentos por _id (None para os inexistentes), com uma consulta `$in` para os não lidos."""
+    loader = _current.get()
+    if loader is not None:
+        return loader.load_many(collection, ids)
+
+    oids = _oids(ids)
+    found = {doc["_id"]: doc for doc in collection.find({"_id": {"$in": oids}})} if oids else {}
+    return {oid: found.get(oid) for oid in oids}
+
+
+def load(collection, id) -> Optional[dict]:
+    """Equivalente a `collection.find_one({"_id": id})`, reaproveitando leituras da requisição."""
+    oids = _oids([id])
+    if not oids:
+        return None
+    return load_many(collection, oids)[oids[0]]
+
+
+def count_command() -> None:
+    """Chamado pelo CommandListener do Mongo para cada comando enviado."""
+    loader = _current.get()
+    if loader is not None:
+        loader.count_command()
+
+
+# ========= Middleware =========
+
+class RequestLoaderMiddleware:
+    """Cria o loader de cada requisição HTTP e, se habilitado, expõe os contadores em headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        loader = RequestLoader()
+        token = _current.set(loader)
+
+        async def send_wrapper(message):
+            if REQUEST_DEBUG_HEADERS and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-mongo-commands", str(loader.commands).encode()),
+                    (b"x-loader-hits", str(loader.hits).encode()),
+                    (b"x-loader-misses", str(loader.misses).encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,171 @@
+"""
+Registro dos recursos externos (pools de conexão) da aplicação.
+
+Cada recurso informa como aquecer (abrir as conexões mínimas) e como fechar.
+O lifespan aquece todos em paralelo na subida e fecha todos no shutdown;
+a readiness (/health/ready) só fica verde quando os recursos obrigatórios estão prontos.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.core.logger_config import info, error
+
+load_dotenv()
+
+REDIS_MIN_CONNECTIONS = int(os.getenv("REDIS_MIN_CONNECTIONS", 5))
+DB_MIN_CONNECTIONS = int(os.getenv("DB_MIN_CONNECTIONS", 5))
+RESOURCE_WARM_TIMEOUT_SECONDS = float(os.getenv("RESOURCE_WARM_TIMEOUT_SECONDS", 30))
+S3_WARMUP = os.getenv("S3_WARMUP", "0").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class Resource:
+    name: str
+    warm: Callable[[], None]
+    close: Optional[Callable[[], None]] = None
+    # recursos opcionais não bloqueiam a readiness se falharem
+    required: bool = True
+    status: str = "pending"  # pending | warming | ready | failed | closed
+    warm_ms: Optional[float] = None
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._resources: Dict[str, Resource] = {}
+
+    def register(
+        self,
+        name: str,
+        warm: Callable[[], None],
+        close: Optional[Callable[[], None]] = None,
+        required: bool = True,
+    ) -> None:
+        self._resources[name] = Resource(name=name, warm=warm, close=close, required=required)
+
+    async def _warm(self, resource: Resource) -> None:
+        async with resource._lock:
+            if resource.status == "ready":
+                return
+            resource.status = "warming"
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(asyncio.to_thread(resource.warm), RESOURCE_WARM_TIMEOUT_SECONDS)
+                resource.status = "ready"
+                resource.warm_ms = round((time.perf_counter() - started) * 1000, 1)
+                info("[RESOURCES] %s aquecido em %.0fms", resource.name, resource.warm_ms)
+            except Exception as e:
+                resource.status = "failed"
+                # o texto da exceção (hosts, usuários) fica só no log; /health/ready expõe o status
+                error("[RESOURCES] Falha ao aquecer %s: %s", resource.name, str(e) or type(e).__name__)
+
+    async def warm_all(self) -> None:
+        """Aquece todos os recursos em paralelo (recursos já prontos são ignorados)."""
+        started = time.perf_counter()
+        await asyncio.gather(*(self._warm(r) for r in self._resources.values()))
+        info("[RESOURCES] Aquecimento concluído em %.0fms", (time.perf_counter() - started) * 1000)
+
+    async def close_all(self) -> None:
+        """Fecha todos os recursos em paralelo; falhas são apenas logadas."""
+
+        async def _close(resource: Resource):
+            if resource.close is None:
+                return
+            try:
+                await asyncio.to_thread(resource.close)
+                resource.status = "closed"
+                info("[RESOURCES] %s fechado", resource.name)
+            except Exception as e:
+                error("[RESOURCES] Falha ao fechar %s: %s", resource.name, e)
+
+        await asyncio.gather(*(_close(r) for r in self._resources.values()))
+
+    def is_ready(self) -> bool:
+        return all(r.status == "ready" for r in self._resources.values() if r.required)
+
+    def snapshot(self) -> dict:
+        return {
+            r.name: {
+                "status": r.status,
+                "required": r.required,
+                "warm_ms": r.warm_ms,
+            }
+            for r in self._resources.values()
+        }
+
+
+# ========= Recursos da aplicação =========
+
+def _concurrently(fn: Callable[[], None], times: int) -> None:
+    """Executa `fn` em paralelo para forçar a abertura de várias conexões no pool."""
+    with ThreadPoolExecutor(max_workers=max(1, times)) as executor:
+        for future in [executor.submit(fn) for _ in range(max(1, times))]:
+            future.result()
+
+
+def _warm_mongo():
+    from app.dataprovider.mongo.base import client, MONGO_MIN_POOL_SIZE
+    # o driver completa o minPoolSize em background; os pings paralelos antecipam isso
+    _concurrently(lambda: client.admin.command("ping"), MONGO_MIN_POOL_SIZE)
+
+
+def _close_mongo():
+    from app.dataprovider.mongo.base import client
+    client.close()
+
+
+def _warm_redis():
+    from app.core.cache import cache_warm
+    cache_warm(REDIS_MIN_CONNECTIONS)
+
+
+def _close_redis():
+    from app.core.cache import cache_close
+    cache_close()
+
+
+def _warm_postgres():
+    from app.dataprovider.postgre.session import warm_engine
+    warm_engine(DB_MIN_CONNECTIONS)
+
+
+def _close_postgres():
+    from app.dataprovider.postgre.session import dispose_engine
+    dispose_engine()
+
+
+def _warm_s3():
+    from app.core.s3 import settings
+    from app.services.s3 import get_s3_client
+    get_s3_client().head_bucket(Bucket=settings.s3_bucket)
+
+
+def _close_s3():
+    from app.services.s3 import close_s3_client
+    close_s3_client()
+
+
+def _close_mcp_sessions():
+    from app.services.ocpm_mcp import sessions
+    sessions.close_all()
+
+
+def _close_structure_http():
+    from app.core.ocp.structure_fetcher import close_http
+    close_http()
+
+
+registry = ResourceRegistry()
+registry.register("mongo", _warm_mongo, _close_mongo)
+registry.register("redis", _warm_redis, _close_redis)
+registry.register("postgres", _warm_postgres, _close_postgres)
+# S3 só é usado em upload/remoção de ícones; por padrão fica fora do aquecimento
+registry.register("s3", _warm_s3 if S3_WARMUP else (lambda: None), _close_s3, required=False)
+registry.register("mcp_sessions", lambda: None, _close_mcp_sessions, required=False)
+registry.register("structure_http", lambda: None, _close_structure_http, required=False)
@@ -13,6 +13,7 @@ from app.dataprovider.postgre.session import SessionLocal
 from app.dataprovider.postgre.repository.contractor import contractor_exists
 from sqlalchemy import text
 from app.core.exceptions.types import ForbiddenError
+from app.core import timing
 
 # Carrega variáveis de ambiente do .env
 load_dotenv()
@@ -74,7 +75,11 @@ def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
 ) -> dict:
     token = credentials.credentials  # já vem sem o prefixo "Bearer"
-    payload = decode_token(token)
+    return user_from_token(token)
+
+def user_from_token(token: str) -> dict:
+    with timing.stage("jwt"):
+        payload = decode_token(token)
     if not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,12 +94,15 @@ def get_current_user(
 
     # --- CACHE: tenta pegar do Redis pelo (uid, iat)
     cache_key = f"userctx:{uid}:{iat}"
-    cached = cache_get_json(cache_key)
+    with timing.stage("userctx"):
+        cached = cache_get_json(cache_key)
     if cached:
+        timing.mark_user(cached)
         return cached
 
     # Monta o objeto completo (consulta perfis no DB)
-    dados = get_usuario_e_perfis(uid)
+    with timing.stage("perm_db"):
+        dados = get_usuario_e_perfis(uid)
     resp = {
         "uid": uid,
         "cid": dados["uuid_contratante"],
@@ -111,6 +119,7 @@ def get_current_user(
     if ttl > 0:
         cache_set_json(cache_key, resp, ttl)
 
+    timing.mark_user(resp)
     return resp
 
 from typing import List, Set
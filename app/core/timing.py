@@ -0,0 +1,125 @@
+"""
+Tempo por etapa da requisição, devolvido no header Server-Timing.
+
+Cada requisição HTTP ganha um `Timings` em um contextvar (TimingMiddleware); as etapas
+somam a duração de cada ocorrência:
+- jwt       decodificação do token (app.core.security)
+- userctx   leitura do contexto do usuário no Redis
+- perm_db   consulta de usuário e permissões no Postgres (só em cache miss)
+- mongo     comandos enviados ao Mongo (CommandListener)
+- upstream  chamadas HTTP de services e authenticators (app.core.metrics.upstream)
+- serialize renderização do JSON (FastJSONResponse)
+- compress  compressão da resposta (CompressionMiddleware)
+- total     tempo da requisição até o envio dos headers
+
+SERVER_TIMING: "all" (toda resposta), "privileged" (padrão: só para usuários com
+SERVER_TIMING_PERMISSION ou "*") ou "off".
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "privileged").lower()
+SERVER_TIMING_PERMISSION = os.getenv("SERVER_TIMING_PERMISSION", "*")
+
+
+class Timings:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # etapa -> [ms acumulados, ocorrências]
+        self._stages: Dict[str, List[float]] = {}
+        # o endpoint síncrono roda no threadpool e pode abrir threads próprias
+        self._lock = threading.Lock()
+        self.threads: Set[int] = set()
+        self.privileged = False
+
+    def record(self, name: str, ms: float) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(name, [0.0, 0])
+            entry[0] += ms
+            entry[1] += 1
+            self.threads.add(threading.get_ident())
+
+    def header(self) -> str:
+        with self._lock:
+            stages = {name: tuple(entry) for name, entry in self._stages.items()}
+
+        parts = []
+        for name, (ms, count) in stages.items():
+            part = f"{name};dur={ms:.1f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[Timings]] = ContextVar("request_timings", default=None)
+
+
+def current() -> Optional[Timings]:
+    return _current.get()
+
+
+def record(name: str, ms: float) -> None:
+    """Soma `ms` à etapa `name` da requisição atual (fora de uma requisição, nada)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.record(name, ms)
+
+
+@contextmanager
+def stage(name: str):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, (time.perf_counter() - started) * 1000)
+
+
+def mark_user(user: dict) -> None:
+    """Chamado ao resolver o usuário: decide se o modo "privileged" expõe o header."""
+    timings = _current.get()
+    if timings is not None:
+        rules = user.get("rules") or []
+        timings.privileged = "*" in rules or SERVER_TIMING_PERMISSION in rules
+
+
+# ========= Middleware =========
+
+class TimingMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or SERVER_TIMING == "off":
+            return await self.app(scope, receive, send)
+
+        timings = Timings()
+        token = _current.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and (SERVER_TIMING == "all" or timings.privileged):
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -1,3 +1,7 @@
+import math
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
 from bson import ObjectId
 from app.core.exceptions.types import BadRequestError
 
@@ -5,5 +9,102 @@ def ensure_object_id(id_str: str) -> ObjectId:
     """Valida e converte string em ObjectId."""
     if not ObjectId.is_valid(id_str):
         raise BadRequestError("ID inválido")
-    return ObjectId(id_str) 
-    
\ No newline at end of file
+    return ObjectId(id_str)
+
+
+# ========= PROJEÇÕES =========
+#
+# Os schemas de saída declaram em `mongo_fields` (ClassVar) os campos cujo caminho no
+# documento difere do nome no schema (ex.: {"image": "has_image"}); os demais usam o
+# próprio nome. `id` é sempre `_id`, que o Mongo já retorna por padrão.
+
+def _field_paths(model_cls: Type) -> Dict[str, str]:
+    overrides = getattr(model_cls, "mongo_fields", {})
+    return {
+        name: overrides.get(name, name)
+        for name in model_cls.model_fields
+        if name != "id"
+    }
+
+
+@lru_cache(maxsize=None)
+def projection_for(model_cls: Type) -> Dict[str, int]:
+    """Projeção com apenas os campos que o schema usa (derivada uma vez por classe)."""
+    return {path: 1 for path in _field_paths(model_cls).values()}
+
+
+def parse_fields(model_cls: Type, fields: Optional[str]) -> Optional[List[str]]:
+    """Converte `?fields=a,b` na lista de campos do schema (None = documento completo)."""
+    if fields is None or not fields.strip():
+        return None
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in model_cls.model_fields]
+    if unknown:
+        raise BadRequestError(f"Campos inválidos em 'fields': {', '.join(unknown)}")
+
+    # `id` sempre acompanha a resposta
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+
+def sparse_projection(model_cls: Type, fields: List[str]) -> Dict[str, int]:
+    paths = _field_paths(model_cls)
+    # `_id` explícito: projeção vazia faria o Mongo devolver o documento inteiro
+    return {"_id": 1, **{paths[f]: 1 for f in fields if f != "id"}}
+
+
+def _get_path(doc: dict, path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def sparse_dump(model_cls: Type, doc: dict, fields: List[str]) -> dict:
+    """
+    Monta a resposta só com os campos pedidos a partir do documento projetado.
+    Valores sensíveis passam pelo `mask_raw` do schema, o mesmo usado no from_raw.
+    """
+    mask = getattr(model_cls, "mask_raw", None)
+    data = mask(doc) if mask else doc
+    paths = _field_paths(model_cls)
+    return {
+        f: str(data.get("_id")) if f == "id" else _get_path(data, paths[f])
+        for f in fields
+    }
+
+
+def paginate(collection, filtro: dict, model_cls: Type, page: int, rpp: int, sort: str = "name") -> dict:
+    """Listagem paginada com projeção derivada do schema de lista (`model_cls`)."""
+    skip = (page - 1) * rpp
+    cursor = collection.find(filtro, projection_for(model_cls)).sort(sort, 1).skip(skip).limit(rpp)
+
+    items = [model_cls.from_raw(doc) for doc in cursor]
+
+    total = collection.count_documents(filtro)
+    total_pages = math.ceil(total / rpp) if rpp > 0 else 1
+
+    return {
+        "total": total,
+        "pages": total_pages,
+        "items": items,
+    }
+
+
+# ========= BUSCA POR LISTA DE IDS =========
+
+def fetch_by_ids(ids: List[str], fetch: Callable[[List[ObjectId]], Iterable[dict]]) -> Tuple[List[dict], List[str]]:
+    """
+    Resolve vários ids com uma única chamada a `fetch` (ex.: find/aggregate com `$in`).
+    Retorna (documentos na ordem pedida, ids não encontrados); ids repetidos contam uma vez
+    e ids inválidos entram como não encontrados.
+    """
+    unique = list(dict.fromkeys(ids))
+    oids = [ObjectId(i) for i in unique if ObjectId.is_valid(i)]
+    found = {str(doc["_id"]): doc for doc in fetch(oids)} if oids else {}
+
+    items = [found[i] for i in unique if i in found]
+    missing = [i for i in unique if i not in found]
+    return items, missing
@@ -0,0 +1,180 @@
+"""
+PATCH com update mínimo no Mongo.
+
+`diff(atual, payload, keys)` compara os campos enviados com o documento salvo e gera só
+as operações necessárias:
+- valor igual                        -> nada
+- valor novo                         -> $set do caminho
+- null (ou chave ausente em sub-objeto) -> $unset do caminho
+- lista cujos itens têm chave (`keys`, ex.: {"agents": "agent.id"}) e mantêm a mesma
+  sequência de chaves                -> diff item a item com arrayFilters
+  (`agents.$[p0].name`, filtro `{"p0.agent.id": "..."}`)
+- qualquer outra mudança em lista (inclusão, remoção, reordenação, chave repetida)
+                                     -> $set da lista inteira
+
+`apply(...)` lê o documento, calcula o diff e grava com a versão lida no filtro
+(app.core.doc_version); se outra escrita passou na frente, recalcula sobre o documento novo.
+"""
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+
+from app.core import doc_version
+from app.core.exceptions.types import NotFoundError, PreconditionFailedError
+
+# tentativas quando outra escrita muda o documento entre a leitura e o update
+PATCH_ATTEMPTS = 3
+
+_MISSING = object()
+
+
+class MinimalUpdate:
+
+    def __init__(self):
+        self.set: Dict[str, Any] = {}
+        self.unset: Dict[str, str] = {}
+        self.array_filters: List[dict] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.set or self.unset)
+
+    @property
+    def fields(self) -> Set[str]:
+        """Campos de primeiro nível alterados."""
+        return {path.split(".", 1)[0] for path in (*self.set, *self.unset)}
+
+    def update(self) -> dict:
+        update = {}
+        if self.set:
+            update["$set"] = self.set
+        if self.unset:
+            update["$unset"] = self.unset
+        return update
+
+    def _filter_id(self) -> str:
+        return f"p{len(self.array_filters)}"
+
+
+def _get(item: Any, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(item, dict):
+            return None
+        item = item.get(part)
+    return item
+
+
+def _strip(value: Any) -> Any:
+    # null e chave ausente são equivalentes (o PUT do assistente grava com exclude_none)
+    if isinstance(value, dict):
+        return {k: _strip(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_strip(v) for v in value]
+    return value
+
+
+def same(old: Any, new: Any) -> bool:
+    old = None if old is _MISSING else old
+    return _strip(old) == _strip(new)
+
+
+def _item_keys(items: list, key: str) -> Optional[list]:
+    """Chaves dos itens, ou None se algum não tiver chave ou houver repetição."""
+    keys = [_get(item, key) for item in items]
+    if any(k is None or isinstance(k, (dict, list)) for k in keys) or len(set(keys)) != len(keys):
+        return None
+    return keys
+
+
+def _diff(result: MinimalUpdate, path: str, pattern: str, old: Any, new: Any, keys: Dict[str, str]) -> None:
+    if same(old, new):
+        return
+
+    if new is None:
+        result.unset[path] = ""
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for name, value in new.items():
+            _diff(result, f"{path}.{name}", f"{pattern}.{name}", old.get(name, _MISSING), value, keys)
+        for name in old.keys() - new.keys():
+            if old[name] is not None:
+                result.unset[f"{path}.{name}"] = ""
+        return
+
+    key = keys.get(pattern)
+    if key and isinstance(old, list) and isinstance(new, list):
+        old_keys = _item_keys(old, key)
+        if old_keys is not None and old_keys == _item_keys(new, key):
+            for old_item, new_item, item_key in zip(old, new, old_keys):
+                if same(old_item, new_item):
+                    continue
+                ident = result._filter_id()
+                result.array_filters.append({f"{ident}.{key}": item_key})
+                _diff(result, f"{path}.$[{ident}]", pattern, old_item, new_item, keys)
+            return
+
+    result.set[path] = new
+
+
+def diff(current: dict, data: dict, keys: Optional[Dict[str, str]] = None) -> MinimalUpdate:
+    """
+    Update mínimo que leva `current` aos valores de `data` (só os campos enviados).
+    `keys` mapeia o caminho de cada lista (sem índices, ex.: "agents.tools") para o
+    campo que identifica seus itens.
+    """
+    result = MinimalUpdate()
+    for name, value in data.items():
+        _diff(result, name, name, current.get(name, _MISSING), value, keys or {})
+    return result
+
+
+def changed_items(old: Optional[list], new: Optional[list], key: str) -> List[dict]:
+    """Itens de `new` que não existem em `old` (pela chave) ou que mudaram."""
+    before = {}
+    for item in old or []:
+        before.setdefault(repr(_get(item, key)), item)
+    return [item for item in new or [] if not same(before.get(repr(_get(item, key))), item)]
+
+
+def apply(
+    collection,
+    oid: ObjectId,
+    data: dict,
+    keys: Optional[Dict[str, str]] = None,
+    if_match: Optional[str] = None,
+    validate: Optional[Callable[[dict, MinimalUpdate], None]] = None,
+    not_found: str = "Registro não encontrado",
+) -> Tuple[dict, MinimalUpdate]:
+    """
+    Aplica o PATCH `data` e devolve (documento, diff). Sem mudanças, nada é gravado e o
+    documento devolvido é o atual. `validate(atual, diff)` roda antes da escrita, para
+    validar só o que mudou.
+    """
+    for _ in range(PATCH_ATTEMPTS):
+        current = collection.find_one({"_id": oid})
+        if not current:
+            raise NotFoundError(not_found)
+
+        doc_version.check(current, if_match)
+
+        changes = diff(current, data, keys)
+        if not changes:
+            return current, changes
+
+        if validate:
+            validate(current, changes)
+
+        updated = collection.find_one_and_update(
+            {"_id": oid, **doc_version.unchanged(current)},
+            doc_version.bump(changes.update()),
+            array_filters=changes.array_filters or None,
+            return_document=True,
+        )
+        if updated:
+            return updated, changes
+
+        # outra escrita passou na frente: com If-Match o cliente decide; sem, recalcula
+        if if_match:
+            raise PreconditionFailedError()
+
+    raise PreconditionFailedError()
@@ -1,11 +1,114 @@
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, ReadPreference
+
+from app.dataprovider.mongo.monitoring import CommandLatencyListener, PoolWaitListener, RequestCommandCounter, StageTimingListener, listeners_snapshot
+from app.core.timing import SERVER_TIMING
+from app.core.request_loader import REQUEST_DEBUG_HEADERS
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL")
 MONGO_DB = os.getenv("MONGO_DB")
 
-client = MongoClient(MONGO_URL)
-db = client[MONGO_DB]
\ No newline at end of file
+# --- Pool / timeouts ---
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 5))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 30000))
+
+# --- Compressão de rede (ordem = preferência; o servidor escolhe a primeira suportada) ---
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+
+# --- Read preference usada pelos endpoints de listagem/detalhe ---
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+
+# --- Observabilidade ---
+MONGO_MONITORING = os.getenv("MONGO_MONITORING", "1").lower() in ("1", "true", "yes")
+MONGO_SLOW_COMMAND_MS = float(os.getenv("MONGO_SLOW_COMMAND_MS", 0))
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def _available_compressors(compressors: str) -> list[str]:
+    """Mantém apenas os compressores cujas bibliotecas estão instaladas."""
+    available = []
+    for name in [c.strip() for c in compressors.split(",") if c.strip()]:
+        if name == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                continue
+        elif name == "snappy":
+            try:
+                import snappy  # noqa: F401
+            except ImportError:
+                continue
+        available.append(name)
+    return available
+
+
+def create_mongo_client(url: str = MONGO_URL, **overrides) -> MongoClient:
+    """
+    Cria o MongoClient com pool, timeouts, compressão e listeners configurados via env.
+    Qualquer opção pode ser sobrescrita via kwargs.
+    """
+    listeners = []
+    if MONGO_MONITORING:
+        listeners = [CommandLatencyListener(slow_ms=MONGO_SLOW_COMMAND_MS), PoolWaitListener()]
+    if REQUEST_DEBUG_HEADERS:
+        listeners.append(RequestCommandCounter())
+    if SERVER_TIMING != "off":
+        listeners.append(StageTimingListener())
+
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "event_listeners": listeners,
+    }
+
+    compressors = _available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+
+    options.update(overrides)
+    return MongoClient(url, **options)
+
+
+client = create_mongo_client()
+db = client[MONGO_DB]
+
+# Banco para leituras dos endpoints de listagem/detalhe (pode ler de secundários).
+# Escritas e leituras logo após escrita continuam usando `db` (primário).
+db_read = client.get_database(
+    MONGO_DB,
+    read_preference=_READ_PREFERENCES.get(MONGO_READ_PREFERENCE, ReadPreference.SECONDARY_PREFERRED),
+)
+
+
+def mongo_stats() -> dict:
+    """Resumo de latência por comando e espera no pool de conexões."""
+    return {
+        "pool_options": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+            "compressors": _available_compressors(MONGO_COMPRESSORS),
+            "read_preference": MONGO_READ_PREFERENCE,
+        },
+        **listeners_snapshot(client.options.event_listeners),
+    }
@@ -0,0 +1,177 @@
+"""
+Registro declarativo dos índices do Mongo.
+
+Os índices deixaram de ser criados no import dos models; este módulo compara o
+estado atual de cada collection com o registro abaixo e aplica apenas o que falta.
+
+Uso:
+    python -m app.dataprovider.mongo.indexes            # só relatório (dry-run)
+    python -m app.dataprovider.mongo.indexes --apply    # cria os índices faltantes
+    python -m app.dataprovider.mongo.indexes --apply --drop-extra
+
+A API também cria os faltantes na subida (app.core.lifespan), salvo com
+MONGO_SYNC_INDEXES_ON_STARTUP=0; nessa rota nada é removido.
+"""
+import argparse
+import json
+from typing import Dict, List
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.dataprovider.mongo.base import db
+from app.core.logger_config import info, error
+
+
+def _uniq_name_contractor() -> IndexModel:
+    return IndexModel(
+        [("name", ASCENDING), ("contractor_id", ASCENDING)],
+        unique=True,
+        name="uniq_name_contractor_id",
+    )
+
+
+def _contractor_name() -> IndexModel:
+    # suporta get_all: filtro por contractor_id + ordenação por name
+    return IndexModel(
+        [("contractor_id", ASCENDING), ("name", ASCENDING)],
+        name="contractor_id_name",
+    )
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "agent": [
+        _uniq_name_contractor(),
+        _contractor_name(),
+        # checagem de vínculo em TagService.delete
+        IndexModel([("tags.id", ASCENDING)], name="tags_id"),
+    ],
+    "assistant": [_uniq_name_contractor(), _contractor_name()],
+    "authenticator": [_uniq_name_contractor(), _contractor_name()],
+    "ocp": [
+        _uniq_name_contractor(),
+        _contractor_name(),
+        # gc de ocp_structure (distinct das referências)
+        IndexModel([("ocp.structure_ref", ASCENDING)], name="ocp_structure_ref"),
+    ],
+    "ocp-m": [_uniq_name_contractor(), _contractor_name()],
+    "service": [_uniq_name_contractor(), _contractor_name()],
+    "credential": [
+        IndexModel(
+            [("description", ASCENDING), ("contractor_id", ASCENDING)],
+            unique=True,
+            name="uniq_description_contractor_id",
+        ),
+        # CredentialService.get_all e a checagem de vínculo em CredentialTypeService.delete
+        IndexModel(
+            [("credential_type_id", ASCENDING), ("contractor_id", ASCENDING)],
+            name="credential_type_id_contractor_id",
+        ),
+    ],
+    "credential_type": [
+        IndexModel([("name", ASCENDING)], unique=True, name="name_1"),
+        # CredentialTypeService.get_all: filtro por kind + ordenação (kind, name)
+        IndexModel([("kind", ASCENDING), ("name", ASCENDING)], name="kind_name"),
+    ],
+    "tag": [
+        IndexModel(
+            [("name", ASCENDING), ("tag_type", ASCENDING)],
+            unique=True,
+            name="uniq_name_tag_type",
+        ),
+        # TagService.get_all: filtro por tag_type + ordenação por name
+        IndexModel([("tag_type", ASCENDING), ("name", ASCENDING)], name="tag_type_name"),
+    ],
+    "reference": [
+        # "quem usa X": dependents/has_dependents/transitive_dependents
+        IndexModel([("target", ASCENDING), ("source", ASCENDING)], name="target_source"),
+        # sync/remove das arestas de uma origem
+        IndexModel([("source", ASCENDING)], name="source"),
+    ],
+}
+
+# Opções que, se diferentes, tornam o índice existente incompatível com o desejado
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _spec(index: dict) -> dict:
+    return {
+        "key": list(index["key"].items()),
+        **{opt: index[opt] for opt in _COMPARED_OPTIONS if opt in index},
+    }
+
+
+def _index_usage(collection) -> Dict[str, int]:
+    """Quantidade de acessos por índice desde o último restart do mongod ($indexStats)."""
+    try:
+        return {
+            s["name"]: int(s.get("accesses", {}).get("ops", 0))
+            for s in collection.aggregate([{"$indexStats": {}}])
+        }
+    except OperationFailure:
+        # usuário sem permissão para $indexStats
+        return {}
+
+
+def diff_indexes(collection_name: str) -> dict:
+    """Compara os índices existentes de uma collection com o registro."""
+    collection = db[collection_name]
+    desired = {ix.document["name"]: _spec(ix.document) for ix in INDEXES.get(collection_name, [])}
+    existing = {
+        ix["name"]: _spec(ix)
+        for ix in collection.list_indexes()
+        if ix["name"] != "_id_"
+    }
+    usage = _index_usage(collection)
+
+    return {
+        "missing": [name for name in desired if name not in existing],
+        "conflicting": [
+            name for name in desired
+            if name in existing and existing[name] != desired[name]
+        ],
+        "extra": [name for name in existing if name not in desired],
+        "unused": [
+            name for name in existing
+            if name in usage and usage[name] == 0
+        ],
+    }
+
+
+def sync_indexes(apply: bool = True, drop_extra: bool = False) -> Dict[str, dict]:
+    """
+    Aplica os índices faltantes de todas as collections registradas.
+    Índices conflitantes (mesmo nome, definição diferente) só são reportados.
+    """
+    report: Dict[str, dict] = {}
+
+    for collection_name, indexes in INDEXES.items():
+        try:
+            result = diff_indexes(collection_name)
+
+            if apply and result["missing"]:
+                to_create = [ix for ix in indexes if ix.document["name"] in result["missing"]]
+                db[collection_name].create_indexes(to_create)
+                info("[INDEXES] %s: criados %s", collection_name, result["missing"])
+
+            if apply and drop_extra:
+                for name in result["extra"]:
+                    db[collection_name].drop_index(name)
+                    info("[INDEXES] %s: removido %s", collection_name, name)
+
+            result["applied"] = apply
+            report[collection_name] = result
+        except Exception as e:
+            error("[INDEXES] Falha ao sincronizar %s: %s", collection_name, e)
+            report[collection_name] = {"error": str(e)}
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza os índices do Mongo com o registro.")
+    parser.add_argument("--apply", action="store_true", help="cria os índices faltantes")
+    parser.add_argument("--drop-extra", action="store_true", help="remove índices fora do registro (requer --apply)")
+    args = parser.parse_args()
+
+    print(json.dumps(sync_indexes(apply=args.apply, drop_extra=args.drop_extra), indent=2))
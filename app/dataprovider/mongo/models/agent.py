@@ -1,178 +1,206 @@
-from app.dataprovider.mongo.base import db
+from app.dataprovider.mongo.base import db, db_read
 from app.core.exceptions.types import BusinessDomainError, NotFoundError
+from typing import List, Optional
 from bson import ObjectId
-from pymongo import ASCENDING
 from uuid import UUID
 from app.core.utils.mongo import ensure_object_id
 
 COLLECTION_NAME = "agent"
 collection = db[COLLECTION_NAME]
+read_collection = db_read[COLLECTION_NAME]
 
 credential_collection = db["credential"]
 ocp_collection = db["ocp"]
 
-# index
-collection.create_index(
-    [("name", ASCENDING), ("contractor_id", ASCENDING)],
-    unique=True,
-    name="uniq_name_contractor_id"
-)
-
-def get_agent_detail(id: str):
-    pipeline = [
-        {"$match": {"_id": ObjectId(id)}},
-
-        # 🔹 Lookup OCPs
-        {
-            "$lookup": {
-                "from": "ocp",
-                "let": {"ocp_ids": "$ocps.id"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {
-                                "$in": [{"$toString": "$_id"}, {"$ifNull": ["$$ocp_ids", []]}]
-                            }
-                        }
-                    },
-                    {
-                        "$project": {
-                            "id": {"$toString": "$_id"},
-                            "name": 1,
-                            "type": "$ocp.metadata.source.type"
-                        }
+
+# ========= Detalhe =========
+
+_OCPS_LOOKUP = {
+    "$lookup": {
+        "from": "ocp",
+        "let": {"ocp_ids": "$ocps.id"},
+        "pipeline": [
+            {
+                "$match": {
+                    "$expr": {
+                        "$in": [{"$toString": "$_id"}, {"$ifNull": ["$$ocp_ids", []]}]
                     }
-                ],
-                "as": "ocps"
+                }
+            },
+            {
+                "$project": {
+                    "id": {"$toString": "$_id"},
+                    "name": 1,
+                    "type": "$ocp.metadata.source.type"
+                }
             }
-        },
-
-        # 🔹 Lookup Tools (via credential_type)
-        {
-            "$lookup": {
-                "from": "credential_type",
-                "let": {"tool_ids": "$tools.tool.id"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {
-                                "$in": [{"$toString": "$_id"}, {"$ifNull": ["$$tool_ids", []]}]
-                            }
-                        }
-                    },
-                    {
-                        "$project": {
-                            "id": {"$toString": "$_id"},
-                            "name": 1,
-                            "kind": 1,
-                            "scope": "$scope",
+        ],
+        "as": "ocps"
+    }
+}
+
+
+# lookup em credential_type e montagem dos tools com detalhes
+_TOOLS_STAGES = [
+    {
+        "$lookup": {
+            "from": "credential_type",
+            "let": {"tool_ids": "$tools.tool.id"},
+            "pipeline": [
+                {
+                    "$match": {
+                        "$expr": {
+                            "$in": [{"$toString": "$_id"}, {"$ifNull": ["$$tool_ids", []]}]
                         }
                     }
-                ],
-                "as": "tools_info"
-            }
-        },
-
-        # 🔹 Monta os tools com detalhes
-        {
-            "$addFields": {
-                "tools": {
-                    "$map": {
-                        "input": {"$ifNull": ["$tools", []]},
-                        "as": "t",
-                        "in": {
-                            "tool": {
-                                "$arrayElemAt": [
-                                    {
-                                        "$filter": {
-                                            "input": "$tools_info",
-                                            "as": "ti",
-                                            "cond": {
-                                                "$eq": [
-                                                    "$$ti.id",
-                                                    {"$ifNull": ["$$t.tool.id", None]}
-                                                ]
-                                            }
-                                        }
-                                    },
-                                    0
-                                ]
-                            },
-                            "code": {"$ifNull": ["$$t.code", None]},
-                            "name": {"$ifNull": ["$$t.name", 1]},
-                            "required": {"$ifNull": ["$$t.required", False]}
-                        }
+                },
+                {
+                    "$project": {
+                        "id": {"$toString": "$_id"},
+                        "name": 1,
+                        "kind": 1,
+                        "scope": "$scope",
                     }
                 }
-            }
-        },
-
-        # 🔹 Lookup Tags
-        {
-            "$lookup": {
-                "from": "tag",
-                "let": {"tag_ids": "$tags.id"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {
-                                "$in": [{"$toString": "$_id"}, {"$ifNull": ["$$tag_ids", []]}]
-                            }
-                        }
-                    },
-                    {
-                        "$project": {
-                            "id": {"$toString": "$_id"},
-                            "name": 1
-                        }
+            ],
+            "as": "tools_info"
+        }
+    },
+    # monta os tools com detalhes
+    {
+        "$addFields": {
+            "tools": {
+                "$map": {
+                    "input": {"$ifNull": ["$tools", []]},
+                    "as": "t",
+                    "in": {
+                        "tool": {
+                            "$arrayElemAt": [
+                                {
+                                    "$filter": {
+                                        "input": "$tools_info",
+                                        "as": "ti",
+                                        "cond": {
+                                            "$eq": [
+                                                "$$ti.id",
+                                                {"$ifNull": ["$$t.tool.id", None]}
+                                            ]
+                                        }
+                                    }
+                                },
+                                0
+                            ]
+                        },
+                        "code": {"$ifNull": ["$$t.code", None]},
+                        "name": {"$ifNull": ["$$t.name", 1]},
+                        "required": {"$ifNull": ["$$t.required", False]}
                     }
-                ],
-                "as": "tags"
+                }
             }
-        },
-
-        # 🔹 Campos finais
-        {
-            "$project": {
-                "_id": {"$toString": "$_id"},
-                "name": 1,
-                "description": 1,
-                "system_message": 1,
-                "has_image": 1,
-                "enabled": 1,
-                "functions": 1,
-                "contractor_id": 1,
-                "ocps": {
-                    "$map": {
-                        "input": "$ocps",
-                        "as": "o",
-                        "in": {
-                            "id": "$$o.id",
-                            "name": "$$o.name",
-                            "type": "$$o.type"
-                        }
-                    }
-                },
-                "tools": 1,
-                "tags": {
-                    "$map": {
-                        "input": "$tags",
-                        "as": "t",
-                        "in": {
-                            "id": "$$t.id",
-                            "name": "$$t.name"
-                        }
+        }
+    },
+]
+
+
+_TAGS_LOOKUP = {
+    "$lookup": {
+        "from": "tag",
+        "let": {"tag_ids": "$tags.id"},
+        "pipeline": [
+            {
+                "$match": {
+                    "$expr": {
+                        "$in": [{"$toString": "$_id"}, {"$ifNull": ["$$tag_ids", []]}]
                     }
                 }
+            },
+            {
+                "$project": {
+                    "id": {"$toString": "$_id"},
+                    "name": 1
+                }
+            }
+        ],
+        "as": "tags"
+    }
+}
+
+
+# campos finais
+_DETAIL_PROJECTION = {
+    "_id": {"$toString": "$_id"},
+    "name": 1,
+    "description": 1,
+    "system_message": 1,
+    "has_image": 1,
+    "enabled": 1,
+    "functions": 1,
+    "contractor_id": 1,
+    "doc_version": 1,
+    "ocps": {
+        "$map": {
+            "input": "$ocps",
+            "as": "o",
+            "in": {
+                "id": "$$o.id",
+                "name": "$$o.name",
+                "type": "$$o.type"
             }
         }
-    ]
+    },
+    "tools": 1,
+    "tags": {
+        "$map": {
+            "input": "$tags",
+            "as": "t",
+            "in": {
+                "id": "$$t.id",
+                "name": "$$t.name"
+            }
+        }
+    }
+}
+
 
-    cursor = collection.aggregate(pipeline)
-    docs = cursor.to_list(length=1)
+# lookups por campo do AgentOutDetail (na ordem em que rodam)
+_FIELD_STAGES = {
+    "ocps": [_OCPS_LOOKUP],
+    "tools": _TOOLS_STAGES,
+    "tags": [_TAGS_LOOKUP],
+}
+
+# campos do AgentOutDetail com caminho diferente no documento
+_FIELD_PATHS = {"image": "has_image"}
+
+
+def get_agent_detail(id: str, source=collection, fields: Optional[List[str]] = None):
+    docs = get_agent_details([ObjectId(id)], source=source, fields=fields)
     return docs[0] if docs else None
 
 
+def get_agent_details(ids: list[ObjectId], source=collection, fields: Optional[List[str]] = None) -> list[dict]:
+    """
+    Detalhe de vários agentes em uma única agregação (ordem não garantida).
+    Com `fields` (campos do AgentOutDetail), o documento é projetado logo após o $match
+    e só rodam os lookups dos campos pedidos.
+    """
+    pipeline = [{"$match": {"_id": {"$in": ids}}}]
+
+    if fields is None:
+        for stages in _FIELD_STAGES.values():
+            pipeline += stages
+        pipeline.append({"$project": _DETAIL_PROJECTION})
+        return list(source.aggregate(pipeline))
+
+    paths = {_FIELD_PATHS.get(f, f) for f in fields if f != "id"}
+    pipeline.append({"$project": {"_id": 1, **{path: 1 for path in paths}}})
+    for name, stages in _FIELD_STAGES.items():
+        if name in paths:
+            pipeline += stages
+    pipeline.append({"$project": {k: v for k, v in _DETAIL_PROJECTION.items() if k == "_id" or k in paths}})
+    return list(source.aggregate(pipeline))
+
+
 def _extract_id(candidate, key_chain=("id", "_id")) -> str | None:
     """Extrai o id de um dict ou objeto (tentando 'id' e '_id')."""
     if candidate is None:
@@ -275,4 +303,4 @@ def validate_ocps(db, contractor_id: UUID | None, ocps: list[dict]):
     if langserve_count > 0 and len(ocps) > 1:
         raise BusinessDomainError(
             "Quando há um OCP do tipo 'langserve', apenas um OCP é permitido."
-        )
\ No newline at end of file
+        )
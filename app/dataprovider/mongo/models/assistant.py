@@ -1,157 +1,186 @@
-from app.dataprovider.mongo.base import db
+from app.dataprovider.mongo.base import db, db_read
 from app.core.exceptions.types import BusinessDomainError, NotFoundError
 from bson import ObjectId
-from pymongo import ASCENDING
+from typing import List, Optional
 from app.core.utils.mongo import ensure_object_id
+from app.core.request_loader import load, load_many
 
 COLLECTION_NAME = "assistant"
 collection = db[COLLECTION_NAME]
+read_collection = db_read[COLLECTION_NAME]
 
 credential_collection = db["credential"]
 credential_type_collection = db["credential_type"]
 agent_collection = db["agent"]
 
-# index
-collection.create_index(
-    [("name", ASCENDING), ("contractor_id", ASCENDING)],
-    unique=True,
-    name="uniq_name_contractor_id"
-)
-
-def get_assistant_detail(id: str):
-    pipeline = [
-        {"$match": {"_id": ObjectId(id)}},
-
-        # === Enriquecer ai_model da assistente ===
-        {
-            "$lookup": {
-                "from": "credential",
-                "let": {"cred_id": "$ai_model.id"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {"$eq": [{"$toString": "$_id"}, "$$cred_id"]}
-                        }
-                    },
-                    {"$project": {"_id": 1, "name": "$description"}}
-                ],
-                "as": "ai_model_doc"
-            }
-        },
-        {
-            "$addFields": {
-                "ai_model": {
-                    "id": {
-                        "$arrayElemAt": [
-                            {
-                                "$map": {
-                                    "input": "$ai_model_doc",
-                                    "as": "m",
-                                    "in": {"$toString": "$$m._id"}
-                                }
-                            },
-                            0
-                        ]
-                    },
-                    "name": {"$arrayElemAt": ["$ai_model_doc.name", 0]}
-                }
-            }
-        },
-        {"$project": {"ai_model_doc": 0}},
-
-        # === Lookup dos agentes ===
-        {
-            "$lookup": {
-                "from": "agent",
-                "let": {"agent_ids": "$agents.agent.id"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {"$in": [{"$toString": "$_id"}, "$$agent_ids"]}
-                        }
-                    },
-                    {
-                        "$project": {
-                            "_id": 1,
-                            "name": 1,
-                            "description": 1,
-                            "system_message": 1,
-                            "enabled": 1,
-                            "contractor_id": 1,
-                            "functions": 1
-                        }
+
+# ========= Detalhe =========
+
+# ai_model da assistente: nome vindo da credencial
+_AI_MODEL_STAGES = [
+    {
+        "$lookup": {
+            "from": "credential",
+            "let": {"cred_id": "$ai_model.id"},
+            "pipeline": [
+                {
+                    "$match": {
+                        "$expr": {"$eq": [{"$toString": "$_id"}, "$$cred_id"]}
                     }
-                ],
-                "as": "agents_docs"
+                },
+                {"$project": {"_id": 1, "name": "$description"}}
+            ],
+            "as": "ai_model_doc"
+        }
+    },
+    {
+        "$addFields": {
+            "ai_model": {
+                "id": {
+                    "$arrayElemAt": [
+                        {
+                            "$map": {
+                                "input": "$ai_model_doc",
+                                "as": "m",
+                                "in": {"$toString": "$$m._id"}
+                            }
+                        },
+                        0
+                    ]
+                },
+                "name": {"$arrayElemAt": ["$ai_model_doc.name", 0]}
             }
-        },
-
-        # === Adicionar detalhes dos agentes ===
-        {
-            "$addFields": {
-                "agents": {
-                    "$map": {
-                        "input": "$agents",
-                        "as": "ag",
-                        "in": {
-                            "$let": {
-                                "vars": {
-                                    "doc": {
-                                        "$arrayElemAt": [
-                                            {
-                                                "$filter": {
-                                                    "input": "$agents_docs",
-                                                    "as": "doc",
-                                                    "cond": {
-                                                        "$eq": [
-                                                            {"$toString": "$$doc._id"},
-                                                            "$$ag.agent.id"
-                                                        ]
-                                                    }
-                                                }
-                                            },
-                                            0
-                                        ]
-                                    }
-                                },
-                                "in": {
-                                    "$mergeObjects": [
-                                        "$$ag",
+        }
+    },
+    {"$project": {"ai_model_doc": 0}},
+]
+
+
+# agentes da assistente com os dados do agente original
+_AGENTS_STAGES = [
+    {
+        "$lookup": {
+            "from": "agent",
+            "let": {"agent_ids": "$agents.agent.id"},
+            "pipeline": [
+                {
+                    "$match": {
+                        "$expr": {"$in": [{"$toString": "$_id"}, "$$agent_ids"]}
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 1,
+                        "name": 1,
+                        "description": 1,
+                        "system_message": 1,
+                        "enabled": 1,
+                        "contractor_id": 1,
+                        "functions": 1
+                    }
+                }
+            ],
+            "as": "agents_docs"
+        }
+    },
+
+    # === Adicionar detalhes dos agentes ===
+    {
+        "$addFields": {
+            "agents": {
+                "$map": {
+                    "input": "$agents",
+                    "as": "ag",
+                    "in": {
+                        "$let": {
+                            "vars": {
+                                "doc": {
+                                    "$arrayElemAt": [
                                         {
-                                            "agent": {
-                                                "id": "$$ag.agent.id",
-                                                "name": "$$doc.name",
-                                                "description": "$$doc.description",
-                                                "system_message": "$$doc.system_message",
-                                                "enabled": "$$doc.enabled",
-                                                "contractor_id": "$$doc.contractor_id"
-                                            },
-                                            "functions_full": "$$doc.functions"
-                                        }
+                                            "$filter": {
+                                                "input": "$agents_docs",
+                                                "as": "doc",
+                                                "cond": {
+                                                    "$eq": [
+                                                        {"$toString": "$$doc._id"},
+                                                        "$$ag.agent.id"
+                                                    ]
+                                                }
+                                            }
+                                        },
+                                        0
                                     ]
                                 }
+                            },
+                            "in": {
+                                "$mergeObjects": [
+                                    "$$ag",
+                                    {
+                                        "agent": {
+                                            "id": "$$ag.agent.id",
+                                            "name": "$$doc.name",
+                                            "description": "$$doc.description",
+                                            "system_message": "$$doc.system_message",
+                                            "enabled": "$$doc.enabled",
+                                            "contractor_id": "$$doc.contractor_id"
+                                        },
+                                        "functions_full": "$$doc.functions"
+                                    }
+                                ]
                             }
                         }
                     }
                 }
             }
-        },
+        }
+    },
+    {"$project": {"agents_docs": 0}},
+]
 
-        {"$project": {"agents_docs": 0}}
-    ]
 
-    docs = collection.aggregate(pipeline).to_list(length=1)
-    if not docs:
-        return None
+# etapas por campo do AssistantOutDetail (na ordem em que rodam)
+_FIELD_STAGES = {
+    "ai_model": _AI_MODEL_STAGES,
+    "agents": _AGENTS_STAGES,
+}
 
-    assistant = docs[0]
+
+def get_assistant_detail(id: str, source=collection, fields: Optional[List[str]] = None):
+    docs = get_assistant_details([ObjectId(id)], source=source, fields=fields)
+    return docs[0] if docs else None
+
+
+def get_assistant_details(ids: list[ObjectId], source=collection, fields: Optional[List[str]] = None) -> list[dict]:
+    """
+    Detalhe de vários assistentes: uma agregação para todos e um único `$in` por
+    collection no enriquecimento (ordem não garantida).
+    Com `fields` (campos do AssistantOutDetail), o documento é projetado logo após o
+    $match e só rodam os lookups e o enriquecimento dos campos pedidos.
+    """
+    pipeline = [{"$match": {"_id": {"$in": ids}}}]
+    if fields is not None:
+        pipeline.append({"$project": {"_id": 1, **{f: 1 for f in fields if f != "id"}}})
+
+    for name, stages in _FIELD_STAGES.items():
+        if fields is None or name in fields:
+            pipeline += stages
+
+    assistants = list(source.aggregate(pipeline))
+    if assistants and (fields is None or "agents" in fields):
+        _enrich_agents(assistants)
+    return assistants
+
+
+def _enrich_agents(assistants: list[dict]) -> None:
+    """Completa ai_model, funções e tools dos agentes de todas as assistentes (in-place)."""
+    agents = [ag for assistant in assistants for ag in assistant.get("agents") or []]
 
     # === Enriquecimento em Python ===
 
     # 1️⃣ Enriquecer ai_model dos agentes (igual ao da assistente)
     model_ids = []
 
-    for ag in assistant["agents"]:
+    for ag in agents:
         ai_model = ag.get("ai_model")
         if ai_model and ai_model.get("id"):
             model_ids.append(str(ai_model["id"]))  # converte aqui
@@ -166,7 +195,7 @@ def get_assistant_detail(id: str):
             )
         }
 
-        for ag in assistant["agents"]:
+        for ag in agents:
             ai_model = ag.get("ai_model")
             if ai_model and ai_model.get("id"):
                 model_id = str(ai_model["id"])
@@ -176,7 +205,7 @@ def get_assistant_detail(id: str):
                 }
 
     # 2️⃣ Enriquecer funções (usando agent.functions.code)
-    for ag in assistant["agents"]:
+    for ag in agents:
         func_map = {f["code"]: f for f in ag.get("functions_full", []) or []}
         for f in ag.get("functions", []):
             code = f["function"]["code"]
@@ -187,7 +216,7 @@ def get_assistant_detail(id: str):
 
     # 3️⃣ Enriquecer tools (usando credential_type)
     tool_ids = list(
-        {t["tool"]["id"] for ag in assistant["agents"] for t in ag.get("tools", [])}
+        {t["tool"]["id"] for ag in agents for t in ag.get("tools", [])}
     )
     if tool_ids:
         tool_docs = {
@@ -196,12 +225,10 @@ def get_assistant_detail(id: str):
                 {"_id": {"$in": [ObjectId(x) for x in tool_ids]}}
             )
         }
-        for ag in assistant["agents"]:
+        for ag in agents:
             for t in ag.get("tools", []):
                 t["tool"]["name"] = tool_docs.get(t["tool"]["id"])
 
-    return assistant
-
 
 def validate_tools(agent_config: dict, agent_payload: dict):
     """
@@ -217,6 +244,9 @@ def validate_tools(agent_config: dict, agent_payload: dict):
     if len(names) != len(set(names)):
         raise BusinessDomainError("Há tools com nomes duplicados no mesmo agente da assistente.")
 
+    # uma consulta para as tools do agente; as já lidas na requisição (outros agentes) não voltam ao banco
+    load_many(credential_type_collection, [cfg["tool"]["id"] for cfg in config_tools])
+
     # --- Validar regras de max e required ---
     for cfg in config_tools:
         tool_id = cfg["tool"]["id"]
@@ -224,7 +254,7 @@ def validate_tools(agent_config: dict, agent_payload: dict):
         required = cfg.get("required", False)
 
         # 🔍 Verificar se a tool_id é realmente um tipo de credencial válido
-        cred_doc = credential_type_collection.find_one({"_id": ObjectId(tool_id)})
+        cred_doc = load(credential_type_collection, tool_id)
 
         if not cred_doc:
             raise BusinessDomainError(f"A tool '{tool_id}' não foi encontrada.")
@@ -273,7 +303,7 @@ def validate_ai_model(credential_id: str):
     oid = ensure_object_id(credential_id)
 
     # --- Busca a credential ---
-    credential = credential_collection.find_one({"_id": oid})
+    credential = load(credential_collection, oid)
     if not credential:
         raise NotFoundError(f"Credential com id {credential_id} não existe.")
 
@@ -285,7 +315,7 @@ def validate_ai_model(credential_id: str):
     except Exception:
         raise BusinessDomainError("credential_type_id inválido (não é um ObjectId válido).")
 
-    credential_type = credential_type_collection.find_one({"_id": type_oid})
+    credential_type = load(credential_type_collection, type_oid)
     if not credential_type:
         raise NotFoundError(
             f"Modelo não existe."
@@ -295,4 +325,4 @@ def validate_ai_model(credential_id: str):
     if kind != "ai_models":
         raise BusinessDomainError(
             f"Credential {credential_id} não é um modelo válido."
-        )
\ No newline at end of file
+        )
@@ -1,12 +1,5 @@
-from pymongo import ASCENDING
-from app.dataprovider.mongo.base import db
+from app.dataprovider.mongo.base import db, db_read
 
 COLLECTION_NAME = "credential"
 collection = db[COLLECTION_NAME]
-
-# index
-collection.create_index(
-    [("description", ASCENDING), ("contractor_id", ASCENDING)],
-    unique=True,
-    name="uniq_description_contractor_id"
-)
+read_collection = db_read[COLLECTION_NAME]
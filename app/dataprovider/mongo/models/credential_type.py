@@ -1,6 +1,5 @@
-from app.dataprovider.mongo.base import db
+from app.dataprovider.mongo.base import db, db_read
 
 COLLECTION_NAME = "credential_type"
 collection = db[COLLECTION_NAME]
-
-collection.create_index("name", unique=True)
+read_collection = db_read[COLLECTION_NAME]
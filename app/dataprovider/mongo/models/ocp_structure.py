@@ -0,0 +1,205 @@
+"""
+Estruturas de OCP endereçadas por conteúdo.
+
+A estrutura convertida (`ocp.structure`) é gravada uma única vez na collection
+`ocp_structure` com `_id` = sha256 do JSON canônico; os documentos de OCP guardam
+apenas `ocp.structure_ref`. Vários contratantes que registram o mesmo servidor MCP
+passam a compartilhar o mesmo documento.
+
+Como o conteúdo de um hash nunca muda, o LRU em memória não precisa de invalidação.
+Documentos antigos (estrutura embutida) continuam sendo lidos normalmente.
+
+Uso:
+    python -m app.dataprovider.mongo.models.ocp_structure --migrate   # embutidas -> referência
+    python -m app.dataprovider.mongo.models.ocp_structure --gc        # remove estruturas órfãs
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+
+from app.dataprovider.mongo.base import db, db_read
+
+load_dotenv()
+
+COLLECTION_NAME = "ocp_structure"
+collection = db[COLLECTION_NAME]
+read_collection = db_read[COLLECTION_NAME]
+
+OCP_STRUCTURE_LRU_SIZE = int(os.getenv("OCP_STRUCTURE_LRU_SIZE", 256))
+
+
+class _LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: dict) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_lru = _LRU(OCP_STRUCTURE_LRU_SIZE)
+
+
+def structure_hash(structure: dict) -> str:
+    raw = json.dumps(structure, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def store_structure(structure: dict, ref: Optional[str] = None) -> str:
+    """
+    Grava a estrutura (se ainda não existir) e retorna o hash usado como referência.
+    `last_referenced_at` é renovado a cada chamada: é ele que protege do gc uma estrutura
+    órfã antiga que volta a ser referenciada.
+    """
+    ref = ref or structure_hash(structure)
+    now = datetime.now(timezone.utc)
+    try:
+        collection.update_one(
+            {"_id": ref},
+            {
+                "$setOnInsert": {"structure": structure, "created_at": now},
+                "$set": {"last_referenced_at": now},
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # upsert concorrente do mesmo conteúdo: o documento já existe
+        pass
+    _lru.put(ref, structure)
+    return ref
+
+
+def load_structures(refs: Iterable[str]) -> Dict[str, dict]:
+    """Carrega várias estruturas: LRU primeiro, o restante com uma única consulta `$in`."""
+    found: Dict[str, dict] = {}
+    missing: List[str] = []
+
+    for ref in set(refs):
+        cached = _lru.get(ref)
+        if cached is not None:
+            found[ref] = cached
+        else:
+            missing.append(ref)
+
+    if missing:
+        for doc in read_collection.find({"_id": {"$in": missing}}):
+            found[doc["_id"]] = doc["structure"]
+            _lru.put(doc["_id"], doc["structure"])
+
+        # secundário ainda sem a estrutura recém-criada: tenta no primário
+        still_missing = [ref for ref in missing if ref not in found]
+        if still_missing:
+            for doc in collection.find({"_id": {"$in": still_missing}}):
+                found[doc["_id"]] = doc["structure"]
+                _lru.put(doc["_id"], doc["structure"])
+
+    return found
+
+
+def dehydrate(ocp: dict, current_ref: Optional[str] = None) -> dict:
+    """
+    Troca `structure` por `structure_ref` (formato gravado no documento de OCP).
+    Se o hash for igual a `current_ref` (a referência já gravada), nada é escrito.
+    """
+    if "structure" not in ocp:
+        return ocp
+    stored = {k: v for k, v in ocp.items() if k != "structure"}
+    ref = structure_hash(ocp["structure"])
+    stored["structure_ref"] = ref if ref == current_ref else store_structure(ocp["structure"], ref)
+    return stored
+
+
+def hydrate_many(docs: List[dict]) -> List[dict]:
+    """
+    Preenche `ocp.structure` a partir de `ocp.structure_ref` (in-place).
+    As estruturas vêm do LRU compartilhado: trate-as como somente leitura.
+    """
+    refs = [
+        d["ocp"]["structure_ref"]
+        for d in docs
+        if d and isinstance(d.get("ocp"), dict) and "structure" not in d["ocp"] and d["ocp"].get("structure_ref")
+    ]
+    if refs:
+        structures = load_structures(refs)
+        for d in docs:
+            ocp = d.get("ocp") if d else None
+            if isinstance(ocp, dict) and "structure" not in ocp and ocp.get("structure_ref") in structures:
+                ocp["structure"] = structures[ocp["structure_ref"]]
+    return docs
+
+
+def hydrate(doc: Optional[dict]) -> Optional[dict]:
+    if doc:
+        hydrate_many([doc])
+    return doc
+
+
+def migrate_embedded() -> int:
+    """Converte OCPs com estrutura embutida para referência. Retorna quantos foram migrados."""
+    ocp_coll = db["ocp"]
+    migrated = 0
+    for doc in ocp_coll.find({"ocp.structure": {"$exists": True}}, {"ocp.structure": 1}):
+        ref = store_structure(doc["ocp"]["structure"])
+        result = ocp_coll.update_one(
+            {"_id": doc["_id"], "ocp.structure": doc["ocp"]["structure"]},
+            {"$set": {"ocp.structure_ref": ref}, "$unset": {"ocp.structure": ""}},
+        )
+        migrated += result.modified_count
+    return migrated
+
+
+def gc_orphans(grace_seconds: int = 3600) -> int:
+    """
+    Remove estruturas que nenhum OCP referencia mais. Retorna quantas foram removidas.
+    Estruturas referenciadas (store_structure) há menos de `grace_seconds` são mantidas:
+    um OCP pode estar sendo gravado com elas entre o distinct e o delete.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    stale = {"$or": [
+        {"last_referenced_at": {"$lt": cutoff}},
+        # gravadas antes de existir last_referenced_at
+        {"last_referenced_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+    ]}
+
+    referenced = set(db["ocp"].distinct("ocp.structure_ref"))
+    orphans = [doc["_id"] for doc in collection.find(stale, {"_id": 1}) if doc["_id"] not in referenced]
+    if not orphans:
+        return 0
+
+    # o filtro repete o corte: uma estrutura referenciada de novo depois do distinct fica
+    result = collection.delete_many({"_id": {"$in": orphans}, **stale})
+    return result.deleted_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção das estruturas de OCP endereçadas por conteúdo.")
+    parser.add_argument("--migrate", action="store_true", help="move estruturas embutidas para ocp_structure")
+    parser.add_argument("--gc", action="store_true", help="remove estruturas sem referência")
+    args = parser.parse_args()
+
+    if args.migrate:
+        print(f"migrados: {migrate_embedded()}")
+    if args.gc:
+        print(f"removidas: {gc_orphans()}")
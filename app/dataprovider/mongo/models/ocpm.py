@@ -1,23 +1,16 @@
-from app.dataprovider.mongo.base import db
-from pymongo import ASCENDING
+from app.dataprovider.mongo.base import db, db_read
 from bson import ObjectId
 from app.core.utils.mongo import ensure_object_id
 from uuid import UUID
 
 COLLECTION_NAME = "ocp-m"
 collection = db[COLLECTION_NAME]
-
-# index
-collection.create_index(
-    [("name", ASCENDING), ("contractor_id", ASCENDING)],
-    unique=True,
-    name="uniq_name_contractor_id"
-)
+read_collection = db_read[COLLECTION_NAME]
 
 
 from bson import ObjectId
 
-def get_ocpm_detail(id: str):
+def get_ocpm_detail(id: str, source=collection):
     pipeline = [
         {"$match": {"_id": ObjectId(id)}},
 
@@ -115,7 +108,7 @@ def get_ocpm_detail(id: str):
         }
     ]
 
-    cursor = collection.aggregate(pipeline)
+    cursor = source.aggregate(pipeline)
     docs = list(cursor)
     return docs[0] if docs else None
 
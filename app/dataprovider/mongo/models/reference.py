@@ -0,0 +1,177 @@
+"""
+Índice reverso de referências entre documentos ("quem usa X").
+
+Cada documento desta collection é uma aresta `source -> target` (ex.: `assistant:<id>`
+usa `agent:<id>`). As arestas de uma origem são recalculadas a partir do próprio documento
+sempre que ele é criado/alterado (`sync`) e removidas quando ele é excluído (`remove`).
+As consultas por alvo usam o índice `target` em vez de varrer caminhos de array nas
+collections de origem.
+
+Uso:
+    python -m app.dataprovider.mongo.models.reference --rebuild   # recria o índice a partir das collections
+"""
+import argparse
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.dataprovider.mongo.base import db, db_read
+
+COLLECTION_NAME = "reference"
+collection = db[COLLECTION_NAME]
+read_collection = db_read[COLLECTION_NAME]
+
+Ref = Tuple[str, str]  # (tipo, id)
+
+
+# ========= Extração das referências de cada tipo de documento =========
+
+def _ids(items: Optional[list], *path: str) -> List[str]:
+    found = []
+    for item in items or []:
+        value = item
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value:
+            found.append(str(value))
+    return found
+
+
+def _agent_refs(doc: dict) -> Iterable[Ref]:
+    for id in _ids(doc.get("ocps"), "id"):
+        yield "ocp", id
+    for id in _ids(doc.get("tags"), "id"):
+        yield "tag", id
+    for id in _ids(doc.get("tools"), "tool", "id"):
+        yield "credential_type", id
+
+
+def _assistant_refs(doc: dict) -> Iterable[Ref]:
+    agents = doc.get("agents")
+    for id in _ids(agents, "agent", "id"):
+        yield "agent", id
+    for id in _ids([doc.get("ai_model")], "id") + _ids(agents, "ai_model", "id"):
+        yield "credential", id
+    for agent in agents or []:
+        for id in _ids(agent.get("tools"), "tool", "id"):
+            yield "credential_type", id
+
+
+def _ocpm_refs(doc: dict) -> Iterable[Ref]:
+    for id in _ids(doc.get("tools"), "service", "id"):
+        yield "service", id
+
+
+def _service_refs(doc: dict) -> Iterable[Ref]:
+    if doc.get("authenticator_id"):
+        yield "authenticator", str(doc["authenticator_id"])
+
+
+def _credential_refs(doc: dict) -> Iterable[Ref]:
+    if doc.get("credential_type_id"):
+        yield "credential_type", str(doc["credential_type_id"])
+
+
+# tipo da origem (= nome da collection) -> extrator
+EXTRACTORS: Dict[str, Callable[[dict], Iterable[Ref]]] = {
+    "agent": _agent_refs,
+    "assistant": _assistant_refs,
+    "ocp-m": _ocpm_refs,
+    "service": _service_refs,
+    "credential": _credential_refs,
+}
+
+
+def _node(kind: str, id) -> str:
+    return f"{kind}:{id}"
+
+
+def _parse(node: str) -> Ref:
+    kind, _, id = node.partition(":")
+    return kind, id
+
+
+# ========= Manutenção =========
+
+def sync(kind: str, doc: Optional[dict]) -> None:
+    """Recalcula as arestas do documento `doc` (tipo `kind`) após create/update."""
+    if not doc or kind not in EXTRACTORS:
+        return
+
+    source = _node(kind, doc["_id"])
+    targets = sorted({_node(k, id) for k, id in EXTRACTORS[kind](doc)})
+
+    collection.delete_many({"source": source, "target": {"$nin": targets}})
+    if targets:
+        collection.bulk_write(
+            [
+                UpdateOne({"_id": f"{t}|{source}"}, {"$setOnInsert": {"target": t, "source": source}}, upsert=True)
+                for t in targets
+            ],
+            ordered=False,
+        )
+
+
+def remove(kind: str, id: str) -> None:
+    """Remove as arestas que saem do documento excluído."""
+    collection.delete_many({"source": _node(kind, id)})
+
+
+# ========= Consultas =========
+
+def dependents(kind: str, id: str, source_kind: Optional[str] = None) -> List[Ref]:
+    """Quem referencia `kind:id` diretamente (opcionalmente só origens de `source_kind`)."""
+    filtro = {"target": _node(kind, id)}
+    if source_kind:
+        filtro["source"] = {"$regex": f"^{source_kind}:"}
+    return [_parse(doc["source"]) for doc in collection.find(filtro, {"source": 1})]
+
+
+def has_dependents(kind: str, id: str, source_kind: Optional[str] = None) -> bool:
+    filtro = {"target": _node(kind, id)}
+    if source_kind:
+        filtro["source"] = {"$regex": f"^{source_kind}:"}
+    return collection.find_one(filtro, {"_id": 1}) is not None
+
+
+def transitive_dependents(kind: str, id: str) -> Set[Ref]:
+    """Todos os documentos que dependem de `kind:id`, direta ou indiretamente (ex.: ocp -> agent -> assistant)."""
+    seen: Set[str] = set()
+    frontier = deque([_node(kind, id)])
+
+    while frontier:
+        # um `$in` por nível do grafo
+        level = list(frontier)
+        frontier.clear()
+        for doc in collection.find({"target": {"$in": level}}, {"source": 1}):
+            if doc["source"] not in seen:
+                seen.add(doc["source"])
+                frontier.append(doc["source"])
+
+    return {_parse(node) for node in seen}
+
+
+def rebuild() -> int:
+    """Recria todas as arestas a partir das collections de origem. Retorna quantas origens foram lidas."""
+    count = 0
+    for kind in EXTRACTORS:
+        for doc in db[kind].find():
+            sync(kind, doc)
+            count += 1
+    # arestas de documentos que não existem mais
+    for doc in collection.find({}, {"source": 1}):
+        kind, id = _parse(doc["source"])
+        if ObjectId.is_valid(id) and db[kind].find_one({"_id": ObjectId(id)}, {"_id": 1}) is None:
+            collection.delete_one({"_id": doc["_id"]})
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção do índice reverso de referências.")
+    parser.add_argument("--rebuild", action="store_true", help="recalcula as arestas de todos os documentos")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"origens processadas: {rebuild()}")
@@ -1,13 +1,6 @@
-from app.dataprovider.mongo.base import db
-from pymongo import ASCENDING
+from app.dataprovider.mongo.base import db, db_read
 from bson import ObjectId
 
 COLLECTION_NAME = "service"
 collection = db[COLLECTION_NAME]
-
-# index
-collection.create_index(
-    [("name", ASCENDING), ("contractor_id", ASCENDING)],
-    unique=True,
-    name="uniq_name_contractor_id"
-)
+read_collection = db_read[COLLECTION_NAME]
@@ -1,18 +1,12 @@
-from app.dataprovider.mongo.base import db
-from pymongo import ASCENDING
+from app.dataprovider.mongo.base import db, db_read
 from bson import ObjectId
 from app.core.exceptions.types import NotFoundError 
 from app.core.utils.mongo import ensure_object_id
 
 COLLECTION_NAME = "tag"
 collection = db[COLLECTION_NAME]
+read_collection = db_read[COLLECTION_NAME]
 
-# index
-collection.create_index(
-    [("name", ASCENDING), ("tag_type", ASCENDING)],
-    unique=True,
-    name="uniq_name_tag_type"
-)
 
 def validate_existing_tags(tags: list[dict], tag_type: str):
     for t in tags:
@@ -23,4 +17,4 @@ def validate_existing_tags(tags: list[dict], tag_type: str):
         })
 
         if not exists:
-            raise NotFoundError(f"Tag com id {tag_id} não existe")
\ No newline at end of file
+            raise NotFoundError(f"Tag com id {tag_id} não existe")
@@ -0,0 +1,217 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+from pymongo import monitoring
+
+from app.core.logger_config import debug
+from app.core import request_loader, timing
+
+# Limites (em ms) dos buckets dos histogramas
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """
+    Histograma simples e thread-safe com buckets fixos (em ms).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value_ms)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value_ms
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+
+        buckets = {}
+        acc = 0
+        for limit, c in zip(self.buckets, counts):
+            acc += c
+            buckets[f"le_{limit}"] = acc
+        buckets["le_inf"] = total
+
+        return {
+            "count": total,
+            "sum_ms": round(total_sum, 3),
+            "avg_ms": round(total_sum / total, 3) if total else 0.0,
+            "buckets": buckets,
+        }
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """
+    Mede a latência de cada comando enviado ao Mongo (por nome do comando).
+    O tempo medido aqui é o tempo de ida e volta no servidor, sem o tempo de espera por conexão.
+    """
+
+    def __init__(self, slow_ms: float = 0):
+        self.slow_ms = slow_ms
+        self._histograms: Dict[str, Histogram] = {}
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, command_name: str) -> Histogram:
+        hist = self._histograms.get(command_name)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(command_name, Histogram())
+        return hist
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        duration_ms = event.duration_micros / 1000
+        self._histogram(event.command_name).observe(duration_ms)
+        if self.slow_ms and duration_ms >= self.slow_ms:
+            debug("[MONGO SLOW] %s %.1fms (db=%s)", event.command_name, duration_ms, event.database_name, event="mongo")
+
+    def failed(self, event):
+        duration_ms = event.duration_micros / 1000
+        self._histogram(event.command_name).observe(duration_ms)
+        with self._lock:
+            self._failures[event.command_name] = self._failures.get(event.command_name, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            names = list(self._histograms.keys())
+            failures = dict(self._failures)
+
+        return {
+            name: {**self._histograms[name].snapshot(), "failures": failures.get(name, 0)}
+            for name in sorted(names)
+        }
+
+
+class RequestCommandCounter(monitoring.CommandListener):
+    """
+    Conta os comandos enviados ao Mongo na requisição atual (app.core.request_loader).
+    O listener é chamado na mesma thread que executa o comando, que herda o contexto da requisição.
+    """
+
+    def started(self, event):
+        request_loader.count_command()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class StageTimingListener(monitoring.CommandListener):
+    """Soma o tempo dos comandos do Mongo na etapa "mongo" do Server-Timing (app.core.timing)."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        timing.record("mongo", event.duration_micros / 1000)
+
+    def failed(self, event):
+        timing.record("mongo", event.duration_micros / 1000)
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    """
+    Mede o tempo que a aplicação espera para obter uma conexão do pool (CMAP).
+    Espera alta com comandos rápidos indica gargalo na aplicação (pool pequeno);
+    comandos lentos com espera baixa indicam gargalo no Mongo.
+    """
+
+    def __init__(self):
+        self.wait = Histogram()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._checkout_failed = 0
+        self._created = 0
+        self._closed = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._closed += 1
+
+    def connection_check_out_started(self, event):
+        # o checkout acontece sempre na thread que executa o comando
+        self._local.started_at = time.perf_counter()
+
+    def _finish_wait(self) -> Optional[float]:
+        started_at = getattr(self._local, "started_at", None)
+        if started_at is None:
+            return None
+        self._local.started_at = None
+        return (time.perf_counter() - started_at) * 1000
+
+    def connection_check_out_failed(self, event):
+        self._finish_wait()
+        with self._lock:
+            self._checkout_failed += 1
+
+    def connection_checked_out(self, event):
+        waited = self._finish_wait()
+        if waited is not None:
+            self.wait.observe(waited)
+        with self._lock:
+            self._checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._checked_out -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            in_use = self._checked_out
+            failed = self._checkout_failed
+            open_connections = self._created - self._closed
+
+        return {
+            "wait": self.wait.snapshot(),
+            "in_use": in_use,
+            "open": open_connections,
+            "checkout_failed": failed,
+        }
+
+
+def listeners_snapshot(listeners: List[object]) -> dict:
+    """Monta um resumo dos listeners registrados no client."""
+    result = {}
+    for listener in listeners:
+        if isinstance(listener, CommandLatencyListener):
+            result["commands"] = listener.snapshot()
+        elif isinstance(listener, PoolWaitListener):
+            result["pool"] = listener.snapshot()
+    return result
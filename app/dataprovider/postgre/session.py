@@ -1,7 +1,7 @@
 import os
+import threading
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 
 # Carrega variáveis de ambiente do .env
 load_dotenv()
@@ -15,24 +15,97 @@ DB_NAME = os.getenv("DB_NAME")
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,           # testa a conexão antes de usar
-    pool_recycle=1800,            # recicla conexões após 30 min
-    pool_size=10,                 # ajuste conforme carga
-    max_overflow=20,              # conexões extras temporárias
-    # Para redes instáveis, ative keepalives TCP:
-    connect_args={
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-        # Se usa SSL obrigatório no server:
-        # "sslmode": "require",
-    },
-)
-
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+# Loga as queries antes de executar (em INFO)
+ENABLE_SQL_LOG = os.getenv("ENABLE_SQL_LOG", "0").lower() in ("1", "true", "yes")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# Sessões são criadas sem bind; o engine é associado na primeira utilização
+_session_factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+def get_engine():
+    """
+    Cria o engine (e o pool de conexões) apenas no primeiro uso,
+    evitando custo de import/conexão na subida da aplicação.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                _engine = create_engine(
+                    DATABASE_URL,
+                    pool_pre_ping=True,           # testa a conexão antes de usar
+                    pool_recycle=1800,            # recicla conexões após 30 min
+                    pool_size=10,                 # ajuste conforme carga
+                    max_overflow=20,              # conexões extras temporárias
+                    # Para redes instáveis, ative keepalives TCP:
+                    connect_args={
+                        "keepalives": 1,
+                        "keepalives_idle": 30,
+                        "keepalives_interval": 10,
+                        "keepalives_count": 5,
+                        # Se usa SSL obrigatório no server:
+                        # "sslmode": "require",
+                    },
+                )
+                _session_factory.configure(bind=_engine)
+
+                from app.core.metrics import METRICS_ENABLED, instrument_engine
+                if METRICS_ENABLED:
+                    instrument_engine(_engine)
+                if ENABLE_SQL_LOG:
+                    _log_queries(_engine)
+    return _engine
+
+
+def _log_queries(engine) -> None:
+    from sqlalchemy import event
+    from app.core.logger_config import info
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # amostrado/limitado pelo evento "sql" (ver app.core.logger_config)
+        info("➡️ SQL QUERY: %s", statement, params=parameters, event="sql")
+
+
+def warm_engine(min_connections: int = 1) -> None:
+    """Abre `min_connections` conexões simultâneas e as devolve ao pool já estabelecidas."""
+    from sqlalchemy import text
+
+    engine = get_engine()
+    conns = []
+    try:
+        for _ in range(max(1, min_connections)):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            conns.append(conn)
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def pool_stats() -> dict | None:
+    """Conexões do pool (None se o engine ainda não foi criado)."""
+    if _engine is None:
+        return None
+    pool = _engine.pool
+    return {"in_use": pool.checkedout(), "idle": pool.checkedin(), "overflow": pool.overflow(), "size": pool.size()}
+
+
+def dispose_engine() -> None:
+    """Fecha as conexões do pool, se o engine chegou a ser criado."""
+    if _engine is not None:
+        _engine.dispose()
+
+
+def SessionLocal() -> Session:
+    get_engine()
+    return _session_factory()
+
 
 def get_db():
     db = SessionLocal()
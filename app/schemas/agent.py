@@ -1,10 +1,11 @@
 import os
 from dotenv import load_dotenv
 
-from typing import List, Optional, Any, Literal
+from typing import ClassVar, Dict, List, Optional, Any, Literal
 from uuid import UUID
 from pydantic import ConfigDict, BaseModel, Field, model_validator, field_validator
 from app.core.exceptions.types import NotFoundError, BadRequestError
+from app.schemas.trusted import trusted
 from bson import ObjectId
 import json
 
@@ -95,6 +96,30 @@ class AgentUpdate(AgentBase):
     tags: List[TagCreateOrUpdate]
     tools: Optional[List[ToolInfoCreateOrUpdate]] = None
 
+class AgentPatch(BaseModel):
+    """PATCH: só os campos enviados são alterados; null remove os campos opcionais."""
+    name: Optional[str] = Field(None, max_length=150)
+    description: Optional[str] = Field(None, max_length=2048)
+    system_message: Optional[str] = None
+    enabled: Optional[bool] = None
+    ocps: Optional[List[OCPCreateOrUpdate]] = None
+    tags: Optional[List[TagCreateOrUpdate]] = None
+    functions: Optional[List[Function]] = None
+    tools: Optional[List[ToolInfoCreateOrUpdate]] = None
+
+    REQUIRED: ClassVar[tuple] = ("name", "description", "system_message", "enabled", "ocps", "tags")
+
+    @model_validator(mode="after")
+    def validate_patch(self):
+        for name in self.REQUIRED:
+            if name in self.model_fields_set and getattr(self, name) is None:
+                raise BadRequestError(f"O campo '{name}' não pode ser nulo.")
+
+        codes = [f.code for f in self.functions or []]
+        if len(codes) != len(set(codes)):
+            raise BadRequestError("Os códigos das funções devem ser únicos dentro do agente.")
+        return self
+
 #OUTPUTS
 class AgentOutList(BaseModel):
     id: str
@@ -105,24 +130,27 @@ class AgentOutList(BaseModel):
 
     model_config = ConfigDict(populate_by_name=True)
 
+    mongo_fields: ClassVar[Dict[str, str]] = {"image": "has_image"}
+
     @classmethod
     def from_raw(cls, doc: dict) -> Optional["AgentOutList"]:
         if not doc:
             return None
 
-        return cls(
+        return trusted(cls, dict(
             id=str(doc["_id"]),
             name=doc.get("name"),
             description=doc.get("description"),
             image=f"{URL_BASE_IMG_PUBLIC}/agents/{doc.get('_id')}" if doc.get("has_image") else None,
             enabled=doc.get("enabled"),
-        )
+        ))
 
 class AgentOutDetail(AgentBase):
     id: str
     ocps: List[OCP]
     image: Optional[str]
     tools: List[ToolInfo]
+    doc_version: Optional[int] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -140,31 +168,28 @@ class AgentOutDetail(AgentBase):
 
         ocps = []
         for o in doc.get("ocps", []):
-            ocps.append(
-                OCP(
-                    id=str(o.get("id")),
-                    name=o.get("name"),
-                    type=o.get("type")
-                ))
+            ocps.append({
+                "id": str(o.get("id")),
+                "name": o.get("name"),
+                "type": o.get("type"),
+            })
 
         tools = []
         for t in doc.get("tools", []):
             if "tool" in t:
                 tool_data = t["tool"]
-                tools.append(
-                    ToolInfo(
-                        tool=Tool(
-                            id=str(tool_data.get("id")),
-                            name=tool_data.get("name"),
-                            scope=tool_data.get("scope"),
-                        ),
-                        code=t.get("code"),
-                        name=t.get("name"),
-                        required=t.get("required", False)
-                    )
-                )
-
-        return cls(
+                tools.append({
+                    "tool": {
+                        "id": str(tool_data.get("id")),
+                        "name": tool_data.get("name"),
+                        "scope": tool_data.get("scope"),
+                    },
+                    "code": t.get("code"),
+                    "name": t.get("name"),
+                    "required": t.get("required", False),
+                })
+
+        return trusted(cls, dict(
             id=str(doc["_id"]),
             name=doc.get("name"),
             description=doc.get("description"),
@@ -175,7 +200,8 @@ class AgentOutDetail(AgentBase):
             ocps=ocps,
             functions=doc.get("functions"),
             tools=tools,
-        )
+            doc_version=doc.get("doc_version"),
+        ))
 
 class AgentOutInternal(AgentBase):
     id: str
@@ -183,6 +209,7 @@ class AgentOutInternal(AgentBase):
     contractor_id: Optional[str] = None
     ocps: List[OCP]
     tools: List[ToolInfo]
+    doc_version: Optional[int] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -200,31 +227,28 @@ class AgentOutInternal(AgentBase):
 
         ocps = []
         for o in doc.get("ocps", []):
-            ocps.append(
-                OCP(
-                    id=str(o.get("id")),
-                    name=o.get("name"),
-                    type=o.get("type")
-                ))
+            ocps.append({
+                "id": str(o.get("id")),
+                "name": o.get("name"),
+                "type": o.get("type"),
+            })
 
         tools = []
         for t in doc.get("tools", []):
             if "tool" in t:
                 tool_data = t["tool"]
-                tools.append(
-                    ToolInfo(
-                        tool=Tool(
-                            id=str(tool_data.get("id")),
-                            name=tool_data.get("name"),
-                            scope=tool_data.get("scope"),
-                        ),
-                        code=t.get("code"),
-                        name=t.get("name"),
-                        required=t.get("required", False)
-                    )
-                )
-
-        return cls(
+                tools.append({
+                    "tool": {
+                        "id": str(tool_data.get("id")),
+                        "name": tool_data.get("name"),
+                        "scope": tool_data.get("scope"),
+                    },
+                    "code": t.get("code"),
+                    "name": t.get("name"),
+                    "required": t.get("required", False),
+                })
+
+        return trusted(cls, dict(
             id=str(doc["_id"]),
             name=doc.get("name"),
             description=doc.get("description"),
@@ -236,4 +260,5 @@ class AgentOutInternal(AgentBase):
             ocps=ocps,
             functions=doc.get("functions"),
             tools=tools,
-        )
+            doc_version=doc.get("doc_version"),
+        ))
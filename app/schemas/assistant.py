@@ -1,7 +1,8 @@
-from typing import List, Optional, Any
+from typing import ClassVar, List, Optional, Any
 from uuid import UUID
-from pydantic import BaseModel, Field, field_validator
-from app.core.exceptions.types import NotFoundError
+from pydantic import BaseModel, Field, field_validator, model_validator
+from app.core.exceptions.types import NotFoundError, BadRequestError
+from app.schemas.trusted import trusted
 from bson import ObjectId
 
 class Function(BaseModel):
@@ -108,6 +109,24 @@ class AssistantUpdate(AssistantBase):
     profiles: Optional[List[ProfileCreateOrUpdate]] = None
     agents: Optional[List[AgentAssistantCreateOrUpdate]] = None
 
+class AssistantPatch(BaseModel):
+    """PATCH: só os campos enviados são alterados; null remove os campos opcionais."""
+    name: Optional[str] = Field(None, max_length=150)
+    description: Optional[str] = Field(None, max_length=2048)
+    enabled: Optional[bool] = None
+    ai_model: Optional[AiModelCreateOrUpdate] = None
+    profiles: Optional[List[ProfileCreateOrUpdate]] = None
+    agents: Optional[List[AgentAssistantCreateOrUpdate]] = None
+
+    REQUIRED: ClassVar[tuple] = ("name", "description", "enabled", "ai_model")
+
+    @model_validator(mode="after")
+    def validate_required(self):
+        for name in self.REQUIRED:
+            if name in self.model_fields_set and getattr(self, name) is None:
+                raise BadRequestError(f"O campo '{name}' não pode ser nulo.")
+        return self
+
 #OUTPUTS
 class AssistantOutList(AssistantBase):
     id: str
@@ -117,12 +136,12 @@ class AssistantOutList(AssistantBase):
         if not doc:
             return None
 
-        return cls(
+        return trusted(cls, dict(
             id=str(doc["_id"]),
             name=doc.get("name"),
             description=doc.get("description"),
             enabled=doc.get("enabled"),
-        )
+        ))
 
 class AssistantOutDetail(BaseModel):
     id: str
@@ -133,6 +152,7 @@ class AssistantOutDetail(BaseModel):
     ai_model: Optional[AiModel]
     profiles: Optional[List[Profile]] = None
     agents: Optional[List[AgentAssistant]] = None
+    doc_version: Optional[int] = None
 
     @classmethod
     def from_raw(cls, doc: dict) -> Optional["AssistantOutDetail"]:
@@ -143,28 +163,26 @@ class AssistantOutDetail(BaseModel):
         for a in doc.get("agents", []):
             if "agent" in a:
                 agent_data = a["agent"]
-                agents.append(
-                    AgentAssistant(
-                        agent=Agent(
-                            id=str(agent_data.get("id")),
-                            name=agent_data.get("name"),
-                            description=agent_data.get("description"),
-                            system_message=agent_data.get("system_message"),
-                            id_public=agent_data.get("id_public"),
-                            enabled=agent_data.get("enabled"),
-                            contractor_id=agent_data.get("contractor_id"),
-                        ),
-                        name=a.get("name"),
-                        system_message_compl=a.get("system_message_compl"),
-                        secret=a.get("secret"),
-                        enabled=a.get("enabled"),
-                        profiles=a.get("profiles"),
-                        functions=a.get("functions"),
-                        tools=a.get("tools"),
-                    )
-                )
-
-        return cls(
+                agents.append({
+                    "agent": {
+                        "id": str(agent_data.get("id")),
+                        "name": agent_data.get("name"),
+                        "description": agent_data.get("description"),
+                        "system_message": agent_data.get("system_message"),
+                        "id_public": agent_data.get("id_public"),
+                        "enabled": agent_data.get("enabled"),
+                        "contractor_id": agent_data.get("contractor_id"),
+                    },
+                    "name": a.get("name"),
+                    "system_message_compl": a.get("system_message_compl"),
+                    "secret": a.get("secret"),
+                    "enabled": a.get("enabled"),
+                    "profiles": a.get("profiles"),
+                    "functions": a.get("functions"),
+                    "tools": a.get("tools"),
+                })
+
+        return trusted(cls, dict(
             id=str(doc["_id"]),
             name=doc.get("name"),
             description=doc.get("description"),
@@ -172,8 +190,9 @@ class AssistantOutDetail(BaseModel):
             enabled=doc.get("enabled"),
             ai_model=doc.get("ai_model"),
             profiles=doc.get("profiles"),
-            agents=agents
-        )
+            agents=agents,
+            doc_version=doc.get("doc_version"),
+        ))
 
 class AssistantOutInternal(BaseModel):
     id: str
@@ -184,6 +203,8 @@ class AssistantOutInternal(BaseModel):
     ai_model: Optional[AiModel]
     profiles: Optional[List[Profile]] = None
     agents: Optional[List[AgentAssistant]] = None
+    contractor_id: Optional[str] = None
+    doc_version: Optional[int] = None
 
     @classmethod
     def from_raw(cls, doc: dict) -> Optional["AssistantOutInternal"]:
@@ -195,29 +216,27 @@ class AssistantOutInternal(BaseModel):
             if "agent" in a:
                 agent_data = a["agent"]
 
-                agents.append(
-                    AgentAssistant(
-                        agent=Agent(
-                            id=str(agent_data.get("id")),
-                            name=agent_data.get("name"),
-                            description=agent_data.get("description"),
-                            system_message=agent_data.get("system_message"),
-                            id_public=agent_data.get("id_public"),
-                            enabled=agent_data.get("enabled"),
-                            contractor_id=agent_data.get("contractor_id"),
-                        ),
-                        name=a.get("name"),
-                        system_message_compl=a.get("system_message_compl"),
-                        secret=a.get("secret"),
-                        enabled=a.get("enabled"),
-                        ai_model=a.get("ai_model"),
-                        profiles=a.get("profiles"),
-                        functions=a.get("functions"),
-                        tools=a.get("tools"),
-                    )
-                )
-
-        return cls(
+                agents.append({
+                    "agent": {
+                        "id": str(agent_data.get("id")),
+                        "name": agent_data.get("name"),
+                        "description": agent_data.get("description"),
+                        "system_message": agent_data.get("system_message"),
+                        "id_public": agent_data.get("id_public"),
+                        "enabled": agent_data.get("enabled"),
+                        "contractor_id": agent_data.get("contractor_id"),
+                    },
+                    "name": a.get("name"),
+                    "system_message_compl": a.get("system_message_compl"),
+                    "secret": a.get("secret"),
+                    "enabled": a.get("enabled"),
+                    "ai_model": a.get("ai_model"),
+                    "profiles": a.get("profiles"),
+                    "functions": a.get("functions"),
+                    "tools": a.get("tools"),
+                })
+
+        return trusted(cls, dict(
             id=str(doc["_id"]),
             name=doc.get("name"),
             description=doc.get("description"),
@@ -225,5 +244,7 @@ class AssistantOutInternal(BaseModel):
             enabled=doc.get("enabled"),
             ai_model=doc.get("ai_model"),
             profiles=doc.get("profiles"),
-            agents=agents
-        )
\ No newline at end of file
+            agents=agents,
+            contractor_id=doc.get("contractor_id"),
+            doc_version=doc.get("doc_version"),
+        ))
\ No newline at end of file
@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, field_validator, RootModel
 
+from app.schemas.trusted import trusted
+
 
 # ======== MODELOS INTERNOS (EM CAMADAS) ========
 
@@ -81,27 +83,26 @@ class AuthenticatorOutList(BaseModel):
     def from_raw(cls, doc: dict) -> Optional["AuthenticatorOutList"]:
         if not doc:
             return None
-        return cls(
+        return trusted(cls, dict(
             id=str(doc.get("_id")),
             name=doc.get("name"),
             url=doc.get("url"),
             method=doc.get("method"),
             enabled=doc.get("enabled", True)
-        )
+        ))
 
 
 # ======== OUTPUT DETAIL ========
 
 class AuthenticatorOutDetail(AuthenticatorBase):
     id: str
+    doc_version: Optional[int] = None
 
     @classmethod
-    def from_raw(cls, doc: dict) -> Optional["AuthenticatorOutDetail"]:
-        if not doc:
-            return None
-
-        import copy
-        data = copy.deepcopy(doc)
+    def mask_raw(cls, doc: dict) -> dict:
+        """Cópia do documento com os valores de body e headers ocultos."""
+        # cópia rasa: body e headers são substituídos por dicts novos, nada é alterado in-place
+        data = dict(doc)
 
         # Oculta valores sensíveis do body
         try:
@@ -117,13 +118,23 @@ class AuthenticatorOutDetail(AuthenticatorBase):
         except Exception:
             pass
 
-        return cls(
+        return data
+
+    @classmethod
+    def from_raw(cls, doc: dict) -> Optional["AuthenticatorOutDetail"]:
+        if not doc:
+            return None
+
+        data = cls.mask_raw(doc)
+
+        return trusted(cls, dict(
             id=str(data.get("_id")),
             name=data.get("name"),
             url=data.get("url"),
             method=data.get("method"),
-            body=data.get("body", {}),
-            headers=data.get("headers", {}),
+            body=data.get("body") or {},
+            headers=data.get("headers") or {},
             response_map=data.get("response_map"),
             enabled=data.get("enabled", True),
-        )
+            doc_version=data.get("doc_version"),
+        ))
@@ -0,0 +1,21 @@
+import os
+from typing import Generic, List, TypeVar
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+load_dotenv()
+
+BATCH_GET_MAX_IDS = int(os.getenv("BATCH_GET_MAX_IDS", 100))
+
+T = TypeVar("T")
+
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BATCH_GET_MAX_IDS)
+
+
+class BatchGetOut(BaseModel, Generic[T]):
+    # na ordem dos ids pedidos
+    items: List[T] = Field(default_factory=list)
+    missing: List[str] = Field(default_factory=list)
@@ -57,6 +57,27 @@ class CredentialOutList(BaseModel):
         )
 
 
+class CredentialOutRef(BaseModel):
+    """Credencial sem os segredos (`credentials`), para respostas compostas como o runtime bundle."""
+    id: str
+    description: Optional[str] = None
+    enabled: bool = True
+    credential_type_id: Optional[str] = None
+
+    @classmethod
+    def from_raw(cls, doc: Union[dict, "CredentialOutRef"]) -> Optional["CredentialOutRef"]:
+        if not doc:
+            return None
+        if isinstance(doc, cls):
+            return doc
+        return cls(
+            id=str(doc["_id"]) if isinstance(doc.get("_id"), (ObjectId, str)) else str(doc.get("_id")),
+            description=doc.get("description"),
+            enabled=doc.get("enabled", True),
+            credential_type_id=doc.get("credential_type_id"),
+        )
+
+
 class CredentialOutDetail(CredentialBase):
     id: str
 
@@ -51,6 +51,7 @@ class CredentialTypeOutDetail(CredentialTypeBase):
     id: str
     image: Optional[str]
     scope: Optional[Scope] = None
+    doc_version: Optional[int] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -64,5 +65,6 @@ class CredentialTypeOutDetail(CredentialTypeBase):
             kind=doc.get("kind"),
             image=f"{URL_BASE_IMG_PUBLIC}/credentials_types/{doc.get('_id')}" if doc.get("has_image") else None,
             enabled=doc.get("enabled", True),
-            scope=doc.get("scope")
+            scope=doc.get("scope"),
+            doc_version=doc.get("doc_version"),
         )
@@ -1,22 +1,29 @@
+from datetime import datetime, timezone
 from typing import Optional, TypeVar, Any, Dict
 from fastapi import status as http_status
 from starlette.responses import JSONResponse
-from pydantic import BaseModel
+from pydantic_core import to_json
 
-from .http_response import HttpResponse, T  # assumindo que HttpResponse[T] é um BaseModel genérico
+from app.core import timing
 
 T = TypeVar("T")
 
 
-# 🔧 Helper recursivo: mantém `null` dentro de `data`
-def _dump_with_nulls(obj: Any):
-    if isinstance(obj, BaseModel):
-        return obj.model_dump(exclude_none=False)
-    if isinstance(obj, list):
-        return [_dump_with_nulls(x) for x in obj]
-    if isinstance(obj, dict):
-        return {k: _dump_with_nulls(v) for k, v in obj.items()}
-    return obj
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse serializado pelo pydantic-core (Rust) em uma única passada:
+    models Pydantic dentro de `data` são serializados direto, sem model_dump intermediário.
+    Mesma saída compacta do JSONResponse (sem espaços, UTF-8 sem escape).
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timing.stage("serialize"):
+            return to_json(content, by_alias=False)
+
+
+def _strip(value: Optional[str]) -> Optional[str]:
+    # HttpResponse usa str_strip_whitespace=True
+    return value.strip() if isinstance(value, str) else value
 
 
 # 🔧 Helper genérico para montar resposta padronizada
@@ -27,23 +34,30 @@ def _build_response(
     success: bool = True,
     total: Optional[int] = None,
     pages: Optional[int] = None,
-    errors: Optional[Dict[str, str]] = None
-) -> JSONResponse:
-    response_model = HttpResponse[T](
-        message=message,
-        status=status_code,
-        success=success,
-        total=total,
-        pages=pages,
-        errors=errors,
-        data=data,
-    )
-
-    # Oculta None no topo, mas mantém `data` com nulls
-    content = response_model.model_dump(exclude_none=True)
-    content["data"] = _dump_with_nulls(data)
-
-    return JSONResponse(status_code=status_code, content=content)
+    errors: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> FastJSONResponse:
+    # Mesmo contrato de HttpResponse[T].model_dump(exclude_none=True): None some do topo,
+    # exceto `data`, que é sempre enviado (mantendo os nulls internos).
+    content: Dict[str, Any] = {}
+    if message is not None:
+        content["message"] = _strip(message)
+    content["status"] = status_code
+    content["success"] = success
+    content["date"] = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    if total is not None:
+        content["total"] = total
+    if pages is not None:
+        content["pages"] = pages
+    if data is not None:
+        content["data"] = data
+    if errors is not None:
+        content["errors"] = {_strip(k): _strip(v) for k, v in errors.items()}
+    if data is None:
+        # no formato anterior `data` nulo era reinserido ao final do envelope
+        content["data"] = None
+
+    return FastJSONResponse(status_code=status_code, content=content, headers=headers)
 
 
 # ✅ OK (consulta/listagem)
@@ -53,15 +67,16 @@ def ok(
     total: Optional[int] = None,
     pages: Optional[int] = None,
     status_code: int = http_status.HTTP_200_OK,
-) -> JSONResponse:
-    return _build_response(data, message, status_code, True, total, pages)
+    headers: Optional[Dict[str, str]] = None,
+) -> FastJSONResponse:
+    return _build_response(data, message, status_code, True, total, pages, headers=headers)
 
 
 # ✅ Created
 def created(
     data: Optional[T] = None,
     message: Optional[str] = None,
-) -> JSONResponse:
+) -> FastJSONResponse:
     return _build_response(
         data,
         message or "Registro criado com sucesso!",
@@ -73,7 +88,7 @@ def created(
 def updated(
     data: Optional[T] = None,
     message: Optional[str] = None,
-) -> JSONResponse:
+) -> FastJSONResponse:
     return _build_response(
         data,
         message or "Registro atualizado com sucesso!",
@@ -85,7 +100,7 @@ def updated(
 def deleted(
     data: Optional[T] = None,
     message: Optional[str] = None,
-) -> JSONResponse:
+) -> FastJSONResponse:
     return _build_response(
         data,
         message or "Registro excluído com sucesso!",
@@ -98,7 +113,7 @@ def error(
     message: str,
     status_code: int = http_status.HTTP_400_BAD_REQUEST,
     errors: Optional[Dict[str, str]] = None,
-) -> JSONResponse:
+) -> FastJSONResponse:
     return _build_response(
         data=None,
         message=message,
@@ -109,7 +124,7 @@ def error(
 
 
 # ✅ Acesso negado
-def negado() -> JSONResponse:
+def negado() -> FastJSONResponse:
     return _build_response(
         data=None,
         message="Acesso negado",
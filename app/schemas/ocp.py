@@ -1,6 +1,8 @@
-from typing import Any, Dict, List, Optional, Literal
+from typing import Any, ClassVar, Dict, List, Optional, Literal
 from pydantic import BaseModel, Field, field_validator
 
+from app.schemas.trusted import trusted
+
 OCPType = Literal["mcp", "ocp-m", "langserve"]
 
 class SourceModel(BaseModel):
@@ -76,6 +78,10 @@ class OCPCreate(BaseModel):
     source: SourceCreate
 
 
+class OCPBulkCreate(BaseModel):
+    items: List[OCPCreate] = Field(..., min_length=1, max_length=500)
+
+
 class SourceUpdate(BaseModel):
     url: str
     headers: Optional[Dict[str, Any]] = Field(default_factory=dict)
@@ -98,41 +104,60 @@ class OCPUpdate(BaseModel):
 class OCPOutList(OCPBase):
     type: str
 
+    mongo_fields: ClassVar[Dict[str, str]] = {"type": "ocp.metadata.source.type"}
+
     @classmethod
     def from_raw(cls, doc: dict) -> Optional["OCPOutList"]:
         if not doc:
             return None
-        return cls(
+        return trusted(cls, dict(
             id=str(doc.get("_id")),
             name=doc.get("name"),
             type=doc.get("ocp").get("metadata").get("source").get("type"),
             enabled=doc.get("enabled", True),
             ocp=doc.get("ocp")
-        )
+        ))
 
 class OCPOutDetail(OCPBase):
     ocp: OCPModel
+    doc_version: Optional[int] = None
 
     @classmethod
-    def from_raw(cls, doc: dict) -> Optional["OCPOutDetail"]:
-        if not doc:
-            return None
-
-        # Faz uma cópia profunda de ocp (para não alterar o doc original)
-        import copy
-        ocp_data = copy.deepcopy(doc.get("ocp", {}))
+    def mask_raw(cls, doc: dict) -> dict:
+        """Cópia do documento com os valores dos headers da origem ocultos."""
+        # Copia só o caminho até os headers: a estrutura (que pode vir do LRU
+        # compartilhado de ocp_structure) é reaproveitada sem cópia
+        data = dict(doc)
+        if "ocp" not in data:
+            return data
+        ocp_data = dict(data.get("ocp") or {})
 
         # Procura por headers em ocp.metadata.source.headers
         try:
-            headers = ocp_data.get("metadata", {}).get("source", {}).get("headers", {})
+            metadata = dict(ocp_data["metadata"])
+            source = dict(metadata["source"])
+            headers = source.get("headers") or {}
             if isinstance(headers, dict):
-                ocp_data["metadata"]["source"]["headers"] = {k: "****" for k in headers.keys()}
+                source["headers"] = {k: "****" for k in headers.keys()}
+            metadata["source"] = source
+            ocp_data["metadata"] = metadata
         except Exception:
             pass  # Evita erro caso alguma chave intermediária não exista
 
-        return cls(
-            id=str(doc.get("_id")),
-            name=doc.get("name"),
-            enabled=doc.get("enabled", True),
-            ocp=ocp_data
-        )
+        data["ocp"] = ocp_data
+        return data
+
+    @classmethod
+    def from_raw(cls, doc: dict) -> Optional["OCPOutDetail"]:
+        if not doc:
+            return None
+
+        data = cls.mask_raw(doc)
+
+        return trusted(cls, dict(
+            id=str(data.get("_id")),
+            name=data.get("name"),
+            enabled=data.get("enabled", True),
+            ocp=data.get("ocp", {}),
+            doc_version=data.get("doc_version"),
+        ))
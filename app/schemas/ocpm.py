@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, field_validator
 
+from app.schemas.trusted import trusted
+
 
 # ======== MODELOS INTERNOS ========
 
@@ -64,11 +66,11 @@ class OCPMOutList(BaseModel):
     def from_raw(cls, doc: dict) -> Optional["OCPMOutList"]:
         if not doc:
             return None
-        return cls(
+        return trusted(cls, dict(
             id=str(doc.get("_id")),
             name=doc.get("name"),
             description=doc.get("description"),
-        )
+        ))
 
 
 # ======== OUTPUT DETAIL ========
@@ -81,12 +83,10 @@ class OCPMOutDetail(OCPMBase):
         if not doc:
             return None
 
-        import copy
-        data = copy.deepcopy(doc)
-
-        return cls(
-            id=str(data.get("_id")),
-            name=data.get("name"),
-            description=data.get("description"),
-            tools=data.get("tools", []),
-        )
+        # dados do próprio banco: sem cópia e sem revalidação (o ensure_list vira o `or []`)
+        return trusted(cls, dict(
+            id=str(doc.get("_id")),
+            name=doc.get("name"),
+            description=doc.get("description"),
+            tools=doc.get("tools") or [],
+        ))
@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, field_validator
 
+from app.schemas.trusted import trusted
+
 
 # ======== MODELOS INTERNOS ========
 
@@ -84,27 +86,26 @@ class ServiceOutList(BaseModel):
     def from_raw(cls, doc: dict) -> Optional["ServiceOutList"]:
         if not doc:
             return None
-        return cls(
+        return trusted(cls, dict(
             id=str(doc.get("_id")),
             name=doc.get("name"),
             description=doc.get("description"),
             url=doc.get("url"),
             method=doc.get("method"),
-        )
+        ))
 
 
 # ======== OUTPUT DETAIL ========
 
 class ServiceOutDetail(ServiceBase):
     id: str
+    doc_version: Optional[int] = None
 
     @classmethod
-    def from_raw(cls, doc: dict) -> Optional["ServiceOutDetail"]:
-        if not doc:
-            return None
-
-        import copy
-        data = copy.deepcopy(doc)
+    def mask_raw(cls, doc: dict) -> dict:
+        """Cópia do documento com os valores dos headers ocultos."""
+        # cópia rasa: os headers são substituídos por uma lista nova, nada é alterado in-place
+        data = dict(doc)
 
         # 🔹 Oculta valores dos headers
         try:
@@ -122,13 +123,23 @@ class ServiceOutDetail(ServiceBase):
         except Exception:
             pass
 
-        return cls(
+        return data
+
+    @classmethod
+    def from_raw(cls, doc: dict) -> Optional["ServiceOutDetail"]:
+        if not doc:
+            return None
+
+        data = cls.mask_raw(doc)
+
+        return trusted(cls, dict(
             id=str(data.get("_id")),
             name=data.get("name"),
             description=data.get("description"),
             url=data.get("url"),
             method=data.get("method"),
-            headers=data.get("headers", []),
+            headers=data.get("headers") or [],
             authenticator_id=data.get("authenticator_id"),
             input_schema=data.get("input_schema"),
-        )
+            doc_version=data.get("doc_version"),
+        ))
@@ -0,0 +1,116 @@
+"""
+Construção sem validação para dados vindos do nosso próprio banco.
+
+Os documentos do Mongo já foram validados na escrita; revalidar campo a campo a cada
+leitura só custa CPU. `trusted(Model, data)` monta o modelo com `model_construct`,
+descendo nos campos que são modelos (ou listas, dicts e Optional de modelos) para que a árvore
+inteira continue tipada — `model_dump`/serialização funcionam como no caminho validado.
+
+Os validators que normalizam o formato continuam valendo: os `field_validator(mode="before")`
+de cada campo (ex.: headers `[]`/None -> `{}` em documentos antigos) rodam sobre o valor bruto,
+e os `model_validator(mode="after")` sobre o modelo montado. Validators "after" de campo
+(checagem de tipo/formato da entrada) não rodam.
+
+O plano de conversão de cada classe é calculado uma única vez.
+Use apenas com dados de origem confiável; entrada de usuário continua em `Model(...)`.
+"""
+import inspect
+import types
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+_Converter = Optional[Callable[[Any], Any]]
+
+
+def _converter(annotation: Any) -> _Converter:
+    """Função que converte o valor bruto do campo (None = repassa como está)."""
+    origin = get_origin(annotation)
+
+    if origin is Union or origin is types.UnionType:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        # uniões de vários tipos não têm como ser resolvidas sem validar: repassa
+        return _converter(args[0]) if len(args) == 1 else None
+
+    if origin in (list, List):
+        args = get_args(annotation)
+        inner = _converter(args[0]) if args else None
+        if inner is None:
+            return None
+        return lambda v: [inner(x) for x in v] if isinstance(v, list) else v
+
+    if origin in (dict, Dict):
+        args = get_args(annotation)
+        inner = _converter(args[1]) if len(args) == 2 else None
+        if inner is None:
+            return None
+        return lambda v: {k: inner(x) for k, x in v.items()} if isinstance(v, dict) else v
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return lambda v: trusted(annotation, v) if isinstance(v, dict) else v
+
+    return None
+
+
+def _takes_value_only(func: Callable) -> bool:
+    # validators com `info` dependem do contexto de validação, que aqui não existe
+    try:
+        return len(inspect.signature(func).parameters) == 1
+    except (TypeError, ValueError):
+        return False
+
+
+def _before_validators(model_cls: Type[BaseModel], name: str) -> Tuple[Callable[[Any], Any], ...]:
+    validators = [
+        dec.func
+        for dec in model_cls.__pydantic_decorators__.field_validators.values()
+        if dec.info.mode == "before" and (name in dec.info.fields or "*" in dec.info.fields)
+        and _takes_value_only(dec.func)
+    ]
+    # o pydantic aplica os "before" do último definido para o primeiro
+    return tuple(reversed(validators))
+
+
+@lru_cache(maxsize=None)
+def _plan(model_cls: Type[BaseModel]) -> Tuple[Tuple[str, _Converter, bool, tuple], ...]:
+    return tuple(
+        (name, _converter(field.annotation), field.is_required(), _before_validators(model_cls, name))
+        for name, field in model_cls.model_fields.items()
+    )
+
+
+@lru_cache(maxsize=None)
+def _after_validators(model_cls: Type[BaseModel]) -> Tuple[Callable[[Any], Any], ...]:
+    return tuple(
+        dec.func
+        for dec in model_cls.__pydantic_decorators__.model_validators.values()
+        if dec.info.mode == "after"
+    )
+
+
+def trusted(model_cls: Type[M], data: dict) -> M:
+    """
+    Monta `model_cls` a partir de `data` sem validação.
+    Chaves extras são ignoradas; campos obrigatórios ausentes ficam None; os opcionais
+    ausentes recebem o default do schema. Validators "before" de campo e "after" de modelo
+    são aplicados (ver o docstring do módulo).
+    """
+    values = {}
+    for name, convert, required, before in _plan(model_cls):
+        if name in data:
+            value = data[name]
+            for validator in before:
+                value = validator(value)
+            values[name] = convert(value) if convert is not None and value is not None else value
+        elif required:
+            values[name] = None
+
+    instance = model_cls.model_construct(**values)
+    for validator in _after_validators(model_cls):
+        result = validator(instance)
+        if result is not None:
+            instance = result
+    return instance
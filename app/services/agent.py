@@ -1,17 +1,21 @@
-from typing import List
+from typing import List, Optional
 from bson import ObjectId
 from fastapi import HTTPException
 import json
 from uuid import UUID
-import math
 
 from app.dataprovider.mongo.models.agent import collection as agent_coll
-from app.dataprovider.mongo.models.agent import get_agent_detail, validate_tools, validate_ocps
+from app.dataprovider.mongo.models.agent import read_collection as agent_read_coll
+from app.dataprovider.mongo.models.agent import get_agent_detail, get_agent_details, validate_tools, validate_ocps
 from app.schemas.agent import (
-    AgentCreate, AgentUpdate, AgentOutList, AgentOutDetail, AgentOutInternal
+    AgentCreate, AgentUpdate, AgentPatch, AgentOutList, AgentOutDetail, AgentOutInternal
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError, BadRequestError
-from app.core.utils.mongo import ensure_object_id
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError, BadRequestError, PreconditionFailedError
+from app.core.utils.mongo import ensure_object_id, paginate, fetch_by_ids
+from app.core.cache_decorators import version_bump, evict_dependents
+from app.dataprovider.mongo.models import reference
+from app.core import doc_version, entity_version, invalidation
+from app.core.utils import patch
 from pymongo.errors import DuplicateKeyError
 
 from app.dataprovider.postgre.session import SessionLocal
@@ -30,6 +34,10 @@ class AgentService:
     MAX_FILE_SIZE_KB = int(os.getenv("MAX_FILE_SIZE_KB_AGENT", 1024))
     ALLOWED_CONTENT_TYPES = set(os.getenv("ALLOWED_CONTENT_TYPES_IMAGE").split(","))
 
+    # campo que identifica os itens de cada lista no PATCH (ver app.core.utils.patch)
+    PATCH_KEYS = {"ocps": "id", "tags": "id", "functions": "code", "tools": "code"}
+    REFERENCE_FIELDS = {"ocps", "tags", "tools"}
+
     @staticmethod
     def get_all(contractor_id: UUID, name: str = None, page: int = 1, rpp: int = 10) -> dict:
         with SessionLocal() as db:
@@ -40,28 +48,46 @@ class AgentService:
         if name is not None and str(name).strip() != "":
             filtro["name"] = {"$regex": f".*{str(name)}.*", "$options": "i"}
 
-        skip = (page - 1) * rpp
-
-        cursor = agent_coll.find(filtro).sort("name", 1).skip(skip).limit(rpp)
+        return paginate(agent_read_coll, filtro, AgentOutList, page, rpp)
 
-        items: list[AgentOutList] = [AgentOutList.from_raw(doc) for doc in cursor]
-
-        total = agent_coll.count_documents(filtro)
-        total_pages = math.ceil(total / rpp) if rpp > 0 else 1
+    @staticmethod
+    def get_by_id(id: str, primary: bool = False) -> AgentOutInternal:
+        """`primary=True` nas leituras que antecedem uma escrita (o secundário pode estar atrasado)."""
+        doc = get_agent_detail(id, source=agent_coll if primary else agent_read_coll)
+        if not doc:
+            raise NotFoundError("Agente não encontrado")
 
-        return {
-            "total": total,
-            "pages": total_pages,
-            "items": items,
-        }
+        return AgentOutInternal.from_raw(doc)
 
     @staticmethod
-    def get_by_id(id: str) -> AgentOutInternal:
-        doc = get_agent_detail(id)
+    def get_fields(id: str, fields: List[str]) -> dict:
+        """
+        Detalhe só com os campos pedidos (`?fields=`): a agregação projeta esses campos logo
+        após o $match e só roda os lookups deles.
+        """
+        oid = ensure_object_id(id)
+        doc = get_agent_detail(str(oid), source=agent_read_coll, fields=fields)
+
         if not doc:
             raise NotFoundError("Agente não encontrado")
 
-        return AgentOutInternal.from_raw(doc)
+        return AgentOutDetail.from_raw(doc).model_dump(mode="json", include=set(fields))
+
+    @staticmethod
+    def version_state(id: str) -> doc_version.VersionState:
+        # o detalhe resolve nomes de OCPs, tags e tools: as versões deles entram no ETag
+        return doc_version.state(
+            agent_read_coll, id, reference.EXTRACTORS["agent"], fields=("ocps.id", "tags.id", "tools.tool.id")
+        )
+
+    @staticmethod
+    def get_many(ids: List[str]) -> dict:
+        """Detalhe de vários agentes com uma única agregação, na ordem dos ids pedidos."""
+        docs, missing = fetch_by_ids(ids, lambda oids: get_agent_details(oids, source=agent_read_coll))
+        return {
+            "items": [AgentOutDetail.from_raw(doc) for doc in docs],
+            "missing": missing,
+        }
 
     @staticmethod
     def create(contractor_id: UUID, payload: AgentCreate) -> AgentOutDetail:
@@ -79,14 +105,17 @@ class AgentService:
             if payload.tags:
                 validate_existing_tags(payload.tags, "agent")
 
-            result = agent_coll.insert_one(to_insert)
+            result = agent_coll.insert_one(doc_version.stamp(to_insert))
+            reference.sync("agent", {**to_insert, "_id": result.inserted_id})
             created = get_agent_detail(result.inserted_id)
             return AgentOutDetail.from_raw(created)
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um agente com este nome")
 
     @staticmethod
-    def update(id: str, payload: AgentUpdate) -> AgentOutDetail:
+    @version_bump("agent")
+    @evict_dependents("agent")
+    def update(id: str, payload: AgentUpdate, if_match: Optional[str] = None) -> AgentOutDetail:
         oid = ensure_object_id(id)
         data = payload.model_dump()
 
@@ -99,20 +128,61 @@ class AgentService:
 
         try:
             updated = agent_coll.find_one_and_update(
-                {"_id": oid},
-                {"$set": data},
+                {"_id": oid, **doc_version.expect(agent_coll, oid, if_match)},
+                doc_version.bump({"$set": data}),
                 return_document=True
             )
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um agente com este nome")
 
         if not updated:
+            if if_match:
+                raise PreconditionFailedError()
             raise NotFoundError("Agente não encontrado")
 
+        reference.sync("agent", updated)
         updated = get_agent_detail(oid)
         return AgentOutDetail.from_raw(updated)
 
     @staticmethod
+    def patch(id: str, payload: AgentPatch, if_match: Optional[str] = None) -> AgentOutDetail:
+        oid = ensure_object_id(id)
+        data = payload.model_dump(include=payload.model_fields_set)
+
+        def validate(current: dict, changes: patch.MinimalUpdate):
+            # só as referências alteradas voltam ao banco
+            if "ocps" in changes.fields:
+                # duplicidade e OCP langserve único são regras da lista: valida a lista nova inteira
+                validate_ocps(mongo_db, None, payload.ocps)
+
+            if "tools" in changes.fields:
+                known = {(t.get("tool") or {}).get("id") for t in current.get("tools") or []}
+                validate_tools(mongo_db, [t for t in data["tools"] or [] if t["tool"]["id"] not in known])
+
+            if "tags" in changes.fields:
+                known = {t.get("id") for t in current.get("tags") or []}
+                added = [t for t in payload.tags if t.id not in known]
+                if added:
+                    validate_existing_tags(added, "agent")
+
+        try:
+            updated, changes = patch.apply(
+                agent_coll, oid, data, AgentService.PATCH_KEYS, if_match, validate, "Agente não encontrado"
+            )
+        except DuplicateKeyError:
+            raise DuplicateKeyDomainError("Já existe um agente com este nome")
+
+        if changes:
+            if changes.fields & AgentService.REFERENCE_FIELDS:
+                reference.sync("agent", updated)
+            entity_version.bump("agent", id)
+            invalidation.evict_dependents("agent", id)
+
+        return AgentOutDetail.from_raw(get_agent_detail(oid))
+
+    @staticmethod
+    @version_bump("agent")
+    @evict_dependents("agent")
     def delete(id: str) -> bool:
         oid = ensure_object_id(id)
         result = agent_coll.delete_one({"_id": oid})
@@ -120,6 +190,8 @@ class AgentService:
         if result.deleted_count == 0:
             raise NotFoundError("Agente não encontrado")
 
+        reference.remove("agent", id)
+
         return True
 
     @staticmethod
@@ -132,7 +204,7 @@ class AgentService:
 
         try:
             result = UploadService.upload_file(id=id, dir='agents', file=file, max_file_size=AgentService.MAX_FILE_SIZE_KB, allowed_content_types=AgentService.ALLOWED_CONTENT_TYPES)
-            agent_coll.update_one({"_id": oid}, {"$set": {"has_image": True}})
+            agent_coll.update_one({"_id": oid}, doc_version.bump({"$set": {"has_image": True}}))
 
             return result
         except Exception as e:
@@ -148,7 +220,7 @@ class AgentService:
 
         try:
             result = UploadService.delete_file(id=id, dir='agents')
-            agent_coll.update_one({"_id": oid}, {"$set": {"has_image": False}})
+            agent_coll.update_one({"_id": oid}, doc_version.bump({"$set": {"has_image": False}}))
 
             return result
         except Exception as e:
@@ -1,22 +1,28 @@
-from typing import List
+from typing import List, Optional
 from bson import ObjectId
 from fastapi import HTTPException
 import json
 from uuid import UUID
-import math
 
 from app.dataprovider.mongo.models.assistant import collection as assistant_coll
+from app.dataprovider.mongo.models.assistant import read_collection as assistant_read_coll
 from app.dataprovider.mongo.models.agent import collection as agent_coll
-from app.dataprovider.mongo.models.assistant import get_assistant_detail, validate_tools, validate_ai_model
+from app.dataprovider.mongo.models.assistant import get_assistant_detail, get_assistant_details, validate_tools, validate_ai_model
 from app.schemas.assistant import (
     AssistantCreate, 
     AssistantUpdate, 
+    AssistantPatch, 
     AssistantOutList, 
     AssistantOutDetail, 
     AssistantOutInternal
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError
-from app.core.utils.mongo import ensure_object_id
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError, PreconditionFailedError
+from app.core.utils.mongo import ensure_object_id, paginate, fetch_by_ids
+from app.core.cache_decorators import version_bump
+from app.core.request_loader import load, load_many
+from app.dataprovider.mongo.models import reference
+from app.core import doc_version, entity_version
+from app.core.utils import patch
 from pymongo.errors import DuplicateKeyError
 from app.dataprovider.postgre.session import SessionLocal
 from app.dataprovider.postgre.repository.contractor import contractor_exists
@@ -24,6 +30,17 @@ from app.dataprovider.postgre.repository.contractor import contractor_exists
 
 class AssistantService:
 
+    # campo que identifica os itens de cada lista no PATCH (ver app.core.utils.patch)
+    PATCH_KEYS = {
+        "profiles": "id",
+        "agents": "agent.id",
+        "agents.profiles": "id",
+        "agents.functions": "function.code",
+        "agents.functions.profiles": "id",
+        "agents.tools": "name",
+    }
+    REFERENCE_FIELDS = {"ai_model", "agents"}
+
     @staticmethod
     def get_all(contractor_id: UUID, name: str = None, page: int = 1, rpp: int = 10) -> dict:
         with SessionLocal() as db:
@@ -34,30 +51,51 @@ class AssistantService:
         if name is not None and str(name).strip() != "":
             filtro["name"] = {"$regex": f".*{str(name)}.*", "$options": "i"}
 
-        skip = (page - 1) * rpp
-
-        cursor = assistant_coll.find(filtro).sort("name", 1).skip(skip).limit(rpp)
+        return paginate(assistant_read_coll, filtro, AssistantOutList, page, rpp)
 
-        items: list[AssistantOutList] = [AssistantOutList.from_raw(doc) for doc in cursor]
 
-        total = assistant_coll.count_documents(filtro)
-        total_pages = math.ceil(total / rpp) if rpp > 0 else 1
+    @staticmethod
+    def get_by_id(id: str, primary: bool = False) -> AssistantOutInternal:
+        """`primary=True` nas leituras que antecedem uma escrita (o secundário pode estar atrasado)."""
+        doc = get_assistant_detail(id, source=assistant_coll if primary else assistant_read_coll)
 
-        return {
-            "total": total,
-            "pages": total_pages,
-            "items": items,
-        }
+        if not doc:
+            raise NotFoundError("Assistente não encontrado")
 
+        return AssistantOutInternal.from_raw(doc)
 
     @staticmethod
-    def get_by_id(id: str) -> AssistantOutInternal:
-        doc = get_assistant_detail(id)
+    def get_fields(id: str, fields: List[str]) -> dict:
+        """
+        Detalhe só com os campos pedidos (`?fields=`): a agregação projeta esses campos logo
+        após o $match e só roda os lookups e o enriquecimento deles.
+        """
+        oid = ensure_object_id(id)
+        doc = get_assistant_detail(str(oid), source=assistant_read_coll, fields=fields)
 
         if not doc:
             raise NotFoundError("Assistente não encontrado")
 
-        return AssistantOutInternal.from_raw(doc)
+        return AssistantOutDetail.from_raw(doc).model_dump(mode="json", include=set(fields))
+
+    @staticmethod
+    def version_state(id: str) -> doc_version.VersionState:
+        # o detalhe resolve credenciais, agentes e tools: as versões deles entram no ETag
+        return doc_version.state(
+            assistant_read_coll,
+            id,
+            reference.EXTRACTORS["assistant"],
+            fields=("ai_model.id", "agents.agent.id", "agents.ai_model.id", "agents.tools.tool.id"),
+        )
+
+    @staticmethod
+    def get_many(ids: List[str]) -> dict:
+        """Detalhe de vários assistentes com uma única agregação, na ordem dos ids pedidos."""
+        docs, missing = fetch_by_ids(ids, lambda oids: get_assistant_details(oids, source=assistant_read_coll))
+        return {
+            "items": [AssistantOutDetail.from_raw(doc) for doc in docs],
+            "missing": missing,
+        }
 
     @staticmethod
     def create(contractor_id: UUID, payload: AssistantCreate) -> AssistantOutDetail:
@@ -71,31 +109,35 @@ class AssistantService:
             #validando ai_model
             validate_ai_model(payload.ai_model.id)
 
-            # Validando as tools cadastradas
+            # Validando as tools cadastradas (agentes lidos com uma única consulta)
+            load_many(agent_coll, [a.agent.id for a in payload.agents])
             for agent_payload in payload.agents:
                 agent_id = ensure_object_id(agent_payload.agent.id)
-                agent_config = agent_coll.find_one({"_id": agent_id})
+                agent_config = load(agent_coll, agent_id)
                 if not agent_config:
                     raise NotFoundError(f"Agente {agent_id} não encontrado.")
 
                 validate_ai_model(agent_payload.ai_model.id)
                 validate_tools(agent_config, agent_payload.model_dump())
 
-            result = assistant_coll.insert_one(to_insert)
+            result = assistant_coll.insert_one(doc_version.stamp(to_insert))
             created = assistant_coll.find_one({"_id": result.inserted_id})
+            reference.sync("assistant", created)
             return AssistantOutDetail.from_raw(created)
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe uma assistente com este nome")
 
     @staticmethod
-    def update(id: str, payload: AssistantUpdate) -> AssistantOutDetail:
+    @version_bump("assistant")
+    def update(id: str, payload: AssistantUpdate, if_match: Optional[str] = None) -> AssistantOutDetail:
         oid = ensure_object_id(id)
         data = payload.model_dump(exclude_none=True)
 
-        # Validando as tools cadastradas
+        # Validando as tools cadastradas (agentes lidos com uma única consulta)
+        load_many(agent_coll, [a.agent.id for a in payload.agents])
         for agent_payload in payload.agents:
             agent_id = ensure_object_id(agent_payload.agent.id)
-            agent_config = agent_coll.find_one({"_id": agent_id})
+            agent_config = load(agent_coll, agent_id)
             if not agent_config:
                 raise NotFoundError(f"Agente {agent_id} não encontrado.")
 
@@ -104,19 +146,66 @@ class AssistantService:
 
         try:
             updated = assistant_coll.find_one_and_update(
-                {"_id": oid},
-                {"$set": data},
+                {"_id": oid, **doc_version.expect(assistant_coll, oid, if_match)},
+                doc_version.bump({"$set": data}),
                 return_document=True
             )
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe uma assistente com este nome")
 
         if not updated:
+            if if_match:
+                raise PreconditionFailedError()
             raise NotFoundError("Assistente não encontrado")
 
+        reference.sync("assistant", updated)
+        return AssistantOutDetail.from_raw(updated)
+
+    @staticmethod
+    def patch(id: str, payload: AssistantPatch, if_match: Optional[str] = None) -> AssistantOutDetail:
+        oid = ensure_object_id(id)
+        data = payload.model_dump(include=payload.model_fields_set)
+
+        def validate(current: dict, changes: patch.MinimalUpdate):
+            # só os agentes novos ou alterados são validados (agentes lidos com uma única consulta)
+            if "ai_model" in changes.fields:
+                validate_ai_model(payload.ai_model.id)
+
+            if "agents" not in changes.fields:
+                return
+
+            previous = {(a.get("agent") or {}).get("id"): a for a in current.get("agents") or []}
+            changed = patch.changed_items(current.get("agents"), data["agents"], "agent.id")
+
+            load_many(agent_coll, [a["agent"]["id"] for a in changed])
+            for agent_payload in changed:
+                agent_id = ensure_object_id(agent_payload["agent"]["id"])
+                agent_config = load(agent_coll, agent_id)
+                if not agent_config:
+                    raise NotFoundError(f"Agente {agent_id} não encontrado.")
+
+                before = previous.get(agent_payload["agent"]["id"])
+                if not before or not patch.same(before.get("ai_model"), agent_payload["ai_model"]):
+                    validate_ai_model(agent_payload["ai_model"]["id"])
+                if not before or not patch.same(before.get("tools"), agent_payload.get("tools")):
+                    validate_tools(agent_config, agent_payload)
+
+        try:
+            updated, changes = patch.apply(
+                assistant_coll, oid, data, AssistantService.PATCH_KEYS, if_match, validate, "Assistente não encontrado"
+            )
+        except DuplicateKeyError:
+            raise DuplicateKeyDomainError("Já existe uma assistente com este nome")
+
+        if changes:
+            if changes.fields & AssistantService.REFERENCE_FIELDS:
+                reference.sync("assistant", updated)
+            entity_version.bump("assistant", id)
+
         return AssistantOutDetail.from_raw(updated)
 
     @staticmethod
+    @version_bump("assistant")
     def delete(id: str) -> bool:
         oid = ensure_object_id(id)
         result = assistant_coll.delete_one({"_id": oid})
@@ -124,4 +213,5 @@ class AssistantService:
         if result.deleted_count == 0:
             raise NotFoundError("Assistente não encontrado")
 
+        reference.remove("assistant", id)
         return True
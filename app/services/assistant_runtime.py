@@ -0,0 +1,173 @@
+"""
+Bundle de execução de um assistente: tudo o que o orquestrador precisa em uma chamada.
+
+O grafo (assistente -> agentes -> tags, OCPs, credenciais de modelo e tipos de tool) é resolvido
+com uma agregação por nível e um `$in` por collection. O bundle fica no Redis junto com o
+vetor de versões (app.core.entity_version) das entidades usadas; qualquer escrita em uma
+delas invalida o bundle na próxima leitura, que custa um GET e um MGET.
+
+Credenciais entram só com id, tipo e descrição: os segredos (`credentials`) não saem do
+Mongo nesta rota nem vão para o cache; quem precisa deles usa GET /credentials_types/.../{id},
+que exige a regra da credencial.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from app.dataprovider.mongo.models.assistant import read_collection as assistant_read_coll
+from app.dataprovider.mongo.models.assistant import get_assistant_detail
+from app.dataprovider.mongo.models.agent import read_collection as agent_read_coll
+from app.dataprovider.mongo.models.agent import get_agent_details
+from app.dataprovider.mongo.models.tag import read_collection as tag_read_coll
+from app.dataprovider.mongo.models.ocp import read_collection as ocp_read_coll
+from app.dataprovider.mongo.models.ocp_structure import hydrate_many
+from app.dataprovider.mongo.models.credential import read_collection as credential_read_coll
+from app.dataprovider.mongo.models.credential_type import read_collection as credential_type_read_coll
+from app.schemas.assistant import AssistantOutInternal
+from app.schemas.agent import AgentOutInternal
+from app.schemas.ocp import OCPOutDetail
+from app.schemas.credential import CredentialOutRef
+from app.schemas.credential_type import CredentialTypeOutDetail
+from app.core.exceptions.types import NotFoundError
+from app.core.utils.mongo import ensure_object_id
+from app.core.cache import cache_get_json, cache_set_json
+from app.core.manifest_store import compute_etag
+from app.core import entity_version
+from app.core.entity_version import Ref
+from app.core.logger_config import debug
+
+load_dotenv()
+
+RUNTIME_BUNDLE_CACHE_PREFIX = "runtime_bundle:v2"
+RUNTIME_BUNDLE_TTL_SECONDS = int(os.getenv("RUNTIME_BUNDLE_TTL_SECONDS", 600))
+
+
+def bundle_key(id: str) -> str:
+    """Chave do bundle no Redis (também usada pela invalidação)."""
+    return f"{RUNTIME_BUNDLE_CACHE_PREFIX}:id={id}"
+
+
+def _oids(ids) -> List[ObjectId]:
+    return [ObjectId(i) for i in {str(i) for i in ids if i} if ObjectId.is_valid(i)]
+
+
+def _find(collection, ids, projection: Optional[dict] = None) -> List[dict]:
+    oids = _oids(ids)
+    return list(collection.find({"_id": {"$in": oids}}, projection)) if oids else []
+
+
+class _VersionSnapshot:
+    """Versões das entidades no momento em que cada nível do grafo foi lido."""
+
+    def __init__(self):
+        self.versions: Dict[Ref, str] = {}
+        self.complete = True
+
+    def read(self, refs: List[Ref]) -> None:
+        refs = entity_version.normalize(refs)
+        values = entity_version.current(refs)
+        if values is None:
+            self.complete = False
+            return
+        self.versions.update(zip(refs, values))
+
+    def matches(self, refs: List[Ref], versions: List[str]) -> bool:
+        return self.complete and all(self.versions.get(ref) == v for ref, v in zip(refs, versions))
+
+
+class AssistantRuntimeService:
+
+    @staticmethod
+    def build(id: str, seen: Optional[_VersionSnapshot] = None) -> Tuple[dict, List[Ref]]:
+        """
+        Monta o bundle direto do Mongo. Retorna (bundle, entidades referenciadas).
+        Com `seen`, as versões de cada nível são lidas antes dos documentos desse nível.
+        """
+        seen = seen or _VersionSnapshot()
+        oid = ensure_object_id(id)
+        seen.read([("assistant", str(oid))])
+        assistant = get_assistant_detail(str(oid), source=assistant_read_coll)
+        if not assistant:
+            raise NotFoundError("Assistente não encontrado")
+
+        assistant_agents = assistant.get("agents") or []
+        agent_ids = [(ag.get("agent") or {}).get("id") for ag in assistant_agents]
+        agent_oids = _oids(agent_ids)
+        seen.read([("agent", i) for i in agent_ids])
+        agents = get_agent_details(agent_oids, source=agent_read_coll) if agent_oids else []
+
+        ocp_ids = [o.get("id") for a in agents for o in a.get("ocps") or []]
+        tag_ids = [t.get("id") for a in agents for t in a.get("tags") or []]
+
+        # credenciais de modelo: a do assistente e as sobrescritas por agente
+        credential_ids = [(assistant.get("ai_model") or {}).get("id")]
+        credential_ids += [(ag.get("ai_model") or {}).get("id") for ag in assistant_agents]
+
+        tool_ids = [(t.get("tool") or {}).get("id") for a in agents for t in a.get("tools") or []]
+        tool_ids += [(t.get("tool") or {}).get("id") for ag in assistant_agents for t in ag.get("tools") or []]
+
+        seen.read(
+            [("tag", i) for i in tag_ids]
+            + [("ocp", i) for i in ocp_ids]
+            + [("credential", i) for i in credential_ids]
+            + [("credential_type", i) for i in tool_ids]
+        )
+        ocps = hydrate_many(_find(ocp_read_coll, ocp_ids))
+
+        # os nomes do $lookup foram lidos antes das versões das tags: relê para que uma
+        # renomeação no meio da montagem não entre no cache com a versão nova
+        if tag_ids:
+            names = {str(t["_id"]): t.get("name") for t in _find(tag_read_coll, tag_ids, {"name": 1})}
+            for a in agents:
+                a["tags"] = [{**t, "name": names[t["id"]]} for t in a.get("tags") or [] if t.get("id") in names]
+        credentials = _find(credential_read_coll, credential_ids, {"credentials": 0})
+        tools = _find(credential_type_read_coll, tool_ids)
+
+        bundle = {
+            "contractor_id": assistant.get("contractor_id"),
+            "assistant": AssistantOutInternal.from_raw(assistant).model_dump(mode="json"),
+            "agents": [AgentOutInternal.from_raw(a).model_dump(mode="json") for a in agents],
+            "ocps": [OCPOutDetail.from_raw(o).model_dump(mode="json") for o in ocps],
+            "credentials": [CredentialOutRef.from_raw(c).model_dump(mode="json") for c in credentials],
+            "tools": [CredentialTypeOutDetail.from_raw(t).model_dump(mode="json") for t in tools],
+        }
+
+        refs = entity_version.normalize(
+            [("assistant", str(oid))]
+            + [("agent", i) for i in agent_ids]
+            + [("tag", i) for i in tag_ids]
+            + [("ocp", i) for i in ocp_ids]
+            + [("credential", i) for i in credential_ids]
+            + [("credential_type", i) for i in tool_ids]
+        )
+        return bundle, refs
+
+    @staticmethod
+    def get(id: str) -> Tuple[dict, str]:
+        """Retorna (bundle, etag), usando o cache enquanto nenhuma entidade referenciada mudar."""
+        key = bundle_key(id)
+
+        cached = cache_get_json(key)
+        if cached is not None:
+            if entity_version.current([tuple(r) for r in cached["refs"]]) == cached["versions"]:
+                debug("[RUNTIME BUNDLE HIT] %s", key, event="cache")
+                return cached["data"], cached["etag"]
+
+        # cada nível lê as versões antes dos documentos; se alguma entidade mudou no meio
+        # da montagem, o MGET final difere e o bundle é devolvido sem ir para o cache
+        seen = _VersionSnapshot()
+        data, refs = AssistantRuntimeService.build(id, seen)
+        versions = entity_version.current(refs)
+        etag = compute_etag(data)
+
+        if versions is not None and seen.matches(refs, versions):
+            cache_set_json(
+                key,
+                {"refs": refs, "versions": versions, "etag": etag, "data": data},
+                RUNTIME_BUNDLE_TTL_SECONDS,
+            )
+            debug("[RUNTIME BUNDLE SET] %s (%d entidades)", key, len(refs), event="cache")
+
+        return data, etag
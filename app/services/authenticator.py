@@ -1,16 +1,18 @@
+from typing import List, Optional
 from uuid import UUID
-import math
 from pymongo.errors import DuplicateKeyError
-import requests
 from app.dataprovider.mongo.models.authenticator import collection as auth_coll
+from app.dataprovider.mongo.models.authenticator import read_collection as auth_read_coll
 from app.schemas.authenticator import (
     AuthenticatorCreate,
     AuthenticatorUpdate,
     AuthenticatorOutList,
     AuthenticatorOutDetail,
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BadRequestError
-from app.core.utils.mongo import ensure_object_id
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BadRequestError, PreconditionFailedError
+from app.core.utils.mongo import ensure_object_id, paginate, sparse_projection, sparse_dump
+from app.core.request_loader import load
+from app.core import doc_version, metrics
 
 
 class AuthenticatorService:
@@ -25,18 +27,7 @@ class AuthenticatorService:
         if name and str(name).strip() != "":
             filtro["name"] = {"$regex": f".*{str(name)}.*", "$options": "i"}
 
-        skip = (page - 1) * rpp
-        cursor = auth_coll.find(filtro).sort("name", 1).skip(skip).limit(rpp)
-
-        items: list[AuthenticatorOutList] = [AuthenticatorOutList.from_raw(doc) for doc in cursor]
-        total = auth_coll.count_documents(filtro)
-        total_pages = math.ceil(total / rpp) if rpp > 0 else 1
-
-        return {
-            "total": total,
-            "pages": total_pages,
-            "items": items,
-        }
+        return paginate(auth_read_coll, filtro, AuthenticatorOutList, page, rpp)
 
     @staticmethod
     def get_by_id(id: str) -> AuthenticatorOutDetail:
@@ -44,13 +35,30 @@ class AuthenticatorService:
         Busca um authenticator pelo ID.
         """
         oid = ensure_object_id(id)
-        doc = auth_coll.find_one({"_id": oid})
+        doc = auth_read_coll.find_one({"_id": oid})
 
         if not doc:
             raise NotFoundError("Authenticator não encontrado")
 
         return AuthenticatorOutDetail.from_raw(doc)
 
+    @staticmethod
+    def version_state(id: str) -> doc_version.VersionState:
+        return doc_version.state(auth_read_coll, id)
+
+    @staticmethod
+    def get_fields(id: str, fields: List[str]) -> dict:
+        """
+        Detalhe só com os campos pedidos (`?fields=`); o Mongo retorna apenas esses caminhos.
+        """
+        oid = ensure_object_id(id)
+        doc = auth_read_coll.find_one({"_id": oid}, sparse_projection(AuthenticatorOutDetail, fields))
+
+        if not doc:
+            raise NotFoundError("Authenticator não encontrado")
+
+        return sparse_dump(AuthenticatorOutDetail, doc, fields)
+
     @staticmethod
     def create(contractor_id: UUID, payload: AuthenticatorCreate) -> AuthenticatorOutDetail:
         """
@@ -60,7 +68,7 @@ class AuthenticatorService:
             data = payload.model_dump()
             data["contractor_id"] = str(contractor_id)
 
-            result = auth_coll.insert_one(data)
+            result = auth_coll.insert_one(doc_version.stamp(data))
             created = auth_coll.find_one({"_id": result.inserted_id})
             return AuthenticatorOutDetail.from_raw(created)
 
@@ -68,7 +76,7 @@ class AuthenticatorService:
             raise DuplicateKeyDomainError("Já existe um authenticator com este nome")
 
     @staticmethod
-    def update(id: str, payload: AuthenticatorUpdate) -> AuthenticatorOutDetail:
+    def update(id: str, payload: AuthenticatorUpdate, if_match: Optional[str] = None) -> AuthenticatorOutDetail:
         """
         Atualiza um authenticator existente.
         """
@@ -77,14 +85,16 @@ class AuthenticatorService:
 
         try:
             updated = auth_coll.find_one_and_update(
-                {"_id": oid},
-                {"$set": data},
+                {"_id": oid, **doc_version.expect(auth_coll, oid, if_match)},
+                doc_version.bump({"$set": data}),
                 return_document=True
             )
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um authenticator com este nome")
 
         if not updated:
+            if if_match:
+                raise PreconditionFailedError()
             raise NotFoundError("Authenticator não encontrado")
 
         return AuthenticatorOutDetail.from_raw(updated)
@@ -110,8 +120,12 @@ class AuthenticatorService:
     # ========= EXECUTE =========
     
     @staticmethod
-    def execute(id: str) -> dict:
-        doc = auth_coll.find_one({"_id": ensure_object_id(id)})
+    def execute(id: str, http=None) -> dict:
+        import requests
+
+        http = http or requests
+
+        doc = load(auth_coll, ensure_object_id(id))
         if not doc:
             raise NotFoundError("Authenticator não encontrado")
 
@@ -132,13 +146,15 @@ class AuthenticatorService:
         response_map = doc.get("response_map", {})
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=body if body else None,
-                timeout=15
-            )
+            with metrics.upstream("authenticator", url) as call:
+                response = http.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    json=body if body else None,
+                    timeout=15
+                )
+                call.status = response.status_code
 
             response.raise_for_status()
 
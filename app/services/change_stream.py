@@ -0,0 +1,167 @@
+"""
+Invalidação de cache a partir dos change streams do Mongo.
+
+Os decorators de cache só enxergam escritas feitas por esta API; alterações feitas por
+scripts, pelo backend Spring ou direto no banco deixavam entradas sem TTL obsoletas.
+Um único worker do cluster (LeaderLock no Redis) acompanha as collections abaixo e, para
+cada alteração, atualiza o índice reverso de referências, apaga os caches da entidade e
+dos dependentes (app.core.invalidation) e publica o evento no canal de invalidação.
+
+O resume token fica no Redis: um novo líder continua de onde o anterior parou. Se o
+histórico do oplog não cobrir mais o token, todos os caches derivados são limpos.
+Requer replica set (change streams).
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.dataprovider.mongo.base import db
+from app.dataprovider.mongo.models import reference
+from app.core.cache import get_redis
+from app.core.leader import LeaderLock
+from app.core import invalidation
+from app.core.logger_config import info, debug, error
+
+load_dotenv()
+
+CHANGE_STREAM_ENABLED = os.getenv("CHANGE_STREAM_ENABLED", "0").lower() in ("1", "true", "yes")
+CHANGE_STREAM_LEADER_TTL_SECONDS = int(os.getenv("CHANGE_STREAM_LEADER_TTL_SECONDS", 30))
+CHANGE_STREAM_RETRY_SECONDS = float(os.getenv("CHANGE_STREAM_RETRY_SECONDS", 5))
+
+WATCHED_COLLECTIONS = [
+    "assistant", "agent", "credential", "credential_type", "tag",
+    "ocp", "ocp-m", "service", "authenticator",
+]
+
+_RESUME_TOKEN_KEY = "change_stream:resume_token"
+
+# ChangeStreamHistoryLost / resume token fora da janela do oplog
+_HISTORY_LOST_CODES = {260, 280, 286}
+
+_PIPELINE = [
+    {
+        "$match": {
+            "ns.coll": {"$in": WATCHED_COLLECTIONS},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }
+    }
+]
+
+
+class ChangeStreamWatcher:
+
+    def __init__(self):
+        self.lock = LeaderLock("change_stream", ttl_seconds=CHANGE_STREAM_LEADER_TTL_SECONDS)
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ========= Resume token =========
+
+    @staticmethod
+    def _load_token() -> Optional[dict]:
+        try:
+            raw = get_redis().get(_RESUME_TOKEN_KEY)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            error("[CHANGE STREAM] Falha ao ler resume token: %s", e)
+            return None
+
+    @staticmethod
+    def _save_token(token: Optional[dict]) -> None:
+        if not token:
+            return
+        try:
+            get_redis().set(_RESUME_TOKEN_KEY, json.dumps(token))
+        except Exception as e:
+            error("[CHANGE STREAM] Falha ao salvar resume token: %s", e)
+
+    @staticmethod
+    def _clear_token() -> None:
+        try:
+            get_redis().delete(_RESUME_TOKEN_KEY)
+        except Exception as e:
+            error("[CHANGE STREAM] Falha ao apagar resume token: %s", e)
+
+    # ========= Eventos =========
+
+    @staticmethod
+    def handle(change: dict) -> None:
+        kind = change["ns"]["coll"]
+        id = str(change["documentKey"]["_id"])
+        op = change["operationType"]
+
+        # escritas desta API já atualizam o índice; repetir é idempotente e cobre as externas
+        if op == "delete":
+            reference.remove(kind, id)
+        else:
+            reference.sync(kind, change.get("fullDocument"))
+
+        invalidation.evict_entity(kind, id)
+        invalidation.publish(kind, id, op)
+        debug("[CHANGE STREAM] %s %s:%s", op, kind, id, event="change_stream")
+
+    def _watch(self) -> None:
+        """Consome o stream enquanto for líder; retorna ao perder a liderança ou ao parar."""
+        token = self._load_token()
+        with db.watch(
+            _PIPELINE,
+            full_document="updateLookup",
+            resume_after=token,
+            max_await_time_ms=1000,
+        ) as stream:
+            info("[CHANGE STREAM] Acompanhando %d collections (resume=%s)", len(WATCHED_COLLECTIONS), "sim" if token else "não")
+            while not self._stop.is_set():
+                if not self.lock.renew():
+                    info("[CHANGE STREAM] Liderança perdida")
+                    return
+
+                change = stream.try_next()
+                if change is not None:
+                    try:
+                        self.handle(change)
+                    except Exception as e:
+                        error("[CHANGE STREAM] Falha ao processar evento %s: %s", change.get("documentKey"), e)
+
+                # sem eventos o token também avança (postBatchResumeToken): salvá-lo evita
+                # que um período ocioso longo deixe o token fora da janela do oplog
+                if stream.resume_token != token:
+                    token = stream.resume_token
+                    self._save_token(token)
+
+    def run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                if not self.lock.acquire():
+                    self._stop.wait(CHANGE_STREAM_LEADER_TTL_SECONDS / 3)
+                    continue
+                try:
+                    self._watch()
+                except OperationFailure as e:
+                    if e.code in _HISTORY_LOST_CODES:
+                        error("[CHANGE STREAM] Resume token expirado (%s); limpando caches derivados", e.code)
+                        self._clear_token()
+                        invalidation.evict_all()
+                    else:
+                        error("[CHANGE STREAM] Falha no stream: %s", e)
+                        self._stop.wait(CHANGE_STREAM_RETRY_SECONDS)
+                except PyMongoError as e:
+                    error("[CHANGE STREAM] Falha no stream: %s", e)
+                    self._stop.wait(CHANGE_STREAM_RETRY_SECONDS)
+        finally:
+            self.lock.release()
+
+
+async def run_watcher() -> None:
+    """Executa o watcher em uma thread até o shutdown (cancelamento da task)."""
+    watcher = ChangeStreamWatcher()
+    try:
+        await asyncio.to_thread(watcher.run)
+    finally:
+        watcher.stop()
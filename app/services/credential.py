@@ -1,15 +1,18 @@
-from typing import List
+from typing import List, Optional
 import json
 from uuid import UUID
 from pymongo.errors import DuplicateKeyError
 from pymongo import ReturnDocument
 
 from app.dataprovider.mongo.models.credential import collection as credential_coll
+from app.dataprovider.mongo.models.credential import read_collection as credential_read_coll
 from app.schemas.credential import (
     CredentialCreate, CredentialUpdate, CredentialOutList, CredentialOutDetail, CredentialOutInternal
 )
 from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError
-from app.core.utils.mongo import ensure_object_id
+from app.core.utils.mongo import ensure_object_id, fetch_by_ids
+from app.core.cache_decorators import version_bump, evict_dependents
+from app.dataprovider.mongo.models import reference
 from app.utils.validate_credentials import ValidateCredentialsUtils
 from app.dataprovider.postgre.session import SessionLocal
 from app.dataprovider.postgre.repository.contractor import contractor_exists
@@ -23,7 +26,7 @@ class CredentialService:
 
         items: list[CredentialOutList] = []
 
-        for doc in credential_coll.find({
+        for doc in credential_read_coll.find({
             "credential_type_id": credential_type_id,
             "contractor_id": str(contractor_id)
         }):
@@ -32,15 +35,32 @@ class CredentialService:
         return items
 
     @staticmethod
-    def get_by_id(id: str) -> CredentialOutInternal:
+    def get_by_id(id: str, primary: bool = False) -> CredentialOutInternal:
+        """`primary=True` nas leituras que antecedem uma escrita (o secundário pode estar atrasado)."""
         oid = ensure_object_id(id)
-        doc = credential_coll.find_one({"_id": oid})
+        doc = (credential_coll if primary else credential_read_coll).find_one({"_id": oid})
 
         if not doc:
             raise NotFoundError("Credencial não encontrada")
 
         return CredentialOutInternal.from_raw(doc)
 
+    @staticmethod
+    def get_many(ids: List[str], contractor_id: Optional[str] = None) -> dict:
+        """
+        Detalhe de várias credenciais com um único `$in`, na ordem pedida.
+        Com `contractor_id`, credenciais de outros contratantes contam como não encontradas.
+        """
+        filtro = {}
+        if contractor_id is not None:
+            filtro["contractor_id"] = str(contractor_id)
+
+        docs, missing = fetch_by_ids(ids, lambda oids: credential_read_coll.find({**filtro, "_id": {"$in": oids}}))
+        return {
+            "items": [CredentialOutDetail.from_raw(doc) for doc in docs],
+            "missing": missing,
+        }
+
     @staticmethod
     def create(credential_type_id: str, contractor_id: UUID, payload: CredentialCreate) -> CredentialOutDetail:
         try:
@@ -56,12 +76,15 @@ class CredentialService:
 
             result = credential_coll.insert_one(to_insert)
             created = credential_coll.find_one({"_id": result.inserted_id})
+            reference.sync("credential", created)
 
             return CredentialOutDetail.from_raw(created)
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe uma credencial com esta descrição")
 
     @staticmethod
+    @version_bump("credential")
+    @evict_dependents("credential")
     def update(id: str, payload: CredentialUpdate) -> CredentialOutDetail:
         oid = ensure_object_id(id)
         doc = credential_coll.find_one({"_id": oid})
@@ -89,6 +112,8 @@ class CredentialService:
         return CredentialOutDetail.from_raw(updated)
 
     @staticmethod
+    @version_bump("credential")
+    @evict_dependents("credential")
     def delete(id: str) -> bool:
         oid = ensure_object_id(id)
         doc = credential_coll.find_one({"_id": oid})
@@ -100,5 +125,6 @@ class CredentialService:
 
         if result.deleted_count == 0:
             raise NotFoundError("Credencial não encontrada")
-            
+
+        reference.remove("credential", id)
         return True
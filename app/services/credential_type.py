@@ -1,16 +1,18 @@
-from typing import List, Literal
+from typing import List, Literal, Optional, Tuple, Union
 from bson import ObjectId
 from pymongo import ASCENDING
 
 from app.dataprovider.mongo.models.credential_type import collection as credential_type_coll
+from app.dataprovider.mongo.models.credential_type import read_collection as credential_type_read_coll
 from app.dataprovider.mongo.models.credential import collection as credential_coll
 from app.schemas.credential_type import (
     CredentialTypeCreate, CredentialTypeUpdate,
     CredentialTypeOutList, CredentialTypeOutDetail
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError, BadRequestError
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError, BadRequestError, PreconditionFailedError
 from app.core.utils.mongo import ensure_object_id
-from app.core.cache_decorators import cacheable, cache_evict
+from app.core.cache_decorators import cacheable, cache_evict, version_bump, evict_dependents
+from app.core import doc_version
 from pymongo.errors import DuplicateKeyError
 from app.services.upload import UploadService
 from fastapi import UploadFile
@@ -30,7 +32,7 @@ class CredentialTypeService:
         filtro = {"kind": kind} if kind else {}
 
         cursor = (
-            credential_type_coll
+            credential_type_read_coll
             .find(filtro)
             .sort([("kind", ASCENDING), ("name", ASCENDING)])
         )
@@ -41,13 +43,29 @@ class CredentialTypeService:
     @cacheable("credentials_types", key_params=["id"], ttl_seconds=0)
     def get_by_id(id: str) -> CredentialTypeOutDetail:
         oid = ensure_object_id(id)
-        doc = credential_type_coll.find_one({"_id": oid})
+        doc = credential_type_read_coll.find_one({"_id": oid})
 
         if not doc:
             raise NotFoundError("Tipo de Credencial não encontrado")
 
         return CredentialTypeOutDetail.from_raw(doc)
 
+    @staticmethod
+    def get_detail(id: str) -> Tuple[Union[dict, CredentialTypeOutDetail], int]:
+        """Detalhe e a versão dele (`doc_version`, 0 se ausente) para o ETag da resposta."""
+        credential_type = CredentialTypeService.get_by_id(id)
+
+        # em um hit do cache o get_by_id devolve o dict salvo no Redis
+        if isinstance(credential_type, dict):
+            version = credential_type.get("doc_version")
+        else:
+            version = credential_type.doc_version
+        return credential_type, version or 0
+
+    @staticmethod
+    def version_state(id: str) -> doc_version.VersionState:
+        return doc_version.state(credential_type_read_coll, id)
+
     @staticmethod
     @cache_evict("credentials_types:all", match_prefix=True)
     def create(payload: CredentialTypeCreate) -> CredentialTypeOutDetail:
@@ -55,7 +73,7 @@ class CredentialTypeService:
             to_insert = payload.model_dump()
             to_insert["has_image"] = False
 
-            result = credential_type_coll.insert_one(to_insert)
+            result = credential_type_coll.insert_one(doc_version.stamp(to_insert))
             created = credential_type_coll.find_one({"_id": result.inserted_id})
             return CredentialTypeOutDetail.from_raw(created)
         except DuplicateKeyError:
@@ -63,30 +81,36 @@ class CredentialTypeService:
 
     @staticmethod
     @cache_evict(["credentials_types:all", "credentials_types:id={id}"], key_params=["id"], match_prefix=True)
-    def update(id: str, payload: CredentialTypeUpdate) -> CredentialTypeOutDetail:
+    @version_bump("credential_type")
+    @evict_dependents("credential_type")
+    def update(id: str, payload: CredentialTypeUpdate, if_match: Optional[str] = None) -> CredentialTypeOutDetail:
         oid = ensure_object_id(id)
         data = payload.model_dump(exclude_none=True)
 
         try:
             updated = credential_type_coll.find_one_and_update(
-                {"_id": oid},
-                {"$set": data},
+                {"_id": oid, **doc_version.expect(credential_type_coll, oid, if_match)},
+                doc_version.bump({"$set": data}),
                 return_document=True
             )
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um tipo de credencial com este nome")
 
         if not updated:
+            if if_match:
+                raise PreconditionFailedError()
             raise NotFoundError("Tipo de credencial não encontrado")
 
         return CredentialTypeOutDetail.from_raw(updated)
 
     @staticmethod
     @cache_evict(["credentials_types:all", "credentials_types:id={id}"], key_params=["id"], match_prefix=True)
+    @version_bump("credential_type")
+    @evict_dependents("credential_type")
     def delete(id: str) -> bool:
-        # Verifica se existem credenciais vinculadas
-        credentials_exists = credential_coll.find_one({"credential_type_id": id})
-        if credentials_exists:
+        # Verifica se existem credenciais vinculadas (na collection de origem: o índice
+        # reverso em `reference` serve à invalidação e pode estar incompleto)
+        if credential_coll.find_one({"credential_type_id": id}, {"_id": 1}):
             raise BusinessDomainError("Existem credenciais cadastradas para este tipo de credencial. Exclua-as primeiro.")
 
         oid = ensure_object_id(id)
@@ -115,7 +139,7 @@ class CredentialTypeService:
 
         try:
             result = UploadService.upload_file(id=id, dir='credentials_types', file=file, max_file_size=CredentialTypeService.MAX_FILE_SIZE_KB, allowed_content_types=CredentialTypeService.ALLOWED_CONTENT_TYPES)
-            credential_type_coll.update_one({"_id": oid}, {"$set": {"has_image": True}})
+            credential_type_coll.update_one({"_id": oid}, doc_version.bump({"$set": {"has_image": True}}))
 
             return result
         except Exception as e:
@@ -132,7 +156,7 @@ class CredentialTypeService:
 
         try:
             result = UploadService.delete_file(id=id, dir='credentials_types')
-            credential_type_coll.update_one({"_id": oid}, {"$set": {"has_image": False}})
+            credential_type_coll.update_one({"_id": oid}, doc_version.bump({"$set": {"has_image": False}}))
 
             return result
         except Exception as e:
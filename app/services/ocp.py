@@ -1,16 +1,28 @@
 
 from uuid import UUID
-import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
 from app.dataprovider.mongo.models.ocp import collection as ocp_coll
+from app.dataprovider.mongo.models.ocp import read_collection as ocp_read_coll
+from app.dataprovider.mongo.models.ocp_structure import dehydrate, hydrate, hydrate_many
 from app.schemas.ocp import (
     OCPCreate, OCPUpdate, OCPOutList, OCPOutDetail
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError
-from app.core.utils.mongo import ensure_object_id
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, PreconditionFailedError
+from app.core.utils.mongo import ensure_object_id, paginate, fetch_by_ids, sparse_projection, sparse_dump
+from app.core.cache_decorators import version_bump, evict_dependents
+from app.core import doc_version
 from pymongo.errors import DuplicateKeyError
 from app.core.ocp.ocp_converter import OCPConverter
 from app.core.ocp.structure_fetcher import StructureFetcher
 
+OCP_BULK_CONCURRENCY = int(os.getenv("OCP_BULK_CONCURRENCY", 16))
+
+
 class OCPService:
 
     @staticmethod
@@ -20,30 +32,43 @@ class OCPService:
         if name is not None and str(name).strip() != "":
             filtro["name"] = {"$regex": f".*{str(name)}.*", "$options": "i"}
 
-        skip = (page - 1) * rpp
+        return paginate(ocp_read_coll, filtro, OCPOutList, page, rpp)
+
+    @staticmethod
+    def get_by_id(id: str) -> OCPOutDetail:
+        oid = ensure_object_id(id)
+        doc = ocp_read_coll.find_one({"_id": oid})
 
-        cursor = ocp_coll.find(filtro).sort("name", 1).skip(skip).limit(rpp)
+        if not doc:
+            raise NotFoundError("OCP não encontrado")
 
-        items: list[OCPOutList] = [OCPOutList.from_raw(doc) for doc in cursor]
+        return OCPOutDetail.from_raw(hydrate(doc))
 
-        total = ocp_coll.count_documents(filtro)
-        total_pages = math.ceil(total / rpp) if rpp > 0 else 1
+    @staticmethod
+    def version_state(id: str) -> doc_version.VersionState:
+        return doc_version.state(ocp_read_coll, id)
 
+    @staticmethod
+    def get_many(ids: List[str]) -> dict:
+        """Detalhe de vários OCPs com um único `$in` (e um para as estruturas), na ordem pedida."""
+        docs, missing = fetch_by_ids(ids, lambda oids: ocp_read_coll.find({"_id": {"$in": oids}}))
         return {
-            "total": total,
-            "pages": total_pages,
-            "items": items,
+            "items": [OCPOutDetail.from_raw(doc) for doc in hydrate_many(docs)],
+            "missing": missing,
         }
 
     @staticmethod
-    def get_by_id(id: str) -> OCPOutDetail:
+    def get_fields(id: str, fields: List[str]) -> dict:
+        """
+        Detalhe só com os campos pedidos (`?fields=`); o Mongo retorna apenas esses caminhos.
+        """
         oid = ensure_object_id(id)
-        doc = ocp_coll.find_one({"_id": oid})
+        doc = ocp_read_coll.find_one({"_id": oid}, sparse_projection(OCPOutDetail, fields))
 
         if not doc:
             raise NotFoundError("OCP não encontrado")
 
-        return OCPOutDetail.from_raw(doc)
+        return sparse_dump(OCPOutDetail, hydrate(doc), fields)
 
     @staticmethod
     def create(contractor_id: UUID, payload: OCPCreate) -> OCPOutDetail:
@@ -61,18 +86,76 @@ class OCPService:
                 "name": payload_data["name"],
                 "enabled": payload_data["enabled"],
                 "contractor_id": contractor_id,
-                "ocp": ocp
+                "ocp": dehydrate(ocp)
             }
 
-            result = ocp_coll.insert_one(to_insert)
+            result = ocp_coll.insert_one(doc_version.stamp(to_insert))
             created = ocp_coll.find_one({"_id": result.inserted_id})
-            return OCPOutDetail.from_raw(created)
+            return OCPOutDetail.from_raw(hydrate(created))
 
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um OCP com este nome")
 
     @staticmethod
-    def update(id: str, payload: OCPUpdate) -> OCPOutDetail:
+    def bulk_import(contractor_id: UUID, items: list[OCPCreate]) -> Iterator[dict]:
+        """
+        Importa vários OCPs de uma vez:
+        - busca e converte as estruturas em paralelo (até OCP_BULK_CONCURRENCY simultâneas)
+        - insere todos os convertidos com um único bulk_write (ordered=False)
+        Gera uma linha de status por item (falhas de busca assim que ocorrem) e um resumo final.
+        """
+        summary = {"total": len(items), "created": 0, "failed": 0, "duplicated": 0}
+
+        def _prepare(payload: OCPCreate) -> dict:
+            source = payload.source.model_dump()
+            structure = StructureFetcher.get_structure(source["type"], source["url"], source["headers"])
+            return {
+                "_id": ObjectId(),
+                "name": payload.name,
+                "enabled": payload.enabled,
+                "contractor_id": str(contractor_id),
+                "ocp": dehydrate(OCPConverter.ocp(source["type"], structure, url=source["url"], headers=source["headers"])),
+                doc_version.VERSION_FIELD: 1,
+            }
+
+        prepared: dict[int, dict] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(OCP_BULK_CONCURRENCY, len(items)))) as executor:
+            futures = {executor.submit(_prepare, payload): index for index, payload in enumerate(items)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    prepared[index] = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    yield {"index": index, "name": items[index].name, "status": "failed", "error": str(getattr(e, "detail", e))}
+
+        if prepared:
+            indexes = sorted(prepared)
+            write_errors = {}
+            try:
+                ocp_coll.bulk_write([InsertOne(prepared[i]) for i in indexes], ordered=False)
+            except BulkWriteError as e:
+                # o índice do erro é a posição na lista de operações
+                write_errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+
+            for position, index in enumerate(indexes):
+                err = write_errors.get(position)
+                if err is None:
+                    summary["created"] += 1
+                    yield {"index": index, "name": items[index].name, "status": "created", "id": str(prepared[index]["_id"])}
+                elif err.get("code") == 11000:
+                    summary["duplicated"] += 1
+                    yield {"index": index, "name": items[index].name, "status": "duplicated", "error": "Já existe um OCP com este nome"}
+                else:
+                    summary["failed"] += 1
+                    yield {"index": index, "name": items[index].name, "status": "failed", "error": err.get("errmsg")}
+
+        yield {"summary": summary}
+
+    @staticmethod
+    @version_bump("ocp")
+    @evict_dependents("ocp")
+    def update(id: str, payload: OCPUpdate, if_match: Optional[str] = None) -> OCPOutDetail:
         oid = ensure_object_id(id)
         payload_data = payload.model_dump()
 
@@ -86,24 +169,28 @@ class OCPService:
         data = {
             "name": payload_data["name"],
             "enabled": payload_data["enabled"],
-            "ocp": ocp
+            "ocp": dehydrate(ocp)
         }
 
         try:
             updated = ocp_coll.find_one_and_update(
-                {"_id": oid},
-                {"$set": data},
+                {"_id": oid, **doc_version.expect(ocp_coll, oid, if_match)},
+                doc_version.bump({"$set": data}),
                 return_document=True
             )
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um OCP com este nome")
 
         if not updated:
+            if if_match:
+                raise PreconditionFailedError()
             raise NotFoundError("OCP não encontrada")
 
-        return OCPOutDetail.from_raw(updated)
+        return OCPOutDetail.from_raw(hydrate(updated))
 
     @staticmethod
+    @version_bump("ocp")
+    @evict_dependents("ocp")
     def delete(id: str) -> bool:
         oid = ensure_object_id(id)
         doc = ocp_coll.find_one({"_id": oid})
@@ -0,0 +1,174 @@
+"""
+Atualização periódica das estruturas dos OCPs.
+
+Um único worker do cluster (LeaderLock no Redis) rebusca a origem de cada OCP habilitado,
+converte com o OCPConverter e grava apenas os campos que mudaram ($set/$unset por caminho).
+A concorrência é limitada no total e por host, com intervalo mínimo entre requisições ao
+mesmo host, para não sobrecarregar upstreams que hospedam vários OCPs.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Tuple
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from app.dataprovider.mongo.models.ocp import collection as ocp_coll
+from app.dataprovider.mongo.models.ocp_structure import dehydrate, load_structures
+from app.core.ocp.ocp_converter import OCPConverter
+from app.core.ocp.structure_fetcher import StructureFetcher
+from app.core.leader import LeaderLock
+from app.core import entity_version, doc_version
+from app.core.logger_config import info, debug, error
+
+load_dotenv()
+
+# 0 (padrão) desliga o agendamento; ex.: 900 para rebuscar a cada 15 min
+OCP_REFRESH_INTERVAL_SECONDS = int(os.getenv("OCP_REFRESH_INTERVAL_SECONDS", 0))
+OCP_REFRESH_CONCURRENCY = int(os.getenv("OCP_REFRESH_CONCURRENCY", 8))
+OCP_REFRESH_PER_HOST = int(os.getenv("OCP_REFRESH_PER_HOST", 2))
+OCP_REFRESH_HOST_DELAY_SECONDS = float(os.getenv("OCP_REFRESH_HOST_DELAY_SECONDS", 0.5))
+
+_MISSING = object()
+
+
+class _HostPoliteness:
+    """Limita requisições simultâneas e impõe intervalo mínimo por host."""
+
+    def __init__(self, per_host: int, delay_seconds: float):
+        self.per_host = per_host
+        self.delay_seconds = delay_seconds
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.per_host)
+            return self._semaphores[host]
+
+    def run(self, host: str, fn, *args):
+        with self._semaphore(host):
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot.get(host, now))
+                self._next_slot[host] = slot + self.delay_seconds
+            if slot > now:
+                time.sleep(slot - now)
+            return fn(*args)
+
+
+def diff_fields(old: Any, new: Any, path: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Compara dois documentos e retorna ($set, $unset) com caminhos em notação de ponto.
+    Dicts são comparados campo a campo; listas e valores simples são substituídos inteiros.
+    """
+    to_set: Dict[str, Any] = {}
+    to_unset: Dict[str, str] = {}
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            child_set, child_unset = diff_fields(old.get(key, _MISSING), value, f"{path}.{key}")
+            to_set.update(child_set)
+            to_unset.update(child_unset)
+        for key in old.keys() - new.keys():
+            to_unset[f"{path}.{key}"] = ""
+    elif old is _MISSING or old != new:
+        to_set[path] = new
+
+    return to_set, to_unset
+
+
+class OCPRefreshService:
+
+    @staticmethod
+    def refresh_one(doc: dict) -> str:
+        """Rebusca e grava as diferenças de um OCP. Retorna 'changed' | 'unchanged'."""
+        source = doc["ocp"]["metadata"]["source"]
+        structure = StructureFetcher.get_structure(
+            source["type"], source["url"], source.get("headers") or {}, fresh_seconds=0
+        )
+        # OCPs vindos de OCP-M são gravados pelo conversor com type "mcp": a resposta
+        # chega no envelope padrão ({..., "data": {"tools": [...]}}) e precisa ser aberta
+        if isinstance(structure, dict) and "tools" not in structure and isinstance(structure.get("data"), dict):
+            structure = structure["data"]
+
+        new_ocp = OCPConverter.ocp(source["type"], structure, url=source["url"], headers=source.get("headers") or {})
+
+        stored = doc["ocp"]
+        current = stored.get("structure")
+        if current is None and stored.get("structure_ref"):
+            current = load_structures([stored["structure_ref"]]).get(stored["structure_ref"])
+
+        # upstream sem tools (ex.: fora do ar respondendo 200) não apaga o que já existe
+        if (current or {}).get("tools") and not new_ocp["structure"]["tools"]:
+            raise ValueError("upstream retornou estrutura sem tools; mantendo a versão atual")
+
+        # estrutura vira referência por hash: mudou o conteúdo, muda só ocp.structure_ref
+        # (documentos antigos com estrutura embutida são migrados aqui); com o mesmo hash
+        # nada é gravado em ocp_structure
+        to_set, to_unset = diff_fields(stored, dehydrate(new_ocp, stored.get("structure_ref")), "ocp")
+        if not to_set and not to_unset:
+            return "unchanged"
+
+        update: Dict[str, dict] = doc_version.bump({})
+        if to_set:
+            update["$set"] = to_set
+        if to_unset:
+            update["$unset"] = to_unset
+
+        # só aplica se o OCP não foi editado (PUT) durante a busca
+        result = ocp_coll.update_one({"_id": doc["_id"], "ocp.metadata.source.url": source["url"]}, update)
+        debug("[OCP REFRESH] %s: %s", doc["_id"], sorted(to_set) + sorted(to_unset), event="ocp_refresh")
+        if not result.modified_count:
+            return "unchanged"
+
+        entity_version.bump("ocp", str(doc["_id"]))
+        return "changed"
+
+    @staticmethod
+    def refresh_all(lock: LeaderLock = None) -> dict:
+        """Atualiza todos os OCPs habilitados. Retorna contadores da execução."""
+        started = time.perf_counter()
+        docs = list(ocp_coll.find({"enabled": True, "ocp.metadata.source.url": {"$exists": True}}, {"ocp": 1}))
+        politeness = _HostPoliteness(OCP_REFRESH_PER_HOST, OCP_REFRESH_HOST_DELAY_SECONDS)
+        stats = {"checked": len(docs), "changed": 0, "unchanged": 0, "failed": 0}
+
+        def _task(doc):
+            host = urlparse(doc["ocp"]["metadata"]["source"]["url"]).netloc
+            return politeness.run(host, OCPRefreshService.refresh_one, doc)
+
+        with ThreadPoolExecutor(max_workers=max(1, OCP_REFRESH_CONCURRENCY)) as executor:
+            futures = {executor.submit(_task, doc): doc["_id"] for doc in docs}
+            for future in as_completed(futures):
+                try:
+                    stats[future.result()] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    error("[OCP REFRESH] Falha ao atualizar %s: %s", futures[future], getattr(e, "detail", e))
+                if lock:
+                    lock.renew()
+
+        stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000)
+        info("[OCP REFRESH] %s", stats)
+        return stats
+
+
+async def run_scheduler() -> None:
+    """Loop do agendador: a cada intervalo, só o líder do cluster executa o refresh."""
+    # a liderança sobrevive entre ciclos; se o líder cair, outro assume após o TTL
+    lock = LeaderLock("ocp_refresh", ttl_seconds=OCP_REFRESH_INTERVAL_SECONDS * 2)
+    try:
+        while True:
+            if await asyncio.to_thread(lock.acquire):
+                try:
+                    await asyncio.to_thread(OCPRefreshService.refresh_all, lock)
+                except Exception as e:
+                    error("[OCP REFRESH] Execução falhou: %s", e)
+            await asyncio.sleep(OCP_REFRESH_INTERVAL_SECONDS)
+    finally:
+        await asyncio.to_thread(lock.release)
@@ -1,7 +1,7 @@
 from uuid import UUID
-import math
 from pymongo.errors import DuplicateKeyError
 from app.dataprovider.mongo.models.ocpm import collection as ocpm_coll
+from app.dataprovider.mongo.models.ocpm import read_collection as ocpm_read_coll
 from app.schemas.ocpm import (
     OCPMCreate,
     OCPMUpdate,
@@ -9,9 +9,11 @@ from app.schemas.ocpm import (
     OCPMOutDetail,
 )
 from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError
-from app.core.utils.mongo import ensure_object_id
+from app.core.utils.mongo import ensure_object_id, paginate
 from app.dataprovider.mongo.models.ocpm import get_ocpm_detail, validate_service
 from app.dataprovider.mongo.base import db as mongo_db
+from app.core.cache_decorators import cache_evict
+from app.dataprovider.mongo.models import reference
 
 
 class OCPMService:
@@ -27,18 +29,7 @@ class OCPMService:
         if name and str(name).strip() != "":
             filtro["name"] = {"$regex": f".*{str(name)}.*", "$options": "i"}
 
-        skip = (page - 1) * rpp
-        cursor = ocpm_coll.find(filtro).sort("name", 1).skip(skip).limit(rpp)
-
-        items: list[OCPMOutList] = [OCPMOutList.from_raw(doc) for doc in cursor]
-        total = ocpm_coll.count_documents(filtro)
-        total_pages = math.ceil(total / rpp) if rpp > 0 else 1
-
-        return {
-            "total": total,
-            "pages": total_pages,
-            "items": items,
-        }
+        return paginate(ocpm_read_coll, filtro, OCPMOutList, page, rpp)
 
     # ========= GET BY ID =========
     @staticmethod
@@ -46,7 +37,7 @@ class OCPMService:
         """
         Busca um OCP-M pelo ID.
         """
-        doc = get_ocpm_detail(id)
+        doc = get_ocpm_detail(id, source=ocpm_read_coll)
 
         if not doc:
             raise NotFoundError("OCP-M não encontrado")
@@ -55,6 +46,7 @@ class OCPMService:
 
     # ========= CREATE =========
     @staticmethod
+    @cache_evict(["ocpm_manifest:registry:contractor_id={contractor_id}"])
     def create(contractor_id: UUID, payload: OCPMCreate) -> OCPMOutDetail:
         """
         Cria um novo OCP-M.
@@ -67,6 +59,7 @@ class OCPMService:
 
             result = ocpm_coll.insert_one(data)
             created = ocpm_coll.find_one({"_id": result.inserted_id})
+            reference.sync("ocp-m", created)
             return OCPMOutDetail.from_raw(created)
 
         except DuplicateKeyError:
@@ -74,6 +67,11 @@ class OCPMService:
 
     # ========= UPDATE =========
     @staticmethod
+    @cache_evict(
+        ["ocpm_manifest:id={id}", "ocpm_manifest:schema:id={id}", "ocpm_manifest:tools:id={id}", "ocpm_manifest:registry"],
+        key_params=["id"],
+        match_prefix=True,
+    )
     def update(id: str, payload: OCPMUpdate) -> OCPMOutDetail:
         """
         Atualiza um OCP-M existente.
@@ -95,10 +93,16 @@ class OCPMService:
         if not updated:
             raise NotFoundError("OCP-M não encontrado")
 
+        reference.sync("ocp-m", updated)
         return OCPMOutDetail.from_raw(updated)
 
     # ========= DELETE =========
     @staticmethod
+    @cache_evict(
+        ["ocpm_manifest:id={id}", "ocpm_manifest:schema:id={id}", "ocpm_manifest:tools:id={id}", "ocpm_manifest:registry"],
+        key_params=["id"],
+        match_prefix=True,
+    )
     def delete(id: str) -> bool:
         """
         Exclui um OCP-M.
@@ -114,4 +118,6 @@ class OCPMService:
         if result.deleted_count == 0:
             raise NotFoundError("OCP-M não encontrado")
 
+        reference.remove("ocp-m", id)
+
         return True
@@ -5,6 +5,11 @@ from app.dataprovider.mongo.models.ocpm import collection as ocpm_coll
 from app.dataprovider.mongo.models.service import collection as service_coll
 from app.services.service import ServiceService
 from app.core.exceptions.types import NotFoundError
+from app.core.cache_decorators import cacheable
+from app.core.manifest_store import get_versioned
+
+MANIFEST_CACHE_PREFIX = "ocpm_manifest"
+MANIFEST_CACHE_TTL_SECONDS = 300
 
 
 class OCPMDynamicService:
@@ -41,16 +46,13 @@ class OCPMDynamicService:
     @staticmethod
     def schema(id: str) -> dict:
         """Retorna schema OpenAPI-like do OCP-M"""
-        ocpm = ocpm_coll.find_one({"_id": ObjectId(id)})
-        if not ocpm:
-            raise NotFoundError(f"OCP-M com id={id} não encontrado")
+        manifest = OCPMDynamicService._manifest(id)
 
         tools_metadata = []
-        for t in ocpm.get("tools", []):
-            service_id = t["service"]["id"]
-            service_doc = service_coll.find_one({"_id": ObjectId(service_id)}, {"input_schema": 1, "method": 1, "url": 1})
+        for t in manifest["tools"]:
+            service_doc = t["service"]
 
-            if not service_doc:
+            if service_doc is None:
                 continue
 
             tools_metadata.append({
@@ -63,9 +65,9 @@ class OCPMDynamicService:
             })
 
         return {
-            "ocp_m_id": str(ocpm["_id"]),
-            "name": ocpm.get("name"),
-            "description": ocpm.get("description"),
+            "ocp_m_id": manifest["id"],
+            "name": manifest.get("name"),
+            "description": manifest.get("description"),
             "base_url": f"/ocp-m/{id}",
             "tools": tools_metadata,
             "metadata": {
@@ -78,42 +80,85 @@ class OCPMDynamicService:
     @staticmethod
     def list_tools(id: str) -> dict:
         """Retorna formato padrão FastMCP"""
-        ocpm = ocpm_coll.find_one({"_id": ObjectId(id)})
-        if not ocpm:
-            raise NotFoundError(f"OCP-M com id={id} não encontrado")
+        manifest = OCPMDynamicService._manifest(id)
 
         return {
-            "id": str(ocpm["_id"]),
-            "name": ocpm.get("name"),
-            "description": ocpm.get("description"),
+            "id": manifest["id"],
+            "name": manifest.get("name"),
+            "description": manifest.get("description"),
             "tools": [
                 {
                     "name": t["name"],
                     "description": t.get("description"),
-                    "args": OCPMDynamicService._get_tool_schema(t["service"]["id"])
+                    "args": (t["service"] or {}).get("input_schema", {})
                 }
-                for t in ocpm.get("tools", [])
+                for t in manifest["tools"]
             ]
         }
 
+    # ========= Documentos versionados (ETag) =========
+    # Chaves sob o prefixo do manifesto: as mesmas invalidações valem para os documentos.
+    @staticmethod
+    def registry_document(contractor_id: UUID) -> tuple[list, str]:
+        return get_versioned(
+            f"{MANIFEST_CACHE_PREFIX}:registry:contractor_id={contractor_id}",
+            lambda: OCPMDynamicService.registry(contractor_id),
+        )
+
+    @staticmethod
+    def schema_document(id: str) -> tuple[dict, str]:
+        return get_versioned(f"{MANIFEST_CACHE_PREFIX}:schema:id={id}", lambda: OCPMDynamicService.schema(id))
+
+    @staticmethod
+    def tools_document(id: str) -> tuple[dict, str]:
+        return get_versioned(f"{MANIFEST_CACHE_PREFIX}:tools:id={id}", lambda: OCPMDynamicService.list_tools(id))
+
     # ==========================================================
     @staticmethod
     def execute_tool(id: str, tool_name: str, inputs: dict | None = None) -> dict:
         """Executa a tool (chama ServiceService.execute)"""
-        ocpm = ocpm_coll.find_one({"_id": ObjectId(id)})
-        if not ocpm:
-            raise NotFoundError(f"OCP-M com id={id} não encontrado")
+        manifest = OCPMDynamicService._manifest(id)
 
-        tool = next((t for t in ocpm.get("tools", []) if t["name"] == tool_name), None)
+        tool = next((t for t in manifest["tools"] if t["name"] == tool_name), None)
         if not tool:
             raise NotFoundError(f"Tool {tool_name} não encontrada neste OCP-M")
 
-        service_id = tool["service"]["id"]
-        return ServiceService.execute(service_id, inputs)
+        return ServiceService.execute(tool["service_id"], inputs)
 
     # ==========================================================
     @staticmethod
-    def _get_tool_schema(service_id: str) -> dict:
-        """Obtém o input_schema do service"""
-        doc = service_coll.find_one({"_id": ObjectId(service_id)})
-        return doc.get("input_schema", {}) if doc else {}
+    @cacheable(MANIFEST_CACHE_PREFIX, key_params=["id"], ttl_seconds=MANIFEST_CACHE_TTL_SECONDS)
+    def _manifest(id: str) -> dict:
+        """
+        Monta o manifesto do OCP-M (tools + dados dos services vinculados) com uma
+        única consulta `$in` nos services. Fica em cache até o OCP-M ou algum service
+        ser alterado (ver cache_evict em OCPMService e evict_dependents em ServiceService).
+        """
+        ocpm = ocpm_coll.find_one({"_id": ObjectId(id)}, {"name": 1, "description": 1, "tools": 1})
+        if not ocpm:
+            raise NotFoundError(f"OCP-M com id={id} não encontrado")
+
+        tools = ocpm.get("tools", [])
+        service_ids = {str(t["service"]["id"]) for t in tools}
+        services = {
+            str(doc["_id"]): {k: doc[k] for k in ("method", "url", "input_schema") if k in doc}
+            for doc in service_coll.find(
+                {"_id": {"$in": [ObjectId(sid) for sid in service_ids]}},
+                {"input_schema": 1, "method": 1, "url": 1},
+            )
+        }
+
+        return {
+            "id": str(ocpm["_id"]),
+            "name": ocpm.get("name"),
+            "description": ocpm.get("description"),
+            "tools": [
+                {
+                    "name": t["name"],
+                    "description": t.get("description"),
+                    "service_id": str(t["service"]["id"]),
+                    "service": services.get(str(t["service"]["id"])),
+                }
+                for t in tools
+            ],
+        }
@@ -0,0 +1,322 @@
+"""
+Endpoint MCP nativo (JSON-RPC 2.0 sobre streamable HTTP) para os OCP-Ms dinâmicos.
+
+O `initialize` cria uma sessão (header Mcp-Session-Id) que guarda o OCP-M resolvido,
+os documentos dos services, os tokens dos authenticators e um requests.Session com
+pool de conexões. Chamadas seguintes de `tools/list` / `tools/call` na mesma sessão
+não repetem nenhuma dessas etapas.
+
+As sessões ficam em memória do processo: um id desconhecido (expirado, outro worker,
+restart) responde 404 e o cliente MCP abre uma nova sessão.
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from app.dataprovider.mongo.models.service import collection as service_coll
+from app.services.ocpm_dynamic import OCPMDynamicService
+from app.services.service import ServiceService
+from app.core.exceptions.types import NotFoundError
+from app.core.logger_config import debug, info
+
+load_dotenv()
+
+MCP_PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+MCP_SESSION_IDLE_SECONDS = int(os.getenv("MCP_SESSION_IDLE_SECONDS", 900))
+MCP_MAX_SESSIONS = int(os.getenv("MCP_MAX_SESSIONS", 1000))
+MCP_AUTH_TOKEN_TTL_SECONDS = int(os.getenv("MCP_AUTH_TOKEN_TTL_SECONDS", 300))
+MCP_HTTP_POOL_SIZE = int(os.getenv("MCP_HTTP_POOL_SIZE", 10))
+
+# Códigos de erro JSON-RPC
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# ========= Sessão =========
+
+class MCPSession:
+    def __init__(self, ocpm_id: str, uid: Optional[str], protocol_version: str):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.id = secrets.token_urlsafe(24)
+        self.ocpm_id = ocpm_id
+        self.uid = uid
+        self.protocol_version = protocol_version
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+        self.manifest = OCPMDynamicService._manifest(ocpm_id)
+        self.tools = {t["name"]: t for t in self.manifest["tools"]}
+        self.services = self._load_services()
+        # authenticator_id -> (response_map, auth_response, expira_em)
+        self._auth: Dict[str, Tuple[dict, dict, float]] = {}
+
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MCP_HTTP_POOL_SIZE, pool_maxsize=MCP_HTTP_POOL_SIZE)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+    def _load_services(self) -> Dict[str, dict]:
+        ids = {t["service_id"] for t in self.manifest["tools"]}
+        return {
+            str(doc["_id"]): doc
+            for doc in service_coll.find({"_id": {"$in": [ObjectId(i) for i in ids]}})
+        }
+
+    def authenticate(self, authenticator_id: str) -> Tuple[dict, dict]:
+        """Reaproveita o token do authenticator enquanto estiver no TTL da sessão."""
+        # chamadas concorrentes na mesma sessão esperam um único login
+        with self.lock:
+            cached = self._auth.get(authenticator_id)
+            if cached and cached[2] > time.monotonic():
+                return cached[0], cached[1]
+
+            response_map, auth_response = ServiceService.authenticate(authenticator_id, http=self.http)
+            self._auth[authenticator_id] = (response_map, auth_response, time.monotonic() + MCP_AUTH_TOKEN_TTL_SECONDS)
+            return response_map, auth_response
+
+    def call_tool(self, name: str, arguments: Optional[dict]) -> Any:
+        tool = self.tools.get(name)
+        if not tool:
+            raise JsonRpcError(INVALID_PARAMS, f"Tool {name} não encontrada neste OCP-M")
+
+        service_id = tool["service_id"]
+        doc = self.services.get(service_id)
+        if doc is None:
+            raise JsonRpcError(INVALID_PARAMS, f"Service da tool {name} não encontrado")
+
+        result = ServiceService.execute(
+            service_id, arguments, doc=doc, http=self.http, auth_provider=self.authenticate
+        )
+
+        # token recusado pelo destino: descarta o token da sessão e tenta uma única vez de novo
+        if _is_unauthorized(result) and doc.get("authenticator_id") in self._auth:
+            with self.lock:
+                self._auth.pop(doc["authenticator_id"], None)
+            result = ServiceService.execute(
+                service_id, arguments, doc=doc, http=self.http, auth_provider=self.authenticate
+            )
+
+        return result
+
+    def close(self) -> None:
+        self.http.close()
+
+
+def _is_unauthorized(result: Any) -> bool:
+    return (
+        isinstance(result, dict)
+        and result.get("status") == "error"
+        and str(result.get("message", "")).startswith("Erro HTTP 401")
+    )
+
+
+class MCPSessionStore:
+    def __init__(self):
+        self._sessions: Dict[str, MCPSession] = {}
+        self._lock = threading.Lock()
+
+    def _evict_idle(self) -> None:
+        limit = time.monotonic() - MCP_SESSION_IDLE_SECONDS
+        expired = [s for s in self._sessions.values() if s.last_used < limit]
+
+        # acima do limite descarta as menos usadas recentemente
+        overflow = len(self._sessions) - len(expired) - MCP_MAX_SESSIONS + 1
+        if overflow > 0:
+            alive = sorted((s for s in self._sessions.values() if s.last_used >= limit), key=lambda s: s.last_used)
+            expired.extend(alive[:overflow])
+
+        for session in expired:
+            self._sessions.pop(session.id, None)
+            session.close()
+            debug("[MCP] sessão %s encerrada por inatividade", session.id)
+
+    def add(self, session: MCPSession) -> None:
+        with self._lock:
+            self._evict_idle()
+            self._sessions[session.id] = session
+
+    def get(self, session_id: str, ocpm_id: str, uid: Optional[str]) -> Optional[MCPSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session or session.ocpm_id != ocpm_id or session.uid != uid:
+                return None
+            if session.last_used < time.monotonic() - MCP_SESSION_IDLE_SECONDS:
+                self._sessions.pop(session_id, None)
+                session.close()
+                return None
+            session.last_used = time.monotonic()
+            return session
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            session.close()
+        return session is not None
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+sessions = MCPSessionStore()
+
+
+# ========= JSON-RPC =========
+
+class OCPMMCPService:
+    """
+    Despacha mensagens JSON-RPC do protocolo MCP:
+    - initialize      → cria a sessão e anuncia a capability `tools`
+    - ping            → {}
+    - tools/list      → tools do OCP-M com o input_schema dos services
+    - tools/call      → executa o service vinculado reaproveitando o estado da sessão
+    - notifications/* → aceitas sem resposta
+    """
+
+    @staticmethod
+    def handle(
+        ocpm_id: str,
+        payload: Any,
+        session_id: Optional[str],
+        uid: Optional[str],
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Processa uma mensagem (ou lote) JSON-RPC.
+        Retorna (resposta, id da sessão); resposta None = só notificações (HTTP 202).
+        Lança NotFoundError quando a sessão informada não existe mais (HTTP 404).
+        """
+        messages = payload if isinstance(payload, list) else [payload]
+        if not messages:
+            return _error(None, INVALID_REQUEST, "Lote vazio"), session_id
+
+        session = None
+        if session_id:
+            session = sessions.get(session_id, ocpm_id, uid)
+            if session is None:
+                raise NotFoundError("Sessão MCP não encontrada")
+
+        responses = []
+        for message in messages:
+            response, session = OCPMMCPService._dispatch(ocpm_id, message, session, uid)
+            if response is not None:
+                responses.append(response)
+
+        if not responses:
+            result = None
+        elif isinstance(payload, list):
+            result = responses
+        else:
+            result = responses[0]
+
+        return result, session.id if session else None
+
+    @staticmethod
+    def _dispatch(ocpm_id: str, message: Any, session: Optional[MCPSession], uid: Optional[str]):
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or "method" not in message:
+            return _error(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Requisição JSON-RPC inválida"), session
+
+        msg_id = message.get("id")
+        method = message["method"]
+        params = message.get("params") or {}
+        is_notification = "id" not in message
+
+        try:
+            if method == "initialize":
+                if session is None:
+                    session = OCPMMCPService._initialize(ocpm_id, params, uid)
+                result = {
+                    "protocolVersion": session.protocol_version,
+                    "capabilities": {"tools": {"listChanged": False}},
+                    "serverInfo": {"name": f"ocp-m:{session.manifest.get('name')}", "version": "1.0.0-ocpm"},
+                    "instructions": session.manifest.get("description") or "",
+                }
+            elif method.startswith("notifications/"):
+                return None, session
+            elif method == "ping":
+                result = {}
+            elif session is None:
+                raise JsonRpcError(INVALID_REQUEST, "Sessão não inicializada: envie initialize primeiro")
+            elif method == "tools/list":
+                result = {"tools": OCPMMCPService._tools(session)}
+            elif method == "tools/call":
+                result = OCPMMCPService._call(session, params)
+            else:
+                raise JsonRpcError(METHOD_NOT_FOUND, f"Método não suportado: {method}")
+        except JsonRpcError as e:
+            return (None if is_notification else _error(msg_id, e.code, e.message)), session
+        except NotFoundError as e:
+            return (None if is_notification else _error(msg_id, INVALID_PARAMS, str(e.detail))), session
+        except Exception as e:
+            return (None if is_notification else _error(msg_id, INTERNAL_ERROR, str(e))), session
+
+        if is_notification:
+            return None, session
+        return {"jsonrpc": "2.0", "id": msg_id, "result": result}, session
+
+    @staticmethod
+    def _initialize(ocpm_id: str, params: dict, uid: Optional[str]) -> MCPSession:
+        requested = params.get("protocolVersion")
+        version = requested if requested in MCP_PROTOCOL_VERSIONS else MCP_PROTOCOL_VERSIONS[0]
+
+        session = MCPSession(ocpm_id, uid, version)
+        sessions.add(session)
+        info("[MCP] sessão %s aberta para OCP-M %s (%d tools)", session.id, ocpm_id, len(session.tools))
+        return session
+
+    @staticmethod
+    def _tools(session: MCPSession) -> List[dict]:
+        return [
+            {
+                "name": t["name"],
+                "description": t.get("description") or "",
+                "inputSchema": (t["service"] or {}).get("input_schema") or {"type": "object", "properties": {}},
+            }
+            for t in session.manifest["tools"]
+        ]
+
+    @staticmethod
+    def _call(session: MCPSession, params: dict) -> dict:
+        name = params.get("name")
+        if not name:
+            raise JsonRpcError(INVALID_PARAMS, "Parâmetro 'name' é obrigatório")
+
+        result = session.call_tool(name, params.get("arguments"))
+
+        is_error = isinstance(result, dict) and result.get("status") == "error"
+        content = {
+            "content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, default=str)}],
+            "isError": is_error,
+        }
+        if isinstance(result, dict):
+            content["structuredContent"] = result
+        return content
+
+    @staticmethod
+    def terminate(session_id: str) -> bool:
+        return sessions.remove(session_id)
+
+
+def _error(msg_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
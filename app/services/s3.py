@@ -1,21 +1,48 @@
-import boto3
-from botocore.exceptions import ClientError
+import threading
 from typing import Optional
 from app.core.s3 import settings
+from app.core.logger_config import error
 from fastapi import UploadFile
 import os
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Cria o client S3 sob demanda (boto3 só é importado no primeiro upload/delete)
+    e reaproveita a mesma instância, que é thread-safe.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import boto3
+
+                _client = boto3.client(
+                    "s3",
+                    aws_access_key_id=settings.aws_access_key,
+                    aws_secret_access_key=settings.aws_secret_key,
+                    region_name=settings.s3_region
+                )
+    return _client
+
+
+def close_s3_client() -> None:
+    """Fecha as conexões HTTP do client S3, se ele chegou a ser criado."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
 
 class S3Service:
     def __init__(self):
         self.bucket_name = settings.s3_bucket
         self.region = settings.s3_region
-        self.client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.aws_access_key,
-            aws_secret_access_key=settings.aws_secret_key,
-            region_name=settings.s3_region
-        )
+        self.client = get_s3_client()
 
     def upload_public_file(
         self,
@@ -28,6 +55,8 @@ class S3Service:
         salvando SEM extensão no nome.
         Retorna a URL pública.
         """
+        from botocore.exceptions import ClientError
+
         try:
             # ✅ Força nome SEM extensão
             if filename:
@@ -54,7 +83,7 @@ class S3Service:
             return public_url
 
         except ClientError as e:
-            print(f"[S3Service] Error uploading file: {e}")
+            error("[S3Service] Error uploading file: %s", e, key=key)
             return None
 
     def delete_public_file(
@@ -66,6 +95,8 @@ class S3Service:
         Deleta um arquivo público do bucket S3.
         Retorna True se deletado com sucesso, False caso contrário.
         """
+        from botocore.exceptions import ClientError
+
         key = f"public/{directory.strip('/')}/{filename}"
 
         try:
@@ -73,5 +104,5 @@ class S3Service:
             return True
 
         except ClientError as e:
-            print(f"[S3Service] Error deleting file: {e}")
+            error("[S3Service] Error deleting file: %s", e, key=key)
             return False
@@ -1,11 +1,9 @@
 from uuid import UUID
-import math
 import re
-import requests
 from pymongo.errors import DuplicateKeyError
-from typing import Any, Dict
-from bson import ObjectId
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from app.dataprovider.mongo.models.service import collection as service_coll
+from app.dataprovider.mongo.models.service import read_collection as service_read_coll
 from app.dataprovider.mongo.models.authenticator import collection as auth_coll
 from app.schemas.service import (
     ServiceCreate,
@@ -13,9 +11,13 @@ from app.schemas.service import (
     ServiceOutList,
     ServiceOutDetail,
 )
-from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BadRequestError
-from app.core.utils.mongo import ensure_object_id
+from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BadRequestError, PreconditionFailedError
+from app.core.utils.mongo import ensure_object_id, paginate, sparse_projection, sparse_dump
 from app.services.authenticator import AuthenticatorService
+from app.core.cache_decorators import evict_dependents
+from app.core import doc_version, metrics
+from app.core.request_loader import load
+from app.dataprovider.mongo.models import reference
 
 
 class ServiceService:
@@ -31,18 +33,7 @@ class ServiceService:
         if name and str(name).strip() != "":
             filtro["name"] = {"$regex": f".*{str(name)}.*", "$options": "i"}
 
-        skip = (page - 1) * rpp
-        cursor = service_coll.find(filtro).sort("name", 1).skip(skip).limit(rpp)
-
-        items: list[ServiceOutList] = [ServiceOutList.from_raw(doc) for doc in cursor]
-        total = service_coll.count_documents(filtro)
-        total_pages = math.ceil(total / rpp) if rpp > 0 else 1
-
-        return {
-            "total": total,
-            "pages": total_pages,
-            "items": items,
-        }
+        return paginate(service_read_coll, filtro, ServiceOutList, page, rpp)
 
     # ========= GET BY ID =========
     @staticmethod
@@ -51,13 +42,30 @@ class ServiceService:
         Busca um serviço pelo ID.
         """
         oid = ensure_object_id(id)
-        doc = service_coll.find_one({"_id": oid})
+        doc = service_read_coll.find_one({"_id": oid})
 
         if not doc:
             raise NotFoundError("Serviço não encontrado")
 
         return ServiceOutDetail.from_raw(doc)
 
+    @staticmethod
+    def version_state(id: str) -> doc_version.VersionState:
+        return doc_version.state(service_read_coll, id)
+
+    @staticmethod
+    def get_fields(id: str, fields: List[str]) -> dict:
+        """
+        Detalhe só com os campos pedidos (`?fields=`); o Mongo retorna apenas esses caminhos.
+        """
+        oid = ensure_object_id(id)
+        doc = service_read_coll.find_one({"_id": oid}, sparse_projection(ServiceOutDetail, fields))
+
+        if not doc:
+            raise NotFoundError("Serviço não encontrado")
+
+        return sparse_dump(ServiceOutDetail, doc, fields)
+
     # ========= CREATE =========
     @staticmethod
     def create(contractor_id: UUID, payload: ServiceCreate) -> ServiceOutDetail:
@@ -68,8 +76,9 @@ class ServiceService:
             data = payload.model_dump()
             data["contractor_id"] = str(contractor_id)
 
-            result = service_coll.insert_one(data)
+            result = service_coll.insert_one(doc_version.stamp(data))
             created = service_coll.find_one({"_id": result.inserted_id})
+            reference.sync("service", created)
             return ServiceOutDetail.from_raw(created)
 
         except DuplicateKeyError:
@@ -77,7 +86,9 @@ class ServiceService:
 
     # ========= UPDATE =========
     @staticmethod
-    def update(id: str, payload: ServiceUpdate) -> ServiceOutDetail:
+    # invalida só os manifestos dos OCP-Ms que usam este service
+    @evict_dependents("service")
+    def update(id: str, payload: ServiceUpdate, if_match: Optional[str] = None) -> ServiceOutDetail:
         """
         Atualiza um serviço existente.
         """
@@ -86,20 +97,25 @@ class ServiceService:
 
         try:
             updated = service_coll.find_one_and_update(
-                {"_id": oid},
-                {"$set": data},
+                {"_id": oid, **doc_version.expect(service_coll, oid, if_match)},
+                doc_version.bump({"$set": data}),
                 return_document=True
             )
         except DuplicateKeyError:
             raise DuplicateKeyDomainError("Já existe um serviço com este nome")
 
         if not updated:
+            if if_match:
+                raise PreconditionFailedError()
             raise NotFoundError("Serviço não encontrado")
 
+        reference.sync("service", updated)
         return ServiceOutDetail.from_raw(updated)
 
     # ========= DELETE =========
     @staticmethod
+    # invalida só os manifestos dos OCP-Ms que usam este service
+    @evict_dependents("service")
     def delete(id: str) -> bool:
         """
         Exclui um serviço.
@@ -115,10 +131,18 @@ class ServiceService:
         if result.deleted_count == 0:
             raise NotFoundError("Serviço não encontrado")
 
+        reference.remove("service", id)
+
         return True
 
     @staticmethod
-    def execute(id: str, inputs: dict | None = None) -> dict:
+    def execute(
+        id: str,
+        inputs: dict | None = None,
+        doc: dict | None = None,
+        http=None,
+        auth_provider: Callable[[str], Tuple[dict, dict]] | None = None,
+    ) -> dict:
         """
         Executa um Service configurado.
         - Busca o service no banco
@@ -126,10 +150,19 @@ class ServiceService:
         - Lê o response_map do Authenticator e aplica nos headers
         - Interpreta o input_schema (path, body, query)
         - Executa a requisição final e retorna o resultado
+
+        Chamadores que executam vários services em sequência (ex.: sessão MCP) podem
+        reaproveitar estado: `doc` já resolvido, `http` (requests.Session com pool de
+        conexões) e `auth_provider(authenticator_id) -> (response_map, auth_response)`.
         """
+        import requests
+
+        http = http or requests
+
         try:
             # 1️⃣ Busca o documento do service
-            doc = service_coll.find_one({"_id": ObjectId(id)})
+            if doc is None:
+                doc = load(service_coll, id)
             if not doc:
                 raise NotFoundError(f"Service com id={id} não encontrado")
 
@@ -141,18 +174,10 @@ class ServiceService:
 
             # 2️⃣ Executa Authenticator se existir
             if authenticator_id:
-                auth_doc = auth_coll.find_one({"_id": ObjectId(authenticator_id)})
-                if not auth_doc:
-                    raise NotFoundError(f"Authenticator com id={authenticator_id} não encontrado")
-
-                response_map = auth_doc.get("response_map", {}) or {}
-                try:
-                    auth_response = AuthenticatorService.execute(authenticator_id)
-                    ServiceService._inject_response_map_into_headers(
-                        headers, response_map, auth_response
-                    )
-                except Exception as e:
-                    raise BadRequestError(f"Falha ao executar authenticator: {str(e)}")
+                response_map, auth_response = (auth_provider or ServiceService.authenticate)(authenticator_id)
+                ServiceService._inject_response_map_into_headers(
+                    headers, response_map, auth_response
+                )
 
             # 3️⃣ Monta a requisição conforme input_schema
             if inputs:
@@ -162,7 +187,9 @@ class ServiceService:
 
             # 4️⃣ Executa requisição principal
             try:
-                response = requests.request(method, url, headers=headers, json=body if body else None)
+                with metrics.upstream("service", url) as call:
+                    response = http.request(method, url, headers=headers, json=body if body else None)
+                    call.status = response.status_code
                 response.raise_for_status()
                 try:
                     return response.json()
@@ -190,6 +217,23 @@ class ServiceService:
         except Exception as e:
             return {"status": "error", "message": f"Erro crítico na execução: {str(e)}"}
 
+    # ======================================================================
+    @staticmethod
+    def authenticate(authenticator_id: str, http=None) -> Tuple[dict, dict]:
+        """Executa o Authenticator e retorna (response_map, resposta do authenticator)."""
+        # lido pelo loader da requisição: AuthenticatorService.execute reaproveita o documento
+        auth_doc = load(auth_coll, authenticator_id)
+        if not auth_doc:
+            raise NotFoundError(f"Authenticator com id={authenticator_id} não encontrado")
+
+        response_map = auth_doc.get("response_map", {}) or {}
+        try:
+            auth_response = AuthenticatorService.execute(authenticator_id, http=http)
+        except Exception as e:
+            raise BadRequestError(f"Falha ao executar authenticator: {str(e)}")
+
+        return response_map, auth_response
+
     # ======================================================================
     @staticmethod
     def _inject_response_map_into_headers(headers: dict, response_map: dict, auth_response: dict):
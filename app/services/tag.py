@@ -4,13 +4,14 @@ from fastapi import HTTPException
 import json
 
 from app.dataprovider.mongo.models.tag import collection as tag_coll
+from app.dataprovider.mongo.models.tag import read_collection as tag_read_coll
 from app.dataprovider.mongo.models.agent import collection as agent_coll
 from app.schemas.tag import (
     TagCreate, TagUpdate, TagOutList, TagOutDetail
 )
 from app.core.exceptions.types import NotFoundError, DuplicateKeyDomainError, BusinessDomainError
 from app.core.utils.mongo import ensure_object_id
-from app.core.cache_decorators import cacheable, cache_evict
+from app.core.cache_decorators import cacheable, cache_evict, version_bump
 from app.core.cache import cache_delete
 from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
@@ -22,7 +23,7 @@ class TagService:
     @cacheable("tags:all", key_params=["tag_type"], ttl_seconds=0)
     def get_all(tag_type: str) -> List[TagOutList]:
         items: list[TagOutList] = []
-        cursor = tag_coll.find(
+        cursor = tag_read_coll.find(
             {"tag_type": tag_type}
         ).sort("name", 1)  # 1 = ascendente, -1 = descendente
         
@@ -34,7 +35,7 @@ class TagService:
     @cacheable("tags", key_params=["id"], ttl_seconds=0)
     def get_by_id(id: str) -> TagOutDetail:
         oid = ensure_object_id(id)
-        doc = tag_coll.find_one({"_id": oid})
+        doc = tag_read_coll.find_one({"_id": oid})
 
         if not doc:
             raise NotFoundError("Tag não encontrada")
@@ -53,6 +54,7 @@ class TagService:
             raise DuplicateKeyDomainError("Já existe uma tag com este nome")
 
     @staticmethod
+    @version_bump("tag")
     def update(id: str, payload: TagUpdate) -> TagOutDetail:
         oid = ensure_object_id(id)
 
@@ -81,6 +83,7 @@ class TagService:
         return TagOutDetail.from_raw(updated)
 
     @staticmethod
+    @version_bump("tag")
     def delete(id: str) -> bool:
         oid = ensure_object_id(id)
         doc = tag_coll.find_one({"_id": oid})
@@ -90,8 +93,8 @@ class TagService:
 
         # Check if there are agents with this tag linked
         if doc.get("tag_type") == "agent":
-            agente_vinculado = agent_coll.find_one({"tags.tag.id": id})
-            if agente_vinculado:
+            # na collection de origem: o índice reverso em `reference` pode estar incompleto
+            if agent_coll.find_one({"tags.id": id}, {"_id": 1}):
                 raise BusinessDomainError("Existem agentes vinvulados a esta tag.")
 
         result = tag_coll.delete_one({"_id": oid})
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark da conversão documento do Mongo -> schema de saída (from_raw).
+
+Compara a construção validada (model_validate do mesmo conteúdo, custo equivalente ao
+from_raw anterior, que montava os modelos aninhados com validação) com o caminho
+`trusted` (model_construct compilado por classe) em documentos realistas de
+assistente e agente, e confere se a saída serializada é a mesma.
+
+Uso:
+    python -m bench.bench_from_raw --docs 2000 --repeat 10
+"""
+import argparse
+import time
+
+from bson import ObjectId
+from pydantic_core import to_json
+
+from app.schemas.agent import AgentOutDetail, AgentOutInternal
+from app.schemas.assistant import AssistantOutDetail, AssistantOutInternal
+
+
+# ========= Massa de dados =========
+
+def _agent_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "name": f"Agente {i}",
+        "description": "Atende solicitações de clientes. " * 8,
+        "system_message": "Você é um agente de atendimento. " * 40,
+        "enabled": True,
+        "has_image": i % 2 == 0,
+        "contractor_id": "5f1d7a2e-9c1b-4a53-8b0a-7f0c2a9d6e11",
+        "tags": [{"id": ObjectId(), "name": f"tag {j}"} for j in range(3)],
+        "ocps": [{"id": ObjectId(), "name": f"OCP {j}", "type": "mcp"} for j in range(4)],
+        "functions": [
+            {
+                "code": f"F{j}",
+                "name": f"Função {j}",
+                "action_type": "GET",
+                "description": "Consulta dados do cliente.",
+                "system_message": "Use quando o cliente pedir o saldo.",
+            }
+            for j in range(6)
+        ],
+        "tools": [
+            {
+                "tool": {"id": ObjectId(), "name": f"Tool {j}", "scope": {"read": True, "tables": ["a", "b"]}},
+                "code": f"T{j}",
+                "name": f"Ferramenta {j}",
+                "required": j == 0,
+            }
+            for j in range(5)
+        ],
+    }
+
+
+def _assistant_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "name": f"Assistente {i}",
+        "description": "Assistente de vendas. " * 10,
+        "system_message": "Você é um assistente. " * 60,
+        "enabled": True,
+        "ai_model": {"id": str(ObjectId()), "name": "gpt-4o"},
+        "profiles": [{"id": str(ObjectId()), "name": f"Perfil {j}"} for j in range(3)],
+        "agents": [
+            {
+                "agent": {
+                    "id": ObjectId(),
+                    "name": f"Agente {j}",
+                    "description": "Atende solicitações de clientes.",
+                    "system_message": "Você é um agente. " * 20,
+                    "id_public": str(ObjectId()),
+                    "enabled": True,
+                    "contractor_id": "5f1d7a2e-9c1b-4a53-8b0a-7f0c2a9d6e11",
+                },
+                "name": f"Agente {j}",
+                "system_message_compl": "Seja cordial.",
+                "secret": False,
+                "enabled": True,
+                "ai_model": {"id": str(ObjectId()), "name": "gpt-4o-mini"},
+                "profiles": [{"id": str(ObjectId()), "name": "Perfil"}],
+                "functions": [
+                    {
+                        "function": {"code": f"F{k}", "name": f"Função {k}", "description": "Consulta."},
+                        "system_message_compl": "Somente leitura.",
+                        "profiles": [{"id": str(ObjectId()), "name": "Perfil"}],
+                    }
+                    for k in range(4)
+                ],
+                "tools": [{"tool": {"id": str(ObjectId()), "name": f"Tool {k}"}, "name": f"Ferramenta {k}"} for k in range(3)],
+            }
+            for j in range(5)
+        ],
+    }
+
+
+def _timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(docs: int, repeat: int) -> None:
+    cases = (
+        ("agent detail", AgentOutDetail, [_agent_doc(i) for i in range(docs)]),
+        ("agent internal", AgentOutInternal, [_agent_doc(i) for i in range(docs)]),
+        ("assistant detail", AssistantOutDetail, [_assistant_doc(i) for i in range(docs)]),
+        ("assistant internal", AssistantOutInternal, [_assistant_doc(i) for i in range(docs)]),
+    )
+
+    for label, model_cls, raw in cases:
+        fast = [model_cls.from_raw(d) for d in raw]
+        payloads = [m.model_dump() for m in fast]
+
+        validated = [model_cls.model_validate(p) for p in payloads]
+        assert [to_json(m) for m in validated] == [to_json(m) for m in fast], f"saída divergente ({label})"
+
+        validated_ms = _timeit(lambda: [model_cls.model_validate(p) for p in payloads], repeat)
+        trusted_ms = _timeit(lambda: [model_cls.from_raw(d) for d in raw], repeat)
+        print(
+            f"{label:18} | validado {validated_ms / docs * 1000:7.1f}µs/doc "
+            f"| trusted {trusted_ms / docs * 1000:7.1f}µs/doc | {validated_ms / trusted_ms:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da conversão from_raw.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.docs, args.repeat)
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark da serialização do envelope de resposta (listas grandes).
+
+Compara o caminho antigo (HttpResponse.model_dump + _dump_with_nulls + json.dumps do
+JSONResponse) com o FastJSONResponse (pydantic-core em uma passada) e confere se o
+JSON gerado é o mesmo.
+
+Uso:
+    python -m bench.bench_http_response_advice --items 5000 --repeat 20
+"""
+import argparse
+import json
+import time
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.schemas.agent import AgentOutDetail, AgentOutList
+from app.schemas.http_response import HttpResponse
+from app.schemas.http_response_advice import _build_response
+
+
+# ========= Implementação anterior (referência) =========
+
+def _legacy_dump_with_nulls(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(exclude_none=False)
+    if isinstance(obj, list):
+        return [_legacy_dump_with_nulls(x) for x in obj]
+    if isinstance(obj, dict):
+        return {k: _legacy_dump_with_nulls(v) for k, v in obj.items()}
+    return obj
+
+
+def _legacy_build_response(data, message, status_code, success=True, total=None, pages=None, errors=None) -> bytes:
+    response_model = HttpResponse[Any](
+        message=message, status=status_code, success=success,
+        total=total, pages=pages, errors=errors, data=data,
+    )
+    content = response_model.model_dump(exclude_none=True)
+    content["data"] = _legacy_dump_with_nulls(data)
+    # mesmos parâmetros do starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+# ========= Massa de dados =========
+
+def _list_items(n: int):
+    return [
+        AgentOutList(id=f"{i:024x}", name=f"Agente {i} – ação", description="Descrição " * 10, image=None, enabled=i % 2 == 0)
+        for i in range(n)
+    ]
+
+
+def _detail_items(n: int):
+    return [
+        AgentOutDetail(
+            id=f"{i:024x}",
+            name=f"Agente {i}",
+            description="Descrição " * 10,
+            system_message="Você é um agente.",
+            enabled=True,
+            image=None,
+            ocps=[{"id": "a" * 24, "name": "OCP", "type": "ocp"}],
+            tags=[{"id": "b" * 24, "name": "tag"}],
+            functions=[{"code": f"F{j}", "name": f"Função {j}", "action_type": "GET"} for j in range(3)],
+            tools=[{"tool": {"id": "c" * 24, "name": None}, "code": "T1", "name": "Tool", "required": False}],
+        )
+        for i in range(n)
+    ]
+
+
+def _timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _without_date(raw: bytes) -> dict:
+    content = json.loads(raw)
+    content.pop("date", None)
+    return content
+
+
+def run(items: int, repeat: int) -> None:
+    for label, data in (("list", _list_items(items)), ("detail", _detail_items(items))):
+        legacy = _legacy_build_response(data, None, 200, total=items, pages=1)
+        fast = _build_response(data, None, 200, total=items, pages=1).body
+
+        assert _without_date(legacy) == _without_date(fast), f"saída divergente ({label})"
+        assert list(json.loads(legacy)) == list(json.loads(fast)), f"ordem das chaves divergente ({label})"
+
+        legacy_ms = _timeit(lambda: _legacy_build_response(data, None, 200, total=items, pages=1), repeat)
+        fast_ms = _timeit(lambda: _build_response(data, None, 200, total=items, pages=1), repeat)
+        print(
+            f"{label:6} {items} itens | anterior {legacy_ms:8.2f}ms | fast {fast_ms:8.2f}ms "
+            f"| {legacy_ms / fast_ms:4.1f}x | {len(fast) / 1024:.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do envelope de resposta.")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.items, args.repeat)
@@ -23,14 +23,36 @@ from app.controllers import authenticator as authenticator_ctrl
 from app.controllers import service as service_ctrl
 from app.controllers import ocpm as ocpm_ctrl
 from app.controllers import ocpm_dynamic as ocpm_dynamic_ctrl
+from app.controllers import health as health_ctrl
+from app.controllers import metrics as metrics_ctrl
+from app.controllers import profile as profile_ctrl
 
 from app.core.translations import TRANSLATIONS
+from app.core.lifespan import lifespan, InFlightMiddleware
+from app.core.request_loader import RequestLoaderMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import METRICS_ENABLED, METRICS_TOKEN, MetricsMiddleware
+from app.core.timing import TimingMiddleware
+from app.core.profiler import PROFILE_ENABLED, ProfileMiddleware
+from app.core.logger_config import error
 
 # --- Load variables ---
 load_dotenv()
 app_name = os.getenv("APP_NAME")
 
-app = FastAPI(title=app_name)
+# --- Lifespan: aquece os pools em paralelo e os fecha após drenar as requisições ---
+app = FastAPI(title=app_name, lifespan=lifespan)
+
+# --- Middlewares ---
+app.add_middleware(InFlightMiddleware)
+app.add_middleware(RequestLoaderMiddleware)
+app.add_middleware(CompressionMiddleware)
+# o perfil roda dentro do TimingMiddleware para ver as threads que executaram etapas da requisição
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(TimingMiddleware)
+# por último = mais externo: a latência inclui os demais middlewares
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # --- Exception Handlers (ordem explícita ajuda na leitura) ---
 app.add_exception_handler(DomainError, domain_error_handler)
@@ -49,4 +71,11 @@ app.include_router(ocp_ctrl.router)
 app.include_router(authenticator_ctrl.router)
 app.include_router(service_ctrl.router)
 app.include_router(ocpm_ctrl.router)
-app.include_router(ocpm_dynamic_ctrl.router)
\ No newline at end of file
+app.include_router(ocpm_dynamic_ctrl.router)
+app.include_router(health_ctrl.router)
+if METRICS_ENABLED:
+    if not METRICS_TOKEN:
+        error("[METRICS] METRICS_ENABLED=1 sem METRICS_TOKEN: GET /metrics vai recusar todas as requisições")
+    app.include_router(metrics_ctrl.router)
+if PROFILE_ENABLED:
+    app.include_router(profile_ctrl.router)
\ No newline at end of file
@@ -0,0 +1,4 @@
+import os
+
+# os módulos de models criam o MongoClient no import (a conexão só abre no primeiro uso)
+os.environ.setdefault("MONGO_DB", "test")
@@ -0,0 +1,44 @@
+import pytest
+
+from app.core import compression
+from app.core.compression import negotiate
+
+
+@pytest.fixture(autouse=True)
+def encoders(monkeypatch):
+    # ordem = preferência do servidor
+    monkeypatch.setattr(compression, "ENCODERS", {"zstd": None, "br": None, "gzip": None})
+
+
+def test_negotiate_without_header_returns_none():
+    assert negotiate(None) is None
+    assert negotiate("") is None
+
+
+def test_negotiate_follows_server_preference():
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("gzip, zstd, br") == "zstd"
+
+
+def test_negotiate_ignores_q_zero_and_unknown():
+    assert negotiate("zstd;q=0, gzip") == "gzip"
+    assert negotiate("deflate, identity") is None
+
+
+def test_negotiate_is_case_insensitive_and_tolerates_spaces():
+    assert negotiate(" GZIP ;q=0.5") == "gzip"
+
+
+def test_negotiate_wildcard():
+    assert negotiate("*") == "zstd"
+    assert negotiate("zstd;q=0, *") == "br"
+
+
+def test_negotiate_invalid_q_counts_as_refused():
+    assert negotiate("br;q=abc, gzip") == "gzip"
+
+
+def test_negotiate_without_encoders(monkeypatch):
+    monkeypatch.setattr(compression, "ENCODERS", {})
+
+    assert negotiate("gzip") is None
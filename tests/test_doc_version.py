@@ -0,0 +1,27 @@
+from app.core.doc_version import _if_match_ok
+
+
+def test_if_match_wildcard():
+    assert _if_match_ok("*", 3)
+    assert _if_match_ok(" * ", 0)
+
+
+def test_if_match_weak_and_strong_tags():
+    assert _if_match_ok('W/"v3"', 3)
+    assert _if_match_ok('"v3"', 3)
+    assert not _if_match_ok('W/"v2"', 3)
+
+
+def test_if_match_ignores_dependency_hash():
+    assert _if_match_ok('W/"v3-0a1b2c"', 3)
+
+
+def test_if_match_list_matches_any():
+    assert _if_match_ok('W/"v1", W/"v3"', 3)
+    assert not _if_match_ok('W/"v1", W/"v2"', 3)
+
+
+def test_if_match_rejects_malformed_tags():
+    assert not _if_match_ok("v3", 3)
+    assert not _if_match_ok('W/"3"', 3)
+    assert not _if_match_ok('W/"v3-XYZ"', 3)
@@ -0,0 +1,45 @@
+from bson import ObjectId
+
+from app.core.utils.mongo import fetch_by_ids
+
+
+def _fetcher(docs):
+    calls = []
+
+    def fetch(oids):
+        calls.append(list(oids))
+        return [d for d in docs if d["_id"] in oids]
+
+    return fetch, calls
+
+
+def test_fetch_by_ids_keeps_requested_order_and_reports_missing():
+    a, b, absent = ObjectId(), ObjectId(), ObjectId()
+    fetch, calls = _fetcher([{"_id": a}, {"_id": b}])
+
+    items, missing = fetch_by_ids([str(b), str(absent), str(a)], fetch)
+
+    assert [d["_id"] for d in items] == [b, a]
+    assert missing == [str(absent)]
+    assert len(calls) == 1
+
+
+def test_fetch_by_ids_deduplicates_ids():
+    a = ObjectId()
+    fetch, calls = _fetcher([{"_id": a}])
+
+    items, missing = fetch_by_ids([str(a), str(a)], fetch)
+
+    assert items == [{"_id": a}]
+    assert missing == []
+    assert calls == [[a]]
+
+
+def test_fetch_by_ids_invalid_ids_are_missing_without_query():
+    fetch, calls = _fetcher([])
+
+    items, missing = fetch_by_ids(["nao-e-id", ""], fetch)
+
+    assert items == []
+    assert missing == ["nao-e-id", ""]
+    assert calls == []
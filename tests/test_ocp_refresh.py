@@ -0,0 +1,71 @@
+from app.services.ocp_refresh import diff_fields
+
+
+def _ocp():
+    return {
+        "metadata": {
+            "protocol": "mcp",
+            "version": "1",
+            "source": {"type": "mcp", "url": "http://x", "headers": {"X-Key": "v"}},
+        },
+        "structure": {
+            "description": "",
+            "tools": [{"name": "buscar"}, {"name": "gravar"}],
+        },
+    }
+
+
+def test_diff_fields_equal_documents_produce_no_update():
+    assert diff_fields(_ocp(), _ocp(), "ocp") == ({}, {})
+
+
+def test_diff_fields_sets_only_changed_nested_path():
+    new = _ocp()
+    new["metadata"]["version"] = "2"
+
+    assert diff_fields(_ocp(), new, "ocp") == ({"ocp.metadata.version": "2"}, {})
+
+
+def test_diff_fields_new_key_is_set():
+    new = _ocp()
+    new["structure"]["output_schema"] = {"type": "object"}
+
+    assert diff_fields(_ocp(), new, "ocp") == ({"ocp.structure.output_schema": {"type": "object"}}, {})
+
+
+def test_diff_fields_removed_nested_key_is_unset():
+    new = _ocp()
+    del new["metadata"]["source"]["headers"]
+
+    assert diff_fields(_ocp(), new, "ocp") == ({}, {"ocp.metadata.source.headers": ""})
+
+
+def test_diff_fields_lists_are_replaced_whole():
+    new = _ocp()
+    new["structure"]["tools"] = [{"name": "gravar"}, {"name": "buscar"}]
+
+    to_set, to_unset = diff_fields(_ocp(), new, "ocp")
+
+    assert to_set == {"ocp.structure.tools": [{"name": "gravar"}, {"name": "buscar"}]}
+    assert to_unset == {}
+
+
+def test_diff_fields_changed_item_inside_list_replaces_whole_list():
+    new = _ocp()
+    new["structure"]["tools"][1]["name"] = "apagar"
+
+    assert diff_fields(_ocp(), new, "ocp") == ({"ocp.structure.tools": new["structure"]["tools"]}, {})
+
+
+def test_diff_fields_type_change_replaces_value():
+    new = _ocp()
+    new["metadata"]["source"] = "http://x"
+
+    assert diff_fields(_ocp(), new, "ocp") == ({"ocp.metadata.source": "http://x"}, {})
+
+
+def test_diff_fields_null_is_set_not_unset():
+    new = _ocp()
+    new["structure"]["description"] = None
+
+    assert diff_fields(_ocp(), new, "ocp") == ({"ocp.structure.description": None}, {})
@@ -0,0 +1,136 @@
+from app.core.utils.patch import diff, same, changed_items
+
+
+KEYS = {"agents": "agent.id", "agents.tools": "tool.id"}
+
+
+def _assistant():
+    return {
+        "name": "Assistente",
+        "ai_model": {"id": "m1", "name": "gpt"},
+        "agents": [
+            {
+                "agent": {"id": "a1"},
+                "name": "Primeiro",
+                "tools": [{"tool": {"id": "t1"}, "code": "x"}, {"tool": {"id": "t2"}, "code": "y"}],
+            },
+            {"agent": {"id": "a2"}, "name": "Segundo", "tools": []},
+        ],
+    }
+
+
+# ========= same =========
+
+def test_same_treats_null_and_missing_keys_as_equal():
+    assert same({"a": 1}, {"a": 1, "b": None})
+    assert same([{"a": 1, "b": None}], [{"a": 1}])
+
+
+def test_same_detects_real_changes():
+    assert not same({"a": 1}, {"a": 2})
+    assert not same([1, 2], [2, 1])
+
+
+# ========= diff =========
+
+def test_diff_equal_values_produce_no_update():
+    changes = diff(_assistant(), {"name": "Assistente", "agents": _assistant()["agents"]}, KEYS)
+
+    assert not changes
+    assert changes.update() == {}
+
+
+def test_diff_sets_only_changed_scalar_path():
+    changes = diff(_assistant(), {"ai_model": {"id": "m1", "name": "claude"}}, KEYS)
+
+    assert changes.set == {"ai_model.name": "claude"}
+    assert changes.unset == {}
+    assert changes.fields == {"ai_model"}
+
+
+def test_diff_null_unsets_path():
+    changes = diff(_assistant(), {"ai_model": None}, KEYS)
+
+    assert changes.update() == {"$unset": {"ai_model": ""}}
+
+
+def test_diff_null_for_missing_field_is_a_noop():
+    assert not diff(_assistant(), {"profiles": None}, KEYS)
+
+
+def test_diff_key_removed_from_subobject_is_unset():
+    changes = diff(_assistant(), {"ai_model": {"id": "m1"}}, KEYS)
+
+    assert changes.update() == {"$unset": {"ai_model.name": ""}}
+
+
+def test_diff_keyed_list_uses_array_filters():
+    agents = _assistant()["agents"]
+    agents[1]["name"] = "Renomeado"
+
+    changes = diff(_assistant(), {"agents": agents}, KEYS)
+
+    assert changes.set == {"agents.$[p0].name": "Renomeado"}
+    assert changes.array_filters == [{"p0.agent.id": "a2"}]
+
+
+def test_diff_nested_keyed_lists_chain_array_filters():
+    agents = _assistant()["agents"]
+    agents[0]["tools"][1]["code"] = "z"
+
+    changes = diff(_assistant(), {"agents": agents}, KEYS)
+
+    assert changes.set == {"agents.$[p0].tools.$[p1].code": "z"}
+    assert changes.array_filters == [{"p0.agent.id": "a1"}, {"p1.tool.id": "t2"}]
+
+
+def test_diff_null_inside_keyed_item_unsets_only_that_field():
+    agents = _assistant()["agents"]
+    agents[0]["name"] = None
+
+    changes = diff(_assistant(), {"agents": agents}, KEYS)
+
+    assert changes.update() == {"$unset": {"agents.$[p0].name": ""}}
+    assert changes.array_filters == [{"p0.agent.id": "a1"}]
+
+
+def test_diff_reordered_keyed_list_replaces_whole_list():
+    agents = list(reversed(_assistant()["agents"]))
+
+    changes = diff(_assistant(), {"agents": agents}, KEYS)
+
+    assert changes.set == {"agents": agents}
+    assert changes.array_filters == []
+
+
+def test_diff_added_or_removed_item_replaces_whole_list():
+    agents = _assistant()["agents"][:1]
+
+    changes = diff(_assistant(), {"agents": agents}, KEYS)
+
+    assert changes.set == {"agents": agents}
+    assert changes.array_filters == []
+
+
+def test_diff_duplicate_keys_replace_whole_list():
+    current = {"agents": [{"agent": {"id": "a1"}, "name": "x"}, {"agent": {"id": "a1"}, "name": "y"}]}
+    agents = [{"agent": {"id": "a1"}, "name": "x"}, {"agent": {"id": "a1"}, "name": "z"}]
+
+    changes = diff(current, {"agents": agents}, KEYS)
+
+    assert changes.set == {"agents": agents}
+
+
+def test_diff_list_without_key_mapping_replaces_whole_list():
+    changes = diff({"profiles": ["a", "b"]}, {"profiles": ["a", "c"]}, KEYS)
+
+    assert changes.set == {"profiles": ["a", "c"]}
+
+
+# ========= changed_items =========
+
+def test_changed_items_returns_new_and_modified():
+    old = [{"tool": {"id": "t1"}, "code": "x"}, {"tool": {"id": "t2"}, "code": "y"}]
+    new = [{"tool": {"id": "t1"}, "code": "x", "extra": None}, {"tool": {"id": "t2"}, "code": "z"}, {"tool": {"id": "t3"}}]
+
+    assert changed_items(old, new, "tool.id") == new[1:]
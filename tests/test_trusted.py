@@ -0,0 +1,114 @@
+import pytest
+from bson import ObjectId
+
+from app.core.exceptions.types import BadRequestError
+from app.schemas.agent import AgentOutDetail, Function, Tag, ToolInfo, Tool
+from app.schemas.authenticator import AuthenticatorOutDetail
+from app.schemas.ocp import OCPOutDetail, OCPModel, SourceModel, ToolModel
+from app.schemas.trusted import trusted
+
+
+def _ocp_doc(headers):
+    return {
+        "_id": ObjectId(),
+        "name": "OCP",
+        "ocp": {
+            "metadata": {
+                "protocol": "mcp",
+                "version": "1",
+                "source": {"type": "mcp", "url": "http://x", "headers": headers},
+            },
+            "structure": {
+                "tools": [{"name": "buscar", "input_schema": {"type": "object"}}],
+            },
+        },
+    }
+
+
+def _authenticator_doc(headers):
+    return {"_id": ObjectId(), "name": "Auth", "url": "http://x", "method": "POST", "headers": headers}
+
+
+# ========= Validators "before" =========
+
+@pytest.mark.parametrize("headers", [[], None])
+def test_ocp_from_raw_normalizes_legacy_headers(headers):
+    detail = OCPOutDetail.from_raw(_ocp_doc(headers))
+
+    assert detail.ocp.metadata.source.headers == {}
+    assert detail.model_dump(mode="json")["ocp"]["metadata"]["source"]["headers"] == {}
+
+
+def test_ocp_from_raw_masks_headers():
+    detail = OCPOutDetail.from_raw(_ocp_doc({"Authorization": "Bearer x"}))
+
+    assert detail.ocp.metadata.source.headers == {"Authorization": "****"}
+
+
+@pytest.mark.parametrize("headers", [[], None])
+def test_authenticator_from_raw_normalizes_legacy_headers(headers):
+    assert AuthenticatorOutDetail.from_raw(_authenticator_doc(headers)).headers == {}
+
+
+@pytest.mark.parametrize("headers", [[], None])
+def test_trusted_runs_field_before_validators(headers):
+    detail = trusted(AuthenticatorOutDetail, {"id": "1", "headers": headers, "body": headers})
+
+    assert detail.headers == {}
+    assert detail.body == {}
+
+
+# ========= Validators "after" de modelo =========
+
+def test_trusted_runs_model_after_validators():
+    functions = [{"code": "f1", "name": "a"}, {"code": "f1", "name": "b"}]
+
+    with pytest.raises(BadRequestError):
+        trusted(AgentOutDetail, {"id": "1", "functions": functions})
+
+
+# ========= Conversão =========
+
+def test_trusted_builds_nested_models():
+    detail = OCPOutDetail.from_raw(_ocp_doc({}))
+
+    assert isinstance(detail.ocp, OCPModel)
+    assert isinstance(detail.ocp.metadata.source, SourceModel)
+    assert isinstance(detail.ocp.structure.tools[0], ToolModel)
+    assert detail.ocp.structure.tools[0].description == ""
+
+
+def test_trusted_builds_lists_of_models():
+    detail = trusted(AgentOutDetail, {
+        "id": "1",
+        "tags": [{"id": "t1", "name": "Tag"}],
+        "functions": [{"code": "f1", "name": "a"}],
+        "tools": [{"tool": {"id": "c1"}, "code": "x", "name": "X", "required": False}],
+    })
+
+    assert isinstance(detail.tags[0], Tag)
+    assert isinstance(detail.functions[0], Function)
+    assert isinstance(detail.tools[0], ToolInfo)
+    assert isinstance(detail.tools[0].tool, Tool)
+
+
+def test_trusted_missing_required_field_becomes_none():
+    detail = trusted(AgentOutDetail, {"id": "1"})
+
+    assert detail.name is None
+    assert detail.ocps is None
+    assert detail.enabled is True
+    assert detail.functions is None
+
+
+def test_trusted_ignores_extra_keys():
+    detail = trusted(AgentOutDetail, {"id": "1", "contractor_id": "c"})
+
+    assert "contractor_id" not in detail.model_dump()
+
+
+def test_trusted_matches_validated_output():
+    doc = _ocp_doc({"X-Key": "v"})
+    detail = OCPOutDetail.from_raw(doc)
+
+    assert detail.model_dump(mode="json") == OCPOutDetail.model_validate(detail.model_dump()).model_dump(mode="json")